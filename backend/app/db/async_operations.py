@@ -0,0 +1,88 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional
+
+from flask import current_app, has_app_context
+
+from config import Config
+from app.db import operations
+
+
+class AsyncDB:
+    """
+    Thread-offloaded facade over app.db.operations.
+
+    Exposes the same insert_data/find_data/update_data API, but each call is
+    submitted to a shared worker pool and returns a concurrent.futures.Future
+    immediately, so independent queries of one request overlap instead of
+    running back to back. pymongo is thread-safe and pools its connections,
+    so the workers share the app's client.
+
+    From asyncio code the futures can be awaited with asyncio.wrap_future.
+    """
+
+    def __init__(self, ops: Any = operations, max_workers: Optional[int] = None):
+        """
+        Args:
+            ops: Object providing the synchronous operations (the
+                app.db.operations module, or a test double with the same API)
+            max_workers: Size of the worker pool
+        """
+        self.ops = ops
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.DB_IO_MAX_WORKERS,
+            thread_name_prefix="db-io",
+        )
+
+    def insert_data(self, collection_name: str, data: dict) -> Future:
+        return self.submit(self.ops.insert_data, collection_name, data)
+
+    def find_data(
+        self,
+        collection_name: str,
+        query: dict,
+        limit: int = 100,
+        projection: Optional[dict] = None,
+    ) -> Future:
+        return self.submit(
+            self.ops.find_data, collection_name, query, limit, projection
+        )
+
+    def update_data(
+        self, collection_name: str, query: dict, update: dict, upsert: bool = False
+    ) -> Future:
+        return self.submit(self.ops.update_data, collection_name, query, update, upsert)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Run any blocking call on the worker pool.
+
+        The caller's Flask app context is pushed in the worker so code that
+        reads current_app (e.g. the first get_db call) behaves the same.
+        """
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def call():
+            if app is None:
+                return fn(*args, **kwargs)
+            with app.app_context():
+                return fn(*args, **kwargs)
+
+        return self._executor.submit(call)
+
+    @staticmethod
+    def gather(*futures: Future, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Wait for all futures and return their results in order.
+
+        Every future is waited on before results are read, so an exception in
+        one query is raised only after the others have finished.
+        """
+        wait(futures, timeout=timeout)
+        return [future.result(timeout=0) for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+# Create a global instance for easy access
+async_db = AsyncDB()
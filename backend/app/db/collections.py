@@ -11,4 +11,5 @@ COLLECTIONS = {
     "REWARD_POINTS": "reward_points",
     "PIN_ACTIVITIES": "pin_activities",
     "TRIAL_REPORTS": "trial_reports",
+    "TRIAL_STATS": "trial_stats",
 }
@@ -0,0 +1,139 @@
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from config import Config
+from app.db.collections import COLLECTIONS
+from app.db.operations import get_db_connection
+
+# IndexOptionsConflict / IndexKeySpecsConflict: an index with this name or key
+# already exists with different options
+INDEX_CONFLICT_CODES = (85, 86)
+DUPLICATE_KEY_CODE = 11000
+INDEX_NOT_FOUND_CODE = 27
+NAMESPACE_NOT_FOUND_CODE = 26
+
+
+def _merge_email_records(collection) -> int:
+    from app.services.email.email_records import EmailRecordService
+
+    return EmailRecordService.merge_duplicates(collection)
+
+
+def index_specs() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Indexes the application relies on, per collection.
+
+    Each spec holds the create_index keys plus its options; the name is
+    fixed so the options of an existing index can be updated in place. A
+    unique index may name a deduplicate(collection) function that cleans up
+    existing duplicates if the first build fails on them.
+    """
+    return {
+        COLLECTIONS["USERS"]: [
+            # Report lookups by id (resources, scan updates)
+            {"keys": [("user_Id", ASCENDING)], "name": "user_Id_1"},
+        ],
+        COLLECTIONS["USER_EMAIL_RECORDS"]: [
+            {
+                # One record per address; email record upserts rely on it
+                "keys": [("email", ASCENDING)],
+                "name": "email_1",
+                "unique": True,
+                "deduplicate": _merge_email_records,
+            },
+        ],
+        COLLECTIONS["TRIAL_REPORTS"]: [
+            {"keys": [("trial_id", ASCENDING)], "name": "trial_id_1"},
+            # Time-windowed statistics
+            {"keys": [("created_at", ASCENDING)], "name": "created_at_1"},
+            {
+                # Mongo deletes expired trials the grace period after they
+                # expire, once the reaper has purged their media, so no media
+                # directory is orphaned while the reaper is off or failing.
+                # Linked ("completed") trials are kept. Equality-only filter,
+                # supported by every MongoDB version with partial indexes.
+                "keys": [("expires_at", ASCENDING)],
+                "name": "expires_at_ttl_purged",
+                "expireAfterSeconds": Config.TRIAL_TTL_GRACE_SECONDS,
+                "partialFilterExpression": {"status": "expired", "media_purged": True},
+            },
+        ],
+    }
+
+
+# Indexes replaced by one in index_specs(), dropped by ensure_indexes. The
+# partial filter of a TTL index cannot be changed in place.
+RETIRED_INDEXES: Dict[str, List[str]] = {
+    COLLECTIONS["TRIAL_REPORTS"]: [
+        # Only matched active trials, but the reaper marks them expired long
+        # before the grace period ends, so it never deleted anything
+        "expires_at_ttl_active",
+        # Also deleted active trials whose media the reaper had not purged
+        # yet, and needed MongoDB 6.0 for its $in filter
+        "expires_at_ttl_unlinked",
+    ],
+}
+
+
+def ensure_indexes(db: Optional[Any] = None) -> Dict[str, List[str]]:
+    """
+    Create the application's indexes if they do not exist yet.
+
+    Idempotent and safe to run on every startup. A TTL index whose expiry
+    changed in config is updated with collMod instead of being rebuilt, and
+    RETIRED_INDEXES are dropped.
+
+    Args:
+        db: Database to use (defaults to the app's connection)
+
+    Returns:
+        Dictionary mapping each collection to the names of its ensured indexes
+    """
+    db = db if db is not None else get_db_connection()
+    ensured = {}
+
+    for collection_name, names in RETIRED_INDEXES.items():
+        for name in names:
+            try:
+                db[collection_name].drop_index(name)
+            except OperationFailure as e:
+                if e.code not in (INDEX_NOT_FOUND_CODE, NAMESPACE_NOT_FOUND_CODE):
+                    raise Exception(
+                        f"Failed to drop index {name} on {collection_name}: {str(e)}"
+                    )
+
+    for collection_name, specs in index_specs().items():
+        collection = db[collection_name]
+        for spec in specs:
+            options = {
+                k: v for k, v in spec.items() if k not in ("keys", "deduplicate")
+            }
+            try:
+                try:
+                    collection.create_index(spec["keys"], **options)
+                except OperationFailure as e:
+                    if e.code != DUPLICATE_KEY_CODE or "deduplicate" not in spec:
+                        raise
+                    spec["deduplicate"](collection)
+                    collection.create_index(spec["keys"], **options)
+            except OperationFailure as e:
+                if (
+                    e.code not in INDEX_CONFLICT_CODES
+                    or "expireAfterSeconds" not in options
+                ):
+                    raise Exception(
+                        f"Failed to create index {spec['name']} on {collection_name}: {str(e)}"
+                    )
+                db.command(
+                    "collMod",
+                    collection_name,
+                    index={
+                        "name": spec["name"],
+                        "expireAfterSeconds": options["expireAfterSeconds"],
+                    },
+                )
+            ensured.setdefault(collection_name, []).append(spec["name"])
+
+    return ensured
@@ -1,6 +1,14 @@
 from app.db.db import get_db
+from pymongo import InsertOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
 import datetime
-from typing import Optional
+import functools
+import inspect
+import time
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from app.utils.metrics import db_operation_duration, db_operation_errors
 
 
 # Use lazy initialization with a singleton-like pattern
@@ -11,6 +19,62 @@ def get_db_connection():
     return get_db_connection._db
 
 
+def timed(operation: str) -> Callable:
+    """
+    Record the latency of a collection operation, labelled with the operation
+    and the collection_name argument, and count the calls that raise.
+
+    For generators only the time spent producing each batch is counted, not
+    the time the caller spends between batches.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(collection_name, *args, **kwargs):
+                elapsed = 0.0
+                iterator = func(collection_name, *args, **kwargs)
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - start
+                        yield item
+                except Exception:
+                    db_operation_errors.labels(operation, collection_name).inc()
+                    raise
+                finally:
+                    iterator.close()
+                    db_operation_duration.labels(operation, collection_name).observe(
+                        elapsed
+                    )
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(collection_name, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(collection_name, *args, **kwargs)
+            except Exception:
+                db_operation_errors.labels(operation, collection_name).inc()
+                raise
+            finally:
+                db_operation_duration.labels(operation, collection_name).observe(
+                    time.perf_counter() - start
+                )
+
+        return wrapper
+
+    return decorator
+
+
+@timed("insert")
 def insert_data(collection_name: str, data: dict) -> dict:
     """
     Insert a single document into the specified collection.
@@ -36,6 +100,7 @@ def insert_data(collection_name: str, data: dict) -> dict:
         raise Exception(f"Failed to insert data: {str(e)}")
 
 
+@timed("find")
 def find_data(
     collection_name: str,
     query: dict,
@@ -53,6 +118,108 @@ def find_data(
         raise Exception(f"Failed to query data: {str(e)}")
 
 
+@timed("stream")
+def stream_batches(
+    collection_name: str,
+    query: dict,
+    batch_size: int = 100,
+    projection: Optional[dict] = None,
+) -> Iterator[list]:
+    """
+    Stream every matching document in lists of up to batch_size.
+
+    Uses a single server cursor, so any number of documents can be processed
+    without holding them all in memory or re-running the query per batch.
+
+    Args:
+        collection_name: Name of the collection
+        query: Dictionary containing the query parameters
+        batch_size: Documents per yielded list (and per cursor round trip)
+        projection: Fields to return from each document
+
+    Yields:
+        Lists of documents
+    """
+    db = get_db_connection()
+    collection = db[collection_name]
+
+    try:
+        cursor = collection.find(query, projection, batch_size=batch_size)
+        try:
+            yield from _chunked(cursor, batch_size)
+        finally:
+            cursor.close()
+    except Exception as e:
+        raise Exception(f"Failed to query data: {str(e)}")
+
+
+@timed("aggregate")
+def aggregate_data(collection_name: str, pipeline: list) -> list:
+    """
+    Run an aggregation pipeline on the server.
+
+    Args:
+        collection_name: Name of the collection
+        pipeline: List of aggregation stages
+
+    Returns:
+        List of result documents
+    """
+    db = get_db_connection()
+    collection = db[collection_name]
+
+    try:
+        return list(collection.aggregate(pipeline))
+    except Exception as e:
+        raise Exception(f"Failed to aggregate data: {str(e)}")
+
+
+@timed("count")
+def count_data(collection_name: str, query: dict) -> int:
+    """
+    Count the documents matching a query on the server.
+
+    Args:
+        collection_name: Name of the collection
+        query: Dictionary containing the query parameters
+
+    Returns:
+        Number of matching documents
+    """
+    db = get_db_connection()
+    collection = db[collection_name]
+
+    try:
+        return collection.count_documents(query)
+    except Exception as e:
+        raise Exception(f"Failed to count data: {str(e)}")
+
+
+@timed("estimated_count")
+def estimated_count_data(collection_name: str) -> int:
+    """
+    Number of documents in a collection, from the collection metadata.
+
+    Unlike count_data this does not scan the collection, so it is O(1), but
+    it can be off briefly after an unclean shutdown or during chunk
+    migrations.
+
+    Args:
+        collection_name: Name of the collection
+
+    Returns:
+        Estimated number of documents
+    """
+    db = get_db_connection()
+    collection = db[collection_name]
+
+    try:
+        return collection.estimated_document_count()
+    except Exception as e:
+        raise Exception(f"Failed to count data: {str(e)}")
+
+
+@timed("update")
 def update_data(
     collection_name: str, query: dict, update: dict, upsert: bool = False
 ) -> dict:
@@ -85,3 +252,219 @@ def update_data(
         }
     except Exception as e:
         raise Exception(f"Failed to update data: {str(e)}")
+
+
+@timed("find_one_and_update")
+def find_one_and_update_data(
+    collection_name: str,
+    query: dict,
+    update,
+    projection: Optional[dict] = None,
+    upsert: bool = False,
+    return_updated: bool = True,
+) -> Optional[dict]:
+    """
+    Atomically update a single document and return it.
+
+    Args:
+        collection_name: Name of the collection
+        query: Dictionary containing the query parameters
+        update: Update operators, or a list of aggregation stages for a pipeline update
+        projection: Fields to return from the document
+        upsert: If True, perform an insert if no document matches the query
+        return_updated: Return the document after the update instead of before
+
+    Returns:
+        The matched document, or None if nothing matched
+    """
+    db = get_db_connection()
+    collection = db[collection_name]
+
+    try:
+        # Add updated_at timestamp to the update operations
+        now = datetime.datetime.utcnow()
+        if isinstance(update, list):
+            update = [*update, {"$set": {"updated_at": now}}]
+        else:
+            if "$set" not in update:
+                update["$set"] = {}
+            update["$set"]["updated_at"] = now
+
+        return collection.find_one_and_update(
+            query,
+            update,
+            projection=projection,
+            upsert=upsert,
+            return_document=(
+                ReturnDocument.AFTER if return_updated else ReturnDocument.BEFORE
+            ),
+        )
+    except Exception as e:
+        raise Exception(f"Failed to update data: {str(e)}")
+
+
+DEFAULT_BULK_CHUNK_SIZE = 1000
+
+
+def _chunked(items: Iterable, chunk_size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, max(1, chunk_size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bulk_write(
+    collection_name: str,
+    requests: Iterable,
+    ordered: bool,
+    chunk_size: int,
+    db=None,
+) -> dict:
+    """
+    Send write requests with bulk_write, chunk_size operations per round trip.
+
+    Ordered writes stop at the first failing chunk; unordered writes attempt
+    every operation and report the failures together.
+    """
+    db = db if db is not None else get_db_connection()
+    collection = db[collection_name]
+
+    totals = {
+        "inserted_count": 0,
+        "matched_count": 0,
+        "modified_count": 0,
+        "upserted_count": 0,
+        "upserted_ids": [],
+        "errors": [],
+    }
+
+    def add_result(result: dict, offset: int):
+        totals["inserted_count"] += result.get("nInserted", 0)
+        totals["matched_count"] += result.get("nMatched", 0)
+        totals["modified_count"] += result.get("nModified", 0)
+        totals["upserted_count"] += result.get("nUpserted", 0)
+        totals["upserted_ids"].extend(
+            str(upserted["_id"]) for upserted in result.get("upserted", [])
+        )
+        totals["errors"].extend(
+            {
+                "index": offset + error["index"],
+                "code": error.get("code"),
+                "message": error.get("errmsg"),
+            }
+            for error in result.get("writeErrors", [])
+        )
+
+    offset = 0
+    for chunk in _chunked(requests, chunk_size):
+        try:
+            result = collection.bulk_write(chunk, ordered=ordered)
+            add_result(result.bulk_api_result, offset)
+        except BulkWriteError as e:
+            add_result(e.details, offset)
+            if ordered:
+                break
+        except Exception as e:
+            raise Exception(f"Failed to bulk write data: {str(e)}")
+        offset += len(chunk)
+
+    return totals
+
+
+@timed("bulk_insert")
+def bulk_insert(
+    collection_name: str,
+    documents: Iterable[dict],
+    ordered: bool = True,
+    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    db=None,
+) -> dict:
+    """
+    Insert many documents into the specified collection.
+
+    Args:
+        collection_name: Name of the collection
+        documents: Documents to insert (any iterable, consumed chunk by chunk)
+        ordered: Stop at the first failure instead of attempting every insert
+        chunk_size: Number of documents sent per round trip
+        db: Database to use instead of the app connection
+
+    Returns:
+        Dictionary with inserted_count and the write errors of failed inserts
+    """
+    now = datetime.datetime.utcnow()
+    requests = (InsertOne({**document, "created_at": now}) for document in documents)
+    return _bulk_write(collection_name, requests, ordered, chunk_size, db)
+
+
+def _timestamped_update(update: dict, now: datetime.datetime, upsert: bool) -> dict:
+    update = {**update, "$set": {**update.get("$set", {}), "updated_at": now}}
+    if upsert and "created_at" not in update["$set"]:
+        update["$setOnInsert"] = {"created_at": now, **update.get("$setOnInsert", {})}
+    return update
+
+
+@timed("bulk_update")
+def bulk_update(
+    collection_name: str,
+    updates: Iterable[Tuple[dict, dict]],
+    ordered: bool = True,
+    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    many: bool = False,
+    db=None,
+) -> dict:
+    """
+    Apply many (query, update) pairs to the specified collection.
+
+    Args:
+        collection_name: Name of the collection
+        updates: (query, update) pairs (any iterable, consumed chunk by chunk)
+        ordered: Stop at the first failure instead of attempting every update
+        chunk_size: Number of updates sent per round trip
+        many: Apply each update to every matching document instead of the first
+        db: Database to use instead of the app connection
+
+    Returns:
+        Dictionary with matched_count, modified_count and any write errors
+    """
+    now = datetime.datetime.utcnow()
+    operation = UpdateMany if many else UpdateOne
+    requests = (
+        operation(query, _timestamped_update(update, now, upsert=False))
+        for query, update in updates
+    )
+    return _bulk_write(collection_name, requests, ordered, chunk_size, db)
+
+
+@timed("bulk_upsert")
+def bulk_upsert(
+    collection_name: str,
+    updates: Iterable[Tuple[dict, dict]],
+    ordered: bool = True,
+    chunk_size: int = DEFAULT_BULK_CHUNK_SIZE,
+    db=None,
+) -> dict:
+    """
+    Update or insert one document per (query, update) pair.
+
+    Inserted documents get a created_at timestamp unless the update sets one.
+
+    Args:
+        collection_name: Name of the collection
+        updates: (query, update) pairs (any iterable, consumed chunk by chunk)
+        ordered: Stop at the first failure instead of attempting every upsert
+        chunk_size: Number of upserts sent per round trip
+        db: Database to use instead of the app connection
+
+    Returns:
+        Dictionary with matched, modified and upserted counts, the upserted ids
+        and any write errors
+    """
+    now = datetime.datetime.utcnow()
+    requests = (
+        UpdateOne(query, _timestamped_update(update, now, upsert=True), upsert=True)
+        for query, update in updates
+    )
+    return _bulk_write(collection_name, requests, ordered, chunk_size, db)
@@ -1,9 +1,7 @@
-from datetime import datetime, timezone
 from flask import Blueprint, request
 from app.db.collections import COLLECTIONS
 from app.db.operations import find_data
 from app.services.media.media import videoProcessingStart, audioProcessingStart
-from app.services.report.reward_points_service import calculate_rewards
 
 media_bp = Blueprint("media", __name__)
 
@@ -62,8 +60,6 @@ def process_video():
 
     try:
         result = videoProcessingStart(file, metadata)
-        if not isinstance(metadata, int) and isinstance(metadata["email"], str):
-            calculate_rewards(metadata["email"], datetime.now(timezone.utc))
 
         return {"success": True, "data": result}
     except Exception as e:
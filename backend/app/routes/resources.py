@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify, request
 from app.services.resources.resources_service import ResourcesService
+from app.services.resources.playlist_cache import playlist_cache
 from app.services.resources.exceptions import (
     TrialUserRestrictedError,
     UserNotRegisteredError,
@@ -196,3 +197,16 @@ def get_user_emotional_profile(report_id):
         )
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
+
+
+@resources_bp.route("/api/resources/playlist-cache/stats", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def get_playlist_cache_stats():
+    """
+    Hit/miss counters of the playlist cache and the age of each playlist
+    """
+    try:
+        return jsonify({"success": True, "data": playlist_cache.stats()})
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
@@ -17,7 +17,7 @@ sys.path.append(
 
 from werkzeug.security import generate_password_hash
 from app.db.collections import COLLECTIONS
-from app.db.operations import find_data, insert_data
+from app.db.operations import find_data, bulk_insert
 
 
 def generate_secure_password(length=8):
@@ -64,46 +64,67 @@ def generate_admin_accounts(count, prefix="adm", launch=""):
     Returns:
         List of created admin documents
     """
-    created_accounts = []
+    user_names = [f"admin{prefix}{i}" for i in range(1, count + 1)]
+
+    # Check which admins already exist in a single query
+    existing_names = {
+        admin["user_name"]
+        for admin in find_data(
+            COLLECTIONS["ADMIN_AUTH"],
+            {"user_name": {"$in": user_names}},
+            limit=count,
+            projection={"_id": 0, "user_name": 1},
+        )
+    }
 
-    for i in range(1, count + 1):
-        # Generate user_name: admin + prefix + number (e.g., adminadm1, adminadm2)
-        user_name = f"admin{prefix}{i}"
+    new_accounts = []
+    admin_docs = []
+    for user_name in user_names:
+        if user_name in existing_names:
+            print(f"⚠️  Admin '{user_name}' already exists. Skipping...")
+            continue
 
         # Generate secure password
         password = generate_secure_password()
 
         # Create admin document
-        admin_doc = {
-            "user_name": user_name,
-            "password": generate_password_hash(password, method="pbkdf2:sha256"),
-            "venue": user_name,  # venue gets the user_name value
-            "launch": launch,
-        }
-
-        # Check if admin already exists
-        existing_admin = find_data(
-            COLLECTIONS["ADMIN_AUTH"], {"user_name": user_name}, limit=1
+        admin_docs.append(
+            {
+                "user_name": user_name,
+                "password": generate_password_hash(password, method="pbkdf2:sha256"),
+                "venue": user_name,  # venue gets the user_name value
+                "launch": launch,
+            }
+        )
+        new_accounts.append(
+            {
+                "user_name": user_name,
+                "password": password,  # Store plain password for display
+                "venue": user_name,
+                "launch": launch,
+            }
         )
 
-        if existing_admin:
-            print(f"⚠️  Admin '{user_name}' already exists. Skipping...")
-            continue
+    if not admin_docs:
+        return []
+
+    try:
+        # Insert all admin accounts in bulk; one failure does not stop the rest
+        result = bulk_insert(COLLECTIONS["ADMIN_AUTH"], admin_docs, ordered=False)
+    except Exception as e:
+        print(f"❌ Failed to create admin accounts: {str(e)}")
+        return []
 
-        try:
-            # Insert the admin account
-            insert_data(COLLECTIONS["ADMIN_AUTH"], admin_doc)
-            created_accounts.append(
-                {
-                    "user_name": user_name,
-                    "password": password,  # Store plain password for display
-                    "venue": user_name,
-                    "launch": launch,
-                }
+    failed = {error["index"]: error["message"] for error in result["errors"]}
+    created_accounts = []
+    for index, account in enumerate(new_accounts):
+        if index in failed:
+            print(
+                f"❌ Failed to create admin '{account['user_name']}': {failed[index]}"
             )
-            print(f"✅ Created admin account: {user_name}")
-        except Exception as e:
-            print(f"❌ Failed to create admin '{user_name}': {str(e)}")
+            continue
+        created_accounts.append(account)
+        print(f"✅ Created admin account: {account['user_name']}")
 
     return created_accounts
 
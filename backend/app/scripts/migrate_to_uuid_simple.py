@@ -7,7 +7,11 @@ This script works independently of Flask and directly connects to MongoDB.
 import uuid
 import sys
 from datetime import datetime
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# Users updated per bulk_write round trip
+BATCH_SIZE = 500
 
 
 def get_mongodb_connection():
@@ -36,17 +40,33 @@ def get_users_from_db(db):
         return None
 
 
-def update_user_with_uuid(db, user_id, uuid_value):
-    """Update a user document with UUID"""
-    try:
-        collection = db["user_auth"]  # Using collection name from your config
-        result = collection.update_one(
-            {"_id": user_id}, {"$set": {"user_id": uuid_value}}
-        )
-        return result.modified_count > 0
-    except Exception as e:
-        print(f"Failed to update user {user_id}: {e}")
-        return False
+def update_users_with_uuid(db, uuid_by_user_id):
+    """Update user documents with their UUIDs, many users per round trip"""
+    collection = db["user_auth"]  # Using collection name from your config
+    user_ids = list(uuid_by_user_id)
+    migrated = set()
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start : start + BATCH_SIZE]
+        try:
+            collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": user_id},
+                        {"$set": {"user_id": uuid_by_user_id[user_id]}},
+                    )
+                    for user_id in batch
+                ],
+                ordered=False,
+            )
+            migrated.update(batch)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            migrated.update(
+                user_id for index, user_id in enumerate(batch) if index not in failed
+            )
+        except Exception as e:
+            print(f"Failed to update users: {e}")
+    return migrated
 
 
 def migrate_users_to_uuid():
@@ -69,8 +89,8 @@ def migrate_users_to_uuid():
 
         print(f"Found {len(users)} users to migrate...")
 
-        migrated_count = 0
         skipped_count = 0
+        uuid_by_user_id = {}
 
         for user in users:
             user_id = user.get("_id")
@@ -82,20 +102,15 @@ def migrate_users_to_uuid():
                 continue
 
             # Generate new UUID
-            new_uuid = str(uuid.uuid4())
-
-            try:
-                # Update user document with UUID
-                success = update_user_with_uuid(db, user_id, new_uuid)
-
-                if success:
-                    print(f"✓ Migrated user {user_id} to UUID: {new_uuid}")
-                    migrated_count += 1
-                else:
-                    print(f"✗ Failed to migrate user {user_id}")
-
-            except Exception as e:
-                print(f"✗ Error migrating user {user_id}: {str(e)}")
+            uuid_by_user_id[user_id] = str(uuid.uuid4())
+
+        migrated_ids = update_users_with_uuid(db, uuid_by_user_id)
+        for user_id, new_uuid in uuid_by_user_id.items():
+            if user_id in migrated_ids:
+                print(f"✓ Migrated user {user_id} to UUID: {new_uuid}")
+            else:
+                print(f"✗ Failed to migrate user {user_id}")
+        migrated_count = len(migrated_ids)
 
         print(f"\nMigration completed!")
         print(f"Successfully migrated: {migrated_count} users")
@@ -0,0 +1,7 @@
+from .prefork import PreforkServer, PooledWSGIServer, request_shutdown
+
+__all__ = [
+    "PreforkServer",
+    "PooledWSGIServer",
+    "request_shutdown",
+]
@@ -0,0 +1,322 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+logger = logging.getLogger(__name__)
+
+# Server running in this process, used by request_shutdown()
+_active_server: Optional["PooledWSGIServer"] = None
+
+
+class IdleTimeoutRequestHandler(WSGIRequestHandler):
+    """
+    Request handler with a socket idle timeout.
+
+    HTTP/1.0 closes the connection after each response, so an idle
+    keep-alive client can never hold one of the worker's threads.
+
+    The timeout applies to each socket read and write, so it bounds how long
+    a stalled client can hold a thread, not how long a request may run.
+    """
+
+    protocol_version = "HTTP/1.0"
+    timeout: Optional[float] = None
+
+
+def request_handler(idle_timeout: Optional[float]) -> type:
+    """
+    IdleTimeoutRequestHandler subclass with the given socket idle timeout
+
+    BaseWSGIServer switches a handler to HTTP/1.1 unless protocol_version is
+    set on the handler class itself, not inherited, so it is set again here.
+    """
+    return type(
+        "WorkerRequestHandler",
+        (IdleTimeoutRequestHandler,),
+        {"protocol_version": "HTTP/1.0", "timeout": idle_timeout},
+    )
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server that handles requests on a fixed pool of threads.
+
+    The accept loop waits for a free thread before accepting the next
+    connection, so with several workers on one listening socket a busy worker
+    leaves new connections to the idle ones.
+    """
+
+    multithread = True
+
+    def __init__(self, *args, threads: int = 4, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = max(1, threads)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="http"
+        )
+        self._slots = threading.BoundedSemaphore(self.threads)
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._draining = threading.Event()
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        # Wait for a free thread before accepting, so a busy worker leaves
+        # the connection to another one
+        while not self._slots.acquire(timeout=0.5):
+            if self._draining.is_set():
+                raise OSError("Server is draining")
+        try:
+            # The shared listening socket is non-blocking: when another worker
+            # won the race this raises and the accept loop carries on.
+            request, client_address = self.socket.accept()
+        except BaseException:
+            self._slots.release()
+            raise
+        request.setblocking(True)
+        return request, client_address
+
+    def process_request(self, request, client_address) -> None:
+        with self._idle:
+            self._in_flight += 1
+        self._executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+            with self._idle:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def begin_drain(self) -> None:
+        """Stop accepting connections; requests in progress keep running"""
+        if self._draining.is_set():
+            return
+        self._draining.set()
+        threading.Thread(target=self.shutdown, name="drain", daemon=True).start()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Wait until every in-flight request has finished"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+
+class PreforkServer:
+    """
+    Multi-process WSGI runner for production.
+
+    The parent process runs the preload hook (e.g. loading the model
+    registry), binds the listening socket and forks the workers, so weights
+    loaded once are shared copy-on-write. Each worker serves the shared socket
+    with a fixed thread pool. Dead workers are replaced. SIGTERM/SIGINT (or
+    request_shutdown() from a worker) drains every worker: they stop
+    accepting, finish in-flight requests for up to graceful_timeout seconds
+    and exit.
+
+    Platforms without fork (the Windows booth builds) run a single process
+    with the same thread pool and drain behaviour.
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 5000,
+        workers: int = 2,
+        threads: int = 4,
+        idle_timeout: float = 120,
+        graceful_timeout: float = 30,
+        preload: Optional[Callable[[], Any]] = None,
+        post_fork: Optional[Callable[[int], Any]] = None,
+    ):
+        """
+        Args:
+            app: WSGI application
+            host: Interface to listen on
+            port: Port to listen on
+            workers: Number of worker processes
+            threads: Request threads per worker
+            idle_timeout: Socket idle timeout (seconds) for each read of
+                the request and write of the response; it does not limit how
+                long the view runs
+            graceful_timeout: Seconds to let in-flight requests finish on shutdown
+            preload: Called once in the parent before forking
+            post_fork: Called in each worker with its index after forking
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.threads = max(1, threads)
+        self.idle_timeout = idle_timeout
+        self.graceful_timeout = graceful_timeout
+        self.preload = preload
+        self.post_fork = post_fork
+        self._children: Dict[int, int] = {}  # pid -> worker index
+        self._stopping = False
+
+    def run(self) -> None:
+        if self.preload:
+            self.preload()
+
+        if not hasattr(os, "fork"):
+            logger.info(
+                f"fork() not available, serving with {self.threads} threads "
+                "in a single process"
+            )
+            self._serve(None, 0)
+            return
+
+        listener = socket.create_server(
+            (self.host, self.port), backlog=PooledWSGIServer.request_queue_size
+        )
+        listener.set_inheritable(True)
+
+        # Keep preloaded objects out of the cyclic GC so collections in the
+        # workers do not touch (and copy) their pages.
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        logger.info(
+            f"Starting {self.workers} workers x {self.threads} threads "
+            f"on {self.host}:{self.port}"
+        )
+        for index in range(self.workers):
+            self._spawn(listener, index)
+
+        try:
+            self._supervise(listener)
+        finally:
+            listener.close()
+
+    def _spawn(self, listener: socket.socket, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                self._serve(listener, index)
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                exit_code = 1
+            finally:
+                # os._exit skips atexit: write out buffered / queued logs first
+                logging.shutdown()
+                # Never return into the parent's supervision loop
+                os._exit(exit_code)
+
+        self._children[pid] = index
+        logger.info(f"Worker {index} started (pid {pid})")
+
+    def _supervise(self, listener: socket.socket) -> None:
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            index = self._children.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited with status {status}, restarting"
+            )
+            # Avoid a tight fork loop if workers fail during startup
+            time.sleep(1)
+            self._spawn(listener, index)
+
+    def _handle_stop(self, signum, frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(f"Received signal {signum}, draining workers...")
+
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # Workers that are still running after the grace period are killed
+        timer = threading.Timer(self.graceful_timeout + 5, self._kill_children)
+        timer.daemon = True
+        timer.start()
+
+    def _kill_children(self) -> None:
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def _serve(self, listener: Optional[socket.socket], index: int) -> None:
+        global _active_server
+
+        if self.post_fork:
+            self.post_fork(index)
+
+        handler = request_handler(self.idle_timeout)
+        server = PooledWSGIServer(
+            self.host,
+            self.port,
+            self.app,
+            handler=handler,
+            fd=listener.fileno() if listener else None,
+            threads=self.threads,
+        )
+        server.multiprocess = listener is not None
+        _active_server = server
+
+        if listener is not None:
+            signal.signal(signal.SIGTERM, lambda signum, frame: server.begin_drain())
+
+        server.serve_forever()
+
+        if not server.wait_idle(self.graceful_timeout):
+            logger.warning("Graceful timeout reached with requests still running")
+        logger.info(f"Worker {index} stopped")
+
+
+def request_shutdown() -> bool:
+    """
+    Start a graceful shutdown of the production server.
+
+    In a forked worker the parent is asked to drain every worker; in single
+    process mode this server stops accepting and exits once idle.
+
+    Returns:
+        False if the production server is not running in this process
+    """
+    server = _active_server
+    if server is None:
+        return False
+
+    if server.multiprocess:
+        os.kill(os.getppid(), signal.SIGTERM)
+    else:
+        server.begin_drain()
+    return True
@@ -6,6 +6,7 @@ import jwt
 from werkzeug.security import check_password_hash
 
 from app.db.collections import COLLECTIONS
+from app.db.async_operations import async_db
 from app.db.operations import find_data, update_data
 from app.validations.regex_patterns import EMAIL_REGEX, PIN_REGEX
 
@@ -101,23 +102,19 @@ class LoginUserService:
 
         return True, email, pin
 
-    def _handle_temp_pin_login(self, user: dict, pin: str) -> Tuple[Dict, int]:
+    def _active_reset_query(self, email: str) -> dict:
+        """Query for a pending, unexpired PIN reset request of this email"""
+        return {
+            "email": email,
+            "activity_type": "reset_request",
+            "status": "pending",
+            "temp_pin_expires_at": {"$gt": datetime.now(timezone.utc)},
+        }
+
+    def _handle_temp_pin_login(
+        self, user: dict, pin: str, reset_data: dict
+    ) -> Tuple[Dict, int]:
         """Handle temporary PIN login for password reset"""
-        active_reset = find_data(
-            COLLECTIONS["PIN_ACTIVITIES"],
-            {
-                "user_id": user.get("user_id", ""),
-                "activity_type": "reset_request",
-                "status": "pending",
-                "temp_pin_expires_at": {"$gt": datetime.now(timezone.utc)},
-            },
-            limit=1,
-        )
-
-        if not active_reset:
-            return {"error": "No active PIN reset found"}, 401
-
-        reset_data = active_reset[0]
 
         if reset_data["attempts"] >= 3:
             update_data(
@@ -160,14 +157,11 @@ class LoginUserService:
             )
             return {"error": "Invalid temporary PIN"}, 401
 
-    def _authenticate_user(self, email: str, pin: str) -> Tuple[Dict, int]:
+    def _authenticate_user(self, user: Optional[dict], pin: str) -> Tuple[Dict, int]:
         """Authenticate regular user login"""
-        user_result = find_data(COLLECTIONS["USER_AUTH"], {"email": email}, limit=1)
-
-        if not user_result:
+        if not user:
             return {"error": "Invalid email or PIN."}, 401
 
-        user = user_result[0]
         stored_pin_hash = user.get("pin_hash")
 
         if not stored_pin_hash or not check_password_hash(stored_pin_hash, pin):
@@ -263,24 +257,25 @@ class LoginUserService:
             if not is_valid:
                 return {"error": "Invalid email or PIN."}, 401
 
-            user_result = find_data(COLLECTIONS["USER_AUTH"], {"email": email}, limit=1)
-            if user_result:
-                user = user_result[0]
-                active_reset = find_data(
+            # The user and any pending PIN reset are independent lookups
+            user_result, active_reset = async_db.gather(
+                async_db.find_data(COLLECTIONS["USER_AUTH"], {"email": email}, limit=1),
+                async_db.find_data(
                     COLLECTIONS["PIN_ACTIVITIES"],
-                    {
-                        "user_id": user.get("user_id", ""),
-                        "activity_type": "reset_request",
-                        "status": "pending",
-                        "temp_pin_expires_at": {"$gt": datetime.now(timezone.utc)},
-                    },
+                    self._active_reset_query(email),
                     limit=1,
-                )
+                ),
+            )
+            user = user_result[0] if user_result else None
 
-                if active_reset:
-                    return self._handle_temp_pin_login(user, pin)
+            if (
+                user
+                and active_reset
+                and active_reset[0].get("user_id") == user.get("user_id", "")
+            ):
+                return self._handle_temp_pin_login(user, pin, active_reset[0])
 
-            return self._authenticate_user(email, pin)
+            return self._authenticate_user(user, pin)
 
         elif role == "admin":
             is_valid, user_name, password, status_code = (
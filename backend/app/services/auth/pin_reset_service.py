@@ -9,7 +9,7 @@ import jwt
 from app.db.operations import find_data, insert_data, update_data
 from app.db.collections import COLLECTIONS
 from app.validations.regex_patterns import EMAIL_REGEX, PIN_REGEX
-from app.services.email.email_service import EmailService
+from app.services.email.email_service import get_email_service
 
 
 class PinResetService:
@@ -71,7 +71,7 @@ class PinResetService:
         insert_data(COLLECTIONS["PIN_ACTIVITIES"], pin_activity)
 
         try:
-            email_service = EmailService()
+            email_service = get_email_service()
             email_service.send_pin_reset(
                 to_email=email,
                 temp_pin=temp_pin,
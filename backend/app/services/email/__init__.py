@@ -1,10 +1,19 @@
-from .email_service import EmailService, send_email
+from .email_service import EmailService, get_email_service, send_email
+from .email_records import EmailRecordService, email_records
+from .outbox import EmailOutbox, OutboxMessage
+from .smtp_pool import SMTPConnectionPool
 from .template_manager import EmailTemplateManager
 from .email_types import EMAIL_TYPES, EmailType
 
 __all__ = [
     "EmailService",
+    "get_email_service",
     "send_email",
+    "EmailRecordService",
+    "email_records",
+    "EmailOutbox",
+    "OutboxMessage",
+    "SMTPConnectionPool",
     "EmailTemplateManager",
     "EMAIL_TYPES",
     "EmailType",
@@ -0,0 +1,167 @@
+import datetime
+import logging
+from typing import Callable, Optional, Tuple
+
+from app.db.collections import COLLECTIONS
+from app.db.operations import update_data
+from .outbox import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+class EmailRecordService:
+    """
+    Which reports were emailed to which address, in USER_EMAIL_RECORDS.
+
+    Every write is one upsert keyed on email: $addToSet appends the report
+    id, $set updates the fields the caller provided, and $setOnInsert fills
+    the rest of a new record. There is no read first, so concurrent sends
+    to the same address cannot race each other into two records; the unique
+    index on email (see app.db.indexes) makes the server retry a losing
+    concurrent insert as an update.
+    """
+
+    def record_sent(
+        self,
+        email: str,
+        report_id: Optional[str] = None,
+        name: Optional[str] = None,
+        mood: Optional[str] = None,
+    ) -> dict:
+        """
+        Record that a report email was delivered
+
+        Args:
+            email: Recipient address
+            report_id: Report that was sent, added to the record's report_id list
+            name: Recipient name, stored if provided
+            mood: Recipient mood, stored if provided
+
+        Returns:
+            Dictionary with update statistics (see update_data)
+        """
+        now = datetime.datetime.utcnow()
+        fields = {"name": name, "mood": mood}
+        update = {
+            "$set": {"email_sent": True, "last_sent_at": now},
+            "$setOnInsert": {"created_at": now},
+        }
+        for field, value in fields.items():
+            if value:
+                update["$set"][field] = value
+            else:
+                update["$setOnInsert"][field] = ""
+        if report_id is not None:
+            update["$addToSet"] = {"report_id": report_id}
+        else:
+            update["$setOnInsert"]["report_id"] = []
+
+        try:
+            return update_data(
+                COLLECTIONS["USER_EMAIL_RECORDS"], {"email": email}, update, True
+            )
+        except Exception as e:
+            raise Exception(f"Failed to record email to {email}: {str(e)}")
+
+    def record_failed(self, email: str, error: Optional[str] = None) -> dict:
+        """
+        Record that an email to this address failed for good. An existing
+        record keeps its email_sent flag and report ids.
+
+        Returns:
+            Dictionary with update statistics (see update_data)
+        """
+        now = datetime.datetime.utcnow()
+        update = {
+            "$set": {"last_failed_at": now, "last_error": error},
+            "$setOnInsert": {
+                "created_at": now,
+                "name": "",
+                "mood": "",
+                "email_sent": False,
+                "report_id": [],
+            },
+        }
+        try:
+            return update_data(
+                COLLECTIONS["USER_EMAIL_RECORDS"], {"email": email}, update, True
+            )
+        except Exception as e:
+            raise Exception(f"Failed to record email to {email}: {str(e)}")
+
+    @staticmethod
+    def merge_duplicates(collection) -> int:
+        """
+        Merge records that share an email into the oldest one, so the unique
+        index can be built over data written before it existed. Report ids
+        are combined; name and mood come from the newest record that has them.
+
+        Args:
+            collection: The USER_EMAIL_RECORDS collection
+
+        Returns:
+            Number of records removed
+        """
+        duplicates = collection.aggregate(
+            [
+                {"$sort": {"_id": 1}},
+                {"$group": {"_id": "$email", "docs": {"$push": "$$ROOT"}}},
+                {"$match": {"docs.1": {"$exists": True}}},
+            ]
+        )
+        removed = 0
+        for group in duplicates:
+            keep, *others = group["docs"]
+            report_ids = []
+            fields = {}
+            for doc in group["docs"]:
+                ids = doc.get("report_id") or []
+                for report_id in ids if isinstance(ids, list) else [ids]:
+                    if report_id not in report_ids:
+                        report_ids.append(report_id)
+                for field in ("name", "mood"):
+                    if doc.get(field):
+                        fields[field] = doc[field]
+            fields["report_id"] = report_ids
+            fields["email_sent"] = any(doc.get("email_sent") for doc in group["docs"])
+
+            collection.update_one({"_id": keep["_id"]}, {"$set": fields})
+            result = collection.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in others]}}
+            )
+            removed += result.deleted_count
+        if removed:
+            logger.warning(f"Merged {removed} duplicate email records")
+        return removed
+
+    def delivery_callbacks(
+        self,
+        report_id: Optional[str] = None,
+        name: Optional[str] = None,
+        mood: Optional[str] = None,
+    ) -> Tuple[Callable[[OutboxMessage], None], Callable[[OutboxMessage], None]]:
+        """
+        on_delivered / on_failed callbacks for EmailService.send_email that
+        record the outcome once the outbox knows it
+
+        Returns:
+            Tuple of (on_delivered, on_failed)
+        """
+
+        def on_delivered(message: OutboxMessage) -> None:
+            try:
+                self.record_sent(message.to_email, report_id, name, mood)
+            except Exception as e:
+                logger.error(str(e))
+
+        def on_failed(message: OutboxMessage) -> None:
+            try:
+                self.record_failed(message.to_email, message.last_error)
+            except Exception as e:
+                logger.error(str(e))
+
+        return on_delivered, on_failed
+
+
+# Create a global instance for easy access
+email_records = EmailRecordService()
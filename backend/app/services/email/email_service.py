@@ -1,19 +1,29 @@
 import os
-import smtplib
 import logging
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import Dict, Any, Optional
+import threading
+from typing import Callable, Dict, Any, Optional
+from config import Config
 from .template_manager import EmailTemplateManager
-from .email_types import EMAIL_TYPES, EmailType
+from .outbox import EmailOutbox, OutboxMessage
+from .smtp_pool import SMTPConnectionPool
 
 
 class EmailService:
-    def __init__(self):
+    def __init__(
+        self,
+        pool: Optional[SMTPConnectionPool] = None,
+        use_outbox: Optional[bool] = None,
+    ):
+        """
+        Args:
+            pool: SMTP connections to send over (defaults to one built from Config)
+            use_outbox: Queue emails for the background workers instead of
+                sending them in the caller (defaults to EMAIL_OUTBOX_ENABLED)
+        """
         self.sender_email = os.getenv("EMAIL")
         self.sender_password = os.getenv("EMAIL_PASSWORD")
-        self.smtp_server = "smtp.office365.com"
-        self.smtp_port = 587
+        self.smtp_server = Config.EMAIL_SMTP_SERVER
+        self.smtp_port = Config.EMAIL_SMTP_PORT
 
         # Validate configuration
         if not self.sender_email or not self.sender_password:
@@ -22,12 +32,35 @@ class EmailService:
         # Initialize template manager
         self.template_manager = EmailTemplateManager()
 
+        self.pool = pool or SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            username=self.sender_email,
+            password=self.sender_password,
+            size=Config.EMAIL_SMTP_POOL_SIZE,
+            keepalive_seconds=Config.EMAIL_SMTP_KEEPALIVE_SECONDS,
+            max_idle_seconds=Config.EMAIL_SMTP_MAX_IDLE_SECONDS,
+        )
+        self.outbox = EmailOutbox(
+            self.pool,
+            self.sender_email,
+            workers=self.pool.size,
+            batch_size=Config.EMAIL_OUTBOX_BATCH_SIZE,
+            max_attempts=Config.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            backoff_seconds=Config.EMAIL_OUTBOX_BACKOFF_SECONDS,
+        )
+        self.use_outbox = (
+            Config.EMAIL_OUTBOX_ENABLED if use_outbox is None else use_outbox
+        )
+
     def send_email(
         self,
         email_type: str,
         to_email: str,
         custom_data: Dict[str, Any],
         custom_subject: Optional[str] = None,
+        on_delivered: Optional[Callable[[OutboxMessage], None]] = None,
+        on_failed: Optional[Callable[[OutboxMessage], None]] = None,
     ) -> bool:
         """
         Send email using predefined email types
@@ -37,73 +70,74 @@ class EmailService:
             to_email: Recipient email address
             custom_data: Data specific to this email
             custom_subject: Optional custom subject (overrides default)
+            on_delivered: Called with the message once it has been sent
+            on_failed: Called with the message once it has failed for good
 
         Returns:
-            bool: True if email sent successfully, False otherwise
+            bool: True if email was queued (or, without the outbox, sent)
+            successfully, False otherwise
         """
         try:
-            if email_type not in EMAIL_TYPES:
-                raise ValueError(f"Unknown email type: {email_type}")
-
-            email_config = EMAIL_TYPES[email_type]
-            self._validate_required_variables(email_config, custom_data)
-
-            email_data = {**email_config.default_data, **custom_data}
-
-            subject = custom_subject or email_config.subject_template
-
-            formatted_body = self.template_manager.render_template(
-                email_config.template_name, email_data
+            # Template compiled and variables checked when the manager loaded
+            email = self.template_manager.get_email(email_type)
+            missing_vars = email.missing_variables(custom_data)
+            if missing_vars:
+                raise ValueError(f"Missing required variables: {sorted(missing_vars)}")
+
+            subject = custom_subject or email.subject
+            formatted_body = email.render(custom_data)
+            return self._deliver(
+                to_email, subject, formatted_body, on_delivered, on_failed
             )
-            return self._send_smtp_email(to_email, subject, formatted_body)
 
         except Exception as e:
             logging.error(f"Error preparing email {email_type}: {str(e)}")
             return False
 
-    def _validate_required_variables(
-        self, email_config: EmailType, data: Dict[str, Any]
-    ):
-        """Validate that all required variables are provided"""
-        missing_vars = [
-            var for var in email_config.required_variables if var not in data
-        ]
-        if missing_vars:
-            raise ValueError(f"Missing required variables: {missing_vars}")
-
-    def _send_smtp_email(self, to_email: str, subject: str, html_body: str) -> bool:
-        """Send email via SMTP"""
-        try:
-            message = MIMEMultipart("alternative")
-            message["From"] = self.sender_email
-            message["To"] = to_email
-            message["Subject"] = subject
-            message["X-Mailer"] = "W3LL Station Email Service"
-
-            message.attach(MIMEText(html_body, "html"))
-
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                logging.info("SMTP connection established, starting TLS...")
-                server.starttls()
-                logging.info("TLS started, attempting login...")
-                server.login(self.sender_email, self.sender_password)
-                logging.info("Login successful, sending email...")
-                response = server.sendmail(
-                    self.sender_email, to_email, message.as_string()
-                )
-                logging.info(f"SMTP response: {response}")
-                logging.info(f"Email sent successfully to {to_email}")
+    def _deliver(
+        self,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        on_delivered: Optional[Callable[[OutboxMessage], None]] = None,
+        on_failed: Optional[Callable[[OutboxMessage], None]] = None,
+    ) -> bool:
+        """Queue the email, or send it right away when the outbox is off"""
+        if self.use_outbox:
+            message = self.outbox.enqueue(
+                to_email, subject, html_body, on_delivered, on_failed
+            )
+            if message is None:
+                logging.error(f"Email outbox full, dropping email to {to_email}")
+            return message is not None
 
-            return True
+        sent = self._send_smtp_email(to_email, subject, html_body)
+        callback = on_delivered if sent else on_failed
+        if callback:
+            callback(OutboxMessage(to_email=to_email, subject=subject, mime=""))
+        return sent
 
-        except Exception as e:
-            logging.error(f"Error sending email: {str(e)}")
-            return False
+    def _send_smtp_email(self, to_email: str, subject: str, html_body: str) -> bool:
+        """Send email via SMTP, synchronously, over a pooled connection"""
+        sent = self.outbox.send_now(to_email, subject, html_body)
+        if sent:
+            logging.info(f"Email sent successfully to {to_email}")
+        return sent
 
-    def send_wellbeing_report(self, to_email: str, report_link: str) -> bool:
+    def send_wellbeing_report(
+        self,
+        to_email: str,
+        report_link: str,
+        on_delivered: Optional[Callable[[OutboxMessage], None]] = None,
+        on_failed: Optional[Callable[[OutboxMessage], None]] = None,
+    ) -> bool:
         """Send wellbeing report email"""
         return self.send_email(
-            "wellbeing_report", to_email, {"report_link": report_link}
+            "wellbeing_report",
+            to_email,
+            {"report_link": report_link},
+            on_delivered=on_delivered,
+            on_failed=on_failed,
         )
 
     def send_pin_reset(self, to_email: str, temp_pin: str) -> bool:
@@ -115,16 +149,36 @@ class EmailService:
             raise Exception("Something went wrong")
 
 
+_service_lock = threading.Lock()
+_service: Optional[EmailService] = None
+
+
+def get_email_service() -> EmailService:
+    """
+    EmailService shared by the process, so its SMTP connections and outbox
+    workers are reused across requests
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmailService()
+        return _service
+
+
 # Backward compatibility - keep the old function for existing code
-def send_email(to_email, subject, data):
+def send_email(to_email, subject, data, on_delivered=None, on_failed=None):
     """Legacy function for backward compatibility"""
-    service = EmailService()
+    service = get_email_service()
 
     if "report_link" in data:
-        return service.send_wellbeing_report(to_email, data["report_link"])
+        return service.send_wellbeing_report(
+            to_email, data["report_link"], on_delivered, on_failed
+        )
     else:
-        return service._send_smtp_email(
+        return service._deliver(
             to_email,
             subject,
             service.template_manager.render_template("wellbeing_report", data),
+            on_delivered,
+            on_failed,
         )
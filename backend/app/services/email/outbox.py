@@ -0,0 +1,366 @@
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+
+from .smtp_pool import SMTPConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Errors about one message; the connection stays usable for the next one
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+LATENCY_SAMPLES = 1000
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+def build_message(sender: str, to_email: str, subject: str, html_body: str) -> str:
+    """MIME text of an HTML email"""
+    message = MIMEMultipart("alternative")
+    message["From"] = sender
+    message["To"] = to_email
+    message["Subject"] = subject
+    message["X-Mailer"] = "W3LL Station Email Service"
+    message.attach(MIMEText(html_body, "html"))
+    return message.as_string()
+
+
+@dataclass
+class OutboxMessage:
+    to_email: str
+    subject: str
+    mime: str
+    on_delivered: Optional[Callable[["OutboxMessage"], None]] = None
+    on_failed: Optional[Callable[["OutboxMessage"], None]] = None
+    id: str = field(default_factory=lambda: uuid4().hex)
+    enqueued_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    last_error: Optional[str] = None
+
+
+def _is_permanent(error: Exception) -> bool:
+    """5xx replies will not succeed on retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, "smtp_code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class EmailOutbox:
+    """
+    In-process queue of outgoing emails, sent by background workers.
+
+    Callers enqueue a rendered message and return immediately. Each worker
+    takes up to batch_size due messages and sends them over one pooled SMTP
+    connection. Temporary failures are retried with exponential backoff (with
+    jitter) up to max_attempts; 5xx rejections fail at once. on_delivered /
+    on_failed callbacks run on the worker once a message's outcome is known.
+
+    The queue lives in process memory: messages still queued when the
+    process is killed are lost. On a normal exit the workers get
+    shutdown_timeout seconds to drain it.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPConnectionPool,
+        sender: str,
+        workers: int = 2,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        backoff_seconds: float = 2,
+        max_backoff_seconds: float = 300,
+        max_queue: int = 10000,
+        shutdown_timeout: float = 10,
+    ):
+        """
+        Args:
+            pool: SMTP connections the workers send over
+            sender: From address
+            workers: Sending threads (at most pool.size are sending at once)
+            batch_size: Messages sent per connection checkout
+            max_attempts: Sends tried per message before it fails
+            backoff_seconds: Delay before the first retry, doubled per attempt
+            max_backoff_seconds: Upper bound of the retry delay
+            max_queue: Messages held before enqueue is refused
+            shutdown_timeout: Seconds to drain the queue at interpreter exit
+        """
+        self.pool = pool
+        self.sender = sender
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_queue = max_queue
+        self.shutdown_timeout = shutdown_timeout
+
+        self._heap = []  # (due_at, sequence, message)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._pid = None
+        self._atexit_registered = False
+
+        self._counters = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "rejected": 0,
+            "batches": 0,
+        }
+        self._delivery_latency = deque(maxlen=LATENCY_SAMPLES)
+        self._send_latency = deque(maxlen=LATENCY_SAMPLES)
+        self._sent_at = deque()
+
+    def enqueue(
+        self,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        on_delivered: Optional[Callable[[OutboxMessage], None]] = None,
+        on_failed: Optional[Callable[[OutboxMessage], None]] = None,
+    ) -> Optional[OutboxMessage]:
+        """
+        Queue an HTML email for sending
+
+        Returns:
+            The queued message, or None if the queue is full
+        """
+        message = OutboxMessage(
+            to_email=to_email,
+            subject=subject,
+            mime=build_message(self.sender, to_email, subject, html_body),
+            on_delivered=on_delivered,
+            on_failed=on_failed,
+        )
+
+        self._ensure_started()
+        with self._condition:
+            if len(self._heap) >= self.max_queue:
+                self._counters["rejected"] += 1
+                return None
+            self._push(message, time.time())
+            self._counters["enqueued"] += 1
+        return message
+
+    def send_now(self, to_email: str, subject: str, html_body: str) -> bool:
+        """Send one email synchronously over a pooled connection"""
+        message = OutboxMessage(
+            to_email=to_email,
+            subject=subject,
+            mime=build_message(self.sender, to_email, subject, html_body),
+        )
+        try:
+            with self.pool.connection() as server:
+                self._send(server, message)
+            return True
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Error sending email to {to_email}: {e}")
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued message has been delivered or has failed
+
+        Returns:
+            True if the queue drained within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._heap or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Drain the queue (up to timeout seconds), then stop the workers"""
+        if not self._threads:
+            return True
+        drained = self.flush(self.shutdown_timeout if timeout is None else timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
+        return drained
+
+    def stats(self) -> Dict[str, object]:
+        """Counters, queue depth, throughput and latency percentiles"""
+        now = time.time()
+        with self._condition:
+            while self._sent_at and self._sent_at[0] < now - THROUGHPUT_WINDOW_SECONDS:
+                self._sent_at.popleft()
+            stats = {
+                **self._counters,
+                "queued": len(self._heap),
+                "in_flight": self._in_flight,
+                "workers": len(self._threads),
+                "sent_per_second": round(
+                    len(self._sent_at) / THROUGHPUT_WINDOW_SECONDS, 3
+                ),
+                "delivery_latency_seconds": self._latency(self._delivery_latency),
+                "send_latency_seconds": self._latency(self._send_latency),
+            }
+        stats["smtp_pool"] = self.pool.stats()
+        return stats
+
+    @staticmethod
+    def _latency(samples: deque) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        values = list(samples)
+        return {
+            "avg": round(sum(values) / len(values), 4),
+            "p50": round(_percentile(values, 0.5), 4),
+            "p95": round(_percentile(values, 0.95), 4),
+            "max": round(max(values), 4),
+        }
+
+    def _ensure_started(self) -> None:
+        """Start the workers in this process (threads do not survive a fork)"""
+        if self._pid == os.getpid() and self._threads:
+            return
+        with self._condition:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._in_flight = 0
+            self._threads = [
+                threading.Thread(
+                    target=self._run, name=f"email-outbox-{index}", daemon=True
+                )
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def _push(self, message: OutboxMessage, due_at: float) -> None:
+        heapq.heappush(self._heap, (due_at, next(self._sequence), message))
+        # Workers and flush() wait on the same condition
+        self._condition.notify_all()
+
+    def _next_batch(self) -> Optional[List[OutboxMessage]]:
+        with self._condition:
+            while True:
+                if self._stopping:
+                    return None
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    batch = []
+                    while (
+                        self._heap
+                        and self._heap[0][0] <= now
+                        and len(batch) < self.batch_size
+                    ):
+                        batch.append(heapq.heappop(self._heap)[2])
+                    self._in_flight += len(batch)
+                    return batch
+                self._condition.wait(self._heap[0][0] - now if self._heap else None)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._send_batch(batch)
+            finally:
+                with self._condition:
+                    self._in_flight -= len(batch)
+                    self._counters["batches"] += 1
+                    self._condition.notify_all()
+
+    def _send_batch(self, batch: List[OutboxMessage]) -> None:
+        for message in batch:
+            message.attempts += 1
+
+        sent = 0
+        try:
+            with self.pool.connection() as server:
+                for message in batch:
+                    try:
+                        self._send(server, message)
+                    except MESSAGE_ERRORS as e:
+                        self._attempt_failed(message, e)
+                    else:
+                        self._delivered(message)
+                    sent += 1
+        except Exception as e:
+            # Connection-level failure: everything not yet tried is retried
+            logger.warning(f"SMTP batch failed after {sent} messages: {e}")
+            for message in batch[sent:]:
+                self._attempt_failed(message, e)
+
+    def _send(self, server: smtplib.SMTP, message: OutboxMessage) -> None:
+        start = time.perf_counter()
+        server.sendmail(self.sender, [message.to_email], message.mime)
+        with self._condition:
+            self._send_latency.append(time.perf_counter() - start)
+
+    def _delivered(self, message: OutboxMessage) -> None:
+        now = time.time()
+        with self._condition:
+            self._counters["sent"] += 1
+            self._delivery_latency.append(now - message.enqueued_at)
+            self._sent_at.append(now)
+        self._callback(message.on_delivered, message)
+
+    def _attempt_failed(self, message: OutboxMessage, error: Exception) -> None:
+        message.last_error = str(error)
+        if _is_permanent(error) or message.attempts >= self.max_attempts:
+            logger.error(
+                f"Email to {message.to_email} failed after "
+                f"{message.attempts} attempts: {error}"
+            )
+            with self._condition:
+                self._counters["failed"] += 1
+            self._callback(message.on_failed, message)
+            return
+
+        delay = min(
+            self.max_backoff_seconds,
+            self.backoff_seconds * 2 ** (message.attempts - 1),
+        )
+        with self._condition:
+            self._counters["retried"] += 1
+            self._push(message, time.time() + delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    def _callback(callback: Optional[Callable], message: OutboxMessage) -> None:
+        if callback is None:
+            return
+        try:
+            callback(message)
+        except Exception as e:
+            logger.warning(f"Email outbox callback failed for {message.id}: {e}")
@@ -0,0 +1,151 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """
+    Authenticated SMTP connections reused across messages.
+
+    Opening a connection costs a TCP connect, EHLO, STARTTLS and AUTH, so
+    connections are kept open and handed out again. A connection idle for
+    more than keepalive_seconds is checked with NOOP before reuse, and one
+    idle for more than max_idle_seconds is closed (servers drop idle
+    sessions anyway).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 2,
+        use_tls: bool = True,
+        timeout: float = 30,
+        keepalive_seconds: float = 30,
+        max_idle_seconds: float = 240,
+    ):
+        """
+        Args:
+            host: SMTP server
+            port: SMTP port
+            username: Login user (no AUTH when empty)
+            password: Login password
+            size: Maximum number of open connections
+            use_tls: Run STARTTLS after connecting
+            timeout: Socket timeout in seconds
+            keepalive_seconds: Idle time after which a connection is checked
+                with NOOP before it is reused
+            max_idle_seconds: Idle time after which a connection is closed
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = max(1, size)
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.keepalive_seconds = keepalive_seconds
+        self.max_idle_seconds = max_idle_seconds
+
+        # Most recently used first, so the fewest connections go idle
+        self._idle = queue.LifoQueue()  # (connection, returned_at)
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._stats = {"opened": 0, "reused": 0, "noop_failures": 0, "discarded": 0}
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """
+        Borrow a logged-in connection for one or more sendmail calls.
+
+        The connection goes back to the pool only if the block finished;
+        whatever the block raised (an SMTP or socket error, but also e.g. an
+        encoding error in sendmail), the connection is closed, as it may be
+        left mid-transaction.
+        """
+        self._slots.acquire()
+        try:
+            server = self._checkout()
+            try:
+                yield server
+            except BaseException:
+                self._close(server)
+                raise
+            self._idle.put((server, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def discard(self) -> None:
+        """Close every idle connection (e.g. after a credentials change)"""
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "idle": self._idle.qsize(), "size": self.size}
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            idle_for = time.monotonic() - returned_at
+            if idle_for > self.max_idle_seconds:
+                self._close(server)
+                continue
+            if idle_for > self.keepalive_seconds and not self._is_alive(server):
+                self._count("noop_failures")
+                self._close(server)
+                continue
+
+            self._count("reused")
+            return server
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            server.ehlo()
+            if self.use_tls:
+                server.starttls()
+                server.ehlo()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+
+        self._count("opened")
+        logger.info(f"SMTP connection opened to {self.host}:{self.port}")
+        return server
+
+    @staticmethod
+    def _is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _close(self, server: smtplib.SMTP) -> None:
+        self._count("discarded")
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
@@ -1,39 +1,242 @@
 import os
+import re
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional
+from string import Formatter
+from typing import Dict, Any, FrozenSet, Optional, Tuple
 import logging
 
+from config import Config
+from .email_types import EMAIL_TYPES, EmailType
+
+_COMMENT = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _collapse(match: re.Match) -> str:
+    return "\n" if "\n" in match.group(0) else " "
+
+
+def minify_html(html: str) -> str:
+    """
+    Drop HTML comments (except conditional ones) and collapse whitespace runs
+    to one character, which renders the same outside <pre> and <textarea>.
+
+    Runs spanning lines become a single newline: SMTP limits lines to 998
+    characters, and the body is sent unencoded.
+    """
+    return _WHITESPACE.sub(_collapse, _COMMENT.sub("", html)).strip()
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """
+    A template split once into literal segments and variable slots.
+
+    segments has one more entry than slots; rendering interleaves them, so
+    no parsing happens per email.
+    """
+
+    name: str
+    segments: Tuple[str, ...]
+    slots: Tuple[Tuple[str, str, Optional[str]], ...]  # (variable, spec, conversion)
+    variables: FrozenSet[str]
+    mtime: float
+
+    @classmethod
+    def compile(cls, name: str, text: str, mtime: float = 0.0) -> "CompiledTemplate":
+        """
+        Raises:
+            ValueError if the template is not valid str.format syntax or uses
+            attribute/index lookups or positional fields
+        """
+        segments, slots, literal = [], [], []
+        for literal_text, field, spec, conversion in Formatter().parse(text):
+            literal.append(literal_text)
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(
+                    f"Template {name}: unsupported variable {{{field}}}, "
+                    f"use plain names"
+                )
+            segments.append("".join(literal))
+            literal = []
+            slots.append((field, spec or "", conversion))
+        segments.append("".join(literal))
+
+        return cls(
+            name=name,
+            segments=tuple(segments),
+            slots=tuple(slots),
+            variables=frozenset(slot[0] for slot in slots),
+            mtime=mtime,
+        )
+
+    def render(self, data: Dict[str, Any]) -> str:
+        missing = self.variables - data.keys()
+        if missing:
+            raise ValueError(
+                f"Template variable {sorted(missing)} is required but not provided"
+            )
+
+        parts = [self.segments[0]]
+        for (variable, spec, conversion), literal in zip(self.slots, self.segments[1:]):
+            value = data[variable]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            elif conversion == "a":
+                value = ascii(value)
+            parts.append(format(value, spec) if spec else str(value))
+            parts.append(literal)
+        return "".join(parts)
+
+
+@dataclass(frozen=True)
+class PreparedEmail:
+    """An email type with its compiled template and validation precomputed"""
+
+    email_type: str
+    template: CompiledTemplate
+    subject: str
+    required_variables: FrozenSet[str]
+    default_data: Dict[str, Any]
+
+    def missing_variables(self, data: Dict[str, Any]) -> FrozenSet[str]:
+        return self.required_variables - data.keys()
+
+    def render(self, data: Dict[str, Any]) -> str:
+        return self.template.render({**self.default_data, **data})
+
 
 class EmailTemplateManager:
-    def __init__(self):
+    def __init__(
+        self,
+        minify: Optional[bool] = None,
+        hot_reload: Optional[bool] = None,
+        email_types: Optional[Dict[str, EmailType]] = None,
+    ):
+        """
+        Args:
+            minify: Strip comments and whitespace from templates (defaults to
+                EMAIL_TEMPLATE_MINIFY)
+            hot_reload: Recompile a template when its file changes, for
+                development (defaults to EMAIL_TEMPLATE_HOT_RELOAD)
+            email_types: Email types to validate at load (defaults to EMAIL_TYPES)
+        """
         # Get the directory where this file is located
         current_dir = Path(__file__).parent
         self.templates_dir = current_dir / "templates"
-        self._templates_cache = {}
+        self.minify = Config.EMAIL_TEMPLATE_MINIFY if minify is None else minify
+        self.hot_reload = (
+            Config.EMAIL_TEMPLATE_HOT_RELOAD if hot_reload is None else hot_reload
+        )
+        self.email_types = EMAIL_TYPES if email_types is None else email_types
+        self._templates_cache: Dict[str, CompiledTemplate] = {}
+        self._prepared: Dict[str, PreparedEmail] = {}
+        self._lock = threading.Lock()
 
         self.templates_dir.mkdir(exist_ok=True)
+        self.load_email_types()
+
+    def load_email_types(self) -> Dict[str, PreparedEmail]:
+        """
+        Compile the template of every email type and check its variables.
+
+        Raises:
+            FileNotFoundError if a template is missing
+            ValueError if a template uses a variable that is neither required
+            from the caller nor given a default
+        """
+        prepared = {}
+        for email_type, config in self.email_types.items():
+            prepared[email_type] = self._prepare(email_type, config)
+        with self._lock:
+            self._prepared = prepared
+        return prepared
+
+    def get_email(self, email_type: str) -> PreparedEmail:
+        """
+        Prepared email type, recompiled first if hot reload is on and its
+        template changed
+
+        Raises:
+            ValueError if the email type is unknown
+        """
+        prepared = self._prepared.get(email_type)
+        if prepared is None:
+            raise ValueError(f"Unknown email type: {email_type}")
+        if self.hot_reload and self._is_stale(prepared.template):
+            prepared = self._prepare(email_type, self.email_types[email_type])
+            with self._lock:
+                self._prepared[email_type] = prepared
+        return prepared
+
+    def get_compiled(self, template_name: str) -> CompiledTemplate:
+        """Get compiled template with caching for performance"""
+        template = self._templates_cache.get(template_name)
+        if template is None or (self.hot_reload and self._is_stale(template)):
+            template = self._compile(template_name)
+            with self._lock:
+                self._templates_cache[template_name] = template
+        return template
 
     def get_template(self, template_name: str) -> str:
-        """Get template with caching for performance"""
-        if template_name not in self._templates_cache:
-            template_path = self.templates_dir / f"{template_name}.html"
-            try:
-                with open(template_path, "r", encoding="utf-8") as file:
-                    self._templates_cache[template_name] = file.read()
-            except FileNotFoundError:
-                logging.error(f"Template {template_name} not found at {template_path}")
-                raise FileNotFoundError(f"Email template '{template_name}' not found")
-        return self._templates_cache[template_name]
+        """Template text as sent (minified if enabled)"""
+        return self._read(template_name)[0]
 
     def render_template(self, template_name: str, data: Dict[str, Any]) -> str:
         """Render template with provided data"""
-        template = self.get_template(template_name)
         try:
-            return template.format(**data)
-        except KeyError as e:
+            return self.get_compiled(template_name).render(data)
+        except ValueError as e:
             logging.error(f"Missing template variable: {e}")
-            raise ValueError(f"Template variable {e} is required but not provided")
+            raise
 
     def clear_cache(self):
         """Clear template cache (useful for development)"""
-        self._templates_cache.clear()
+        with self._lock:
+            self._templates_cache.clear()
+        self.load_email_types()
+
+    def _prepare(self, email_type: str, config: EmailType) -> PreparedEmail:
+        template = self.get_compiled(config.template_name)
+        required = frozenset(config.required_variables)
+        undeclared = template.variables - required - config.default_data.keys()
+        if undeclared:
+            raise ValueError(
+                f"Email type {email_type}: template {config.template_name} uses "
+                f"{sorted(undeclared)} without a default or required variable"
+            )
+        return PreparedEmail(
+            email_type=email_type,
+            template=template,
+            subject=config.subject_template,
+            required_variables=required,
+            default_data=dict(config.default_data),
+        )
+
+    def _compile(self, template_name: str) -> CompiledTemplate:
+        text, mtime = self._read(template_name)
+        return CompiledTemplate.compile(template_name, text, mtime)
+
+    def _read(self, template_name: str) -> Tuple[str, float]:
+        template_path = self.templates_dir / f"{template_name}.html"
+        try:
+            with open(template_path, "r", encoding="utf-8") as file:
+                text = file.read()
+            mtime = os.stat(template_path).st_mtime
+        except FileNotFoundError:
+            logging.error(f"Template {template_name} not found at {template_path}")
+            raise FileNotFoundError(f"Email template '{template_name}' not found")
+        return (minify_html(text) if self.minify else text), mtime
+
+    def _is_stale(self, template: CompiledTemplate) -> bool:
+        try:
+            path = self.templates_dir / f"{template.name}.html"
+            return os.stat(path).st_mtime != template.mtime
+        except FileNotFoundError:
+            return False
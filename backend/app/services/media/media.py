@@ -1,24 +1,21 @@
+import logging
 import os
 from copy import deepcopy
+from datetime import datetime, timezone
 
-from processingScripts.feature_engineering.extract_video_features import (
-    extract_video_features,
-)
-from processingScripts.feature_engineering.extract_audio_features import (
-    extract_audio_features,
-)
-from processingScripts.run_model import run_hr_model, run_bp_model, run_spo2_model
-from processingScripts.run_mental_health_models import (
-    run_stress_model,
-    run_anxiety_model,
-    run_depression_model,
-)
-from processingScripts.get_vital_signs import get_vital_signs
-from processingScripts.get_mental_health_scores import get_mental_health_scores
-
+from config import Config
 from app.db.operations import insert_data, find_data, update_data
 from app.db.collections import COLLECTIONS
 from app.utils.fileUtils import delete_directory
+from app.services.report.report_cache import report_cache
+from app.services.report.reward_points_service import reward_saved_report
+from app.services.resources.profile_group_service import ProfileGroupService
+from app.services.media.scan_memory import scan_memory
+from app.services.media.scan_profiler import scan_profiler
+from app.utils.metrics import track_scan
+from app.utils.structured_logging import log_context
+
+logger = logging.getLogger(__name__)
 
 
 def create_directory_with_permissions(path, mode=0o775):
@@ -39,6 +36,25 @@ def videoProcessingStart(file, metaData, is_trial=False):
         metaData: Dictionary containing user data or trial data
         is_trial: Boolean indicating if this is a trial user
     """
+    scan_id = metaData["trial_id"] if is_trial else metaData["userId"]
+    # Everything logged during the scan carries its id and current stage;
+    # stage durations and memory peaks go to /api/metrics, slow scans can
+    # be profiled
+    with log_context(scan_id=scan_id, scan_type="video"):
+        with track_scan("video") as scan, scan_memory.track("video", scan_id, scan):
+            with scan_profiler.profile("video", scan_id, scan):
+                return _process_video(file, metaData, is_trial, scan)
+
+
+def _process_video(file, metaData, is_trial, scan):
+    # The processing stack (torch, cv2, scipy, pandas) is imported on first
+    # use so the server starts without it; see processing_stack.py
+    from processingScripts.feature_engineering.extract_video_features import (
+        extract_video_features,
+    )
+    from processingScripts.run_model import run_hr_model, run_bp_model, run_spo2_model
+    from processingScripts.get_vital_signs import get_vital_signs
+
     # Handle both regular users and trial users
     if is_trial:
         identifier = metaData["trial_id"]  # Use trial_id for trials
@@ -50,7 +66,7 @@ def videoProcessingStart(file, metaData, is_trial=False):
     # Create a directory named 'media' in the root folder if it doesn't exist
     media_dir = os.path.join(os.getcwd(), "media")
     create_directory_with_permissions(media_dir)
-    print("media_dir", media_dir)
+    logger.debug("media_dir %s", media_dir)
 
     venue = metaData.get("venue")
     language = metaData.get("language")
@@ -66,6 +82,7 @@ def videoProcessingStart(file, metaData, is_trial=False):
     video_path = os.path.join(user_media_dir, file.filename)
 
     try:
+        scan.stage("save")
         # Save the uploaded file
         file.save(video_path)
 
@@ -74,10 +91,23 @@ def videoProcessingStart(file, metaData, is_trial=False):
             os.getcwd(), "processingScripts", "features", directory_prefix, "video"
         )
         create_directory_with_permissions(features_output_dir)
-        print("user_features_dir", features_output_dir)
+        logger.debug("user_features_dir %s", features_output_dir)
 
+        scan.stage("extract_features")
         # Call extract_video_features with the corrected output directory
-        features_paths = extract_video_features(video_path, features_output_dir)
+        # Decoded at no more than VIDEO_TARGET_FPS and VIDEO_MAX_DIMENSION
+        # whatever the client recorded, in VIDEO_DECODE_WORKERS processes if
+        # set; downscaled further or rejected if the decoded video would
+        # exceed the scan memory budget
+        features_paths, video_info = extract_video_features(
+            video_path,
+            features_output_dir,
+            memory_budget=scan_memory.video_budget(),
+            target_fps=Config.VIDEO_TARGET_FPS,
+            max_dimension=Config.VIDEO_MAX_DIMENSION,
+            return_info=True,
+            workers=Config.VIDEO_DECODE_WORKERS,
+        )
 
         # Output directory for model outputs
         model_output_dir = os.path.join(
@@ -86,16 +116,19 @@ def videoProcessingStart(file, metaData, is_trial=False):
         create_directory_with_permissions(model_output_dir)
 
         # run the hr model
+        scan.stage("hr")
         pred_file_list = run_hr_model(
             features_output_dir, features_paths, model_output_dir
         )
 
         # run the bp model
+        scan.stage("bp")
         bp_sys, bp_dia = run_bp_model(
             features_output_dir, features_paths, model_output_dir
         )
 
         # run the spo2 model
+        scan.stage("spo2")
         spo2 = run_spo2_model(features_output_dir, features_paths, model_output_dir)
 
         # vital signs final output directory
@@ -104,11 +137,19 @@ def videoProcessingStart(file, metaData, is_trial=False):
         )
         create_directory_with_permissions(final_output_directory)
 
+        scan.stage("vital_signs")
+        # HR is computed at the frame rate the frames were actually kept at
         vital_signs = get_vital_signs(
-            pred_file_list, final_output_directory, bp_sys, bp_dia, spo2
+            pred_file_list,
+            final_output_directory,
+            bp_sys,
+            bp_dia,
+            spo2,
+            fs=video_info["fs"],
         )
 
-        print(vital_signs)
+        logger.info("Vital signs: %s", vital_signs)
+        scan.stage("store")
         response = {}
 
         if is_trial:
@@ -131,6 +172,15 @@ def videoProcessingStart(file, metaData, is_trial=False):
             response["email"] = email
 
             saved_res = insert_data(COLLECTIONS["USERS"], response)
+            report_cache.invalidate_email(email)
+
+            if isinstance(email, str):
+                # Precompute the reward outcome so fetching it needs no day scan
+                points_earned = reward_saved_report(
+                    email, {"user_Id": identifier}, datetime.now(timezone.utc)
+                )
+                saved_res["reward_points_earned"] = points_earned
+                saved_res["first_scan_of_day"] = points_earned > 0
             return saved_res
 
     except Exception as e:
@@ -149,9 +199,29 @@ def audioProcessingStart(file, identifier, is_trial=False):
         identifier: userId (for regular users) or trial_id (for trial users)
         is_trial: Boolean indicating if this is a trial user
     """
-    print(
-        f"Starting audio processing for {'trial' if is_trial else 'user'}: {identifier}"
+    with log_context(scan_id=identifier, scan_type="audio"):
+        with track_scan("audio") as scan, scan_memory.track("audio", identifier, scan):
+            with scan_profiler.profile("audio", identifier, scan):
+                return _process_audio(file, identifier, is_trial, scan)
+
+
+def _process_audio(file, identifier, is_trial, scan):
+    logger.info(
+        "Starting audio processing for %s: %s",
+        "trial" if is_trial else "user",
+        identifier,
+    )
+
+    # Imported on first use, like the video stack (opensmile, pandas, sklearn)
+    from processingScripts.feature_engineering.extract_audio_features import (
+        extract_audio_features,
+    )
+    from processingScripts.run_mental_health_models import (
+        run_stress_model,
+        run_anxiety_model,
+        run_depression_model,
     )
+    from processingScripts.get_mental_health_scores import get_mental_health_scores
 
     # Create a directory named 'media' in the root folder if it doesn't exist
     media_dir = os.path.join(os.getcwd(), "media")
@@ -166,7 +236,8 @@ def audioProcessingStart(file, identifier, is_trial=False):
     audio_path = os.path.join(user_media_dir, file.filename)
 
     try:
-        print(f"Saving audio file: {file.filename}")
+        scan.stage("save")
+        logger.debug("Saving audio file: %s", file.filename)
         # Save the uploaded file
         file.save(audio_path)
 
@@ -175,13 +246,13 @@ def audioProcessingStart(file, identifier, is_trial=False):
             os.getcwd(), "processingScripts", "features", directory_prefix, "audio"
         )
         create_directory_with_permissions(features_output_dir)
-        print(f"Creating features output directory: {features_output_dir}")
+        logger.debug("Creating features output directory: %s", features_output_dir)
 
-        print("Extracting audio features...")
+        scan.stage("extract_features")
         feature_filename = extract_audio_features(audio_path, features_output_dir)
-        print(f"Audio features extracted to: {feature_filename}")
+        logger.debug("Audio features extracted to: %s", feature_filename)
 
-        print("Running mental health models...")
+        scan.stage("mental_health_models")
         stress_severity, stress_entropy, stress_entropy_percent = run_stress_model(
             features_output_dir, feature_filename
         )
@@ -191,18 +262,20 @@ def audioProcessingStart(file, identifier, is_trial=False):
         depression_severity, depression_entropy, depression_entropy_percent = (
             run_depression_model(features_output_dir, feature_filename)
         )
-        print(
-            f"Model results - Stress: {stress_severity}, Anxiety: {anxiety_severity}, Depression: {depression_severity}"
+        logger.info(
+            "Model results - Stress: %s, Anxiety: %s, Depression: %s",
+            stress_severity,
+            anxiety_severity,
+            depression_severity,
         )
 
-        print(f"Creating final output directory")
         final_output_directory = os.path.join(
             os.getcwd(), "processingScripts", "final_outputs", directory_prefix
         )
         create_directory_with_permissions(final_output_directory)
-        print(f"Created final output directory: {final_output_directory}")
+        logger.debug("Created final output directory: %s", final_output_directory)
 
-        print("Calculating mental health scores...")
+        scan.stage("scores")
         mental_health_scores = get_mental_health_scores(
             final_output_directory,
             stress_severity,
@@ -210,19 +283,24 @@ def audioProcessingStart(file, identifier, is_trial=False):
             depression_severity,
             fallback_logic=False,
         )
-        print(f"Mental health scores calculated: {mental_health_scores}")
+        logger.info("Mental health scores calculated: %s", mental_health_scores)
+        # Stored with the scores so resource requests need not recompute it
+        emotional_profile_key = ProfileGroupService.profile_key_for_scores(
+            mental_health_scores
+        )
 
-        print("Updating user data in database...")
+        scan.stage("store")
         response = {}
 
         if is_trial:
             # For trials, return the mental health scores
             # Let trial service handle the update
             response["mental_health_scores"] = deepcopy(mental_health_scores)
+            response["emotional_profile_key"] = emotional_profile_key
         else:
             response["user_Id"] = identifier
             response["mental_health_scores"] = deepcopy(mental_health_scores)
-            print("<= response", response)
+            logger.debug("<= response %s", response)
             search_query = {
                 "user_Id": identifier,
             }
@@ -230,7 +308,7 @@ def audioProcessingStart(file, identifier, is_trial=False):
             if not report_list or len(report_list) == 0:
                 raise Exception(f"No report found for user_Id: {identifier}")
             report = report_list[0]
-            print("report", report)
+            logger.debug("report %s", report)
             updated_data = {
                 "$set": {
                     "vital_signs": {
@@ -242,25 +320,23 @@ def audioProcessingStart(file, identifier, is_trial=False):
                     "mental_health_scores": response[
                         "mental_health_scores"
                     ],  # Add separate field for scores
+                    "emotional_profile_key": emotional_profile_key,
                 }
             }
 
             res = update_data(COLLECTIONS["USERS"], search_query, updated_data)
-
-        print(
-            "stress_uncertaininty",
-            round(stress_entropy, 4),
-            100 * round(stress_entropy_percent, 4),
-        )
-        print(
-            "anxiety_uncertaininty",
-            round(anxiety_entropy, 4),
-            100 * round(anxiety_entropy_percent, 4),
-        )
-        print(
-            "depression_uncertaininty",
-            round(depression_entropy, 4),
-            100 * round(depression_entropy_percent, 4),
+            report_cache.invalidate_email(report.get("email"))
+            ProfileGroupService.invalidate_report(identifier)
+
+        logger.debug(
+            "Uncertainty - stress %.4f (%.2f%%), anxiety %.4f (%.2f%%), "
+            "depression %.4f (%.2f%%)",
+            stress_entropy,
+            100 * stress_entropy_percent,
+            anxiety_entropy,
+            100 * anxiety_entropy_percent,
+            depression_entropy,
+            100 * depression_entropy_percent,
         )
         analytics = {
             "stress": {
@@ -295,6 +371,7 @@ def audioProcessingStart(file, identifier, is_trial=False):
         )
 
         # remove the big files
+        scan.stage("cleanup")
         features_outputs_path = os.path.join(
             os.getcwd(), "processingScripts", "features"
         )
@@ -314,8 +391,10 @@ def audioProcessingStart(file, identifier, is_trial=False):
             media_files_path = os.path.join(os.getcwd(), "media")
             delete_directory(media_files_path)
 
-        print(
-            f"Audio processing completed successfully for {'trial' if is_trial else 'user'}: {identifier}"
+        logger.info(
+            "Audio processing completed successfully for %s: %s",
+            "trial" if is_trial else "user",
+            identifier,
         )
 
         if is_trial:
@@ -328,7 +407,7 @@ def audioProcessingStart(file, identifier, is_trial=False):
             return res
 
     except Exception as e:
-        print(f"Error during audio processing: {str(e)}")
+        logger.error(f"Error during audio processing: {str(e)}")
         # Clean up on error
         if os.path.exists(audio_path):
             os.remove(audio_path)
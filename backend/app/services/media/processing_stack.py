@@ -0,0 +1,34 @@
+import importlib
+import time
+from typing import Dict
+
+# Modules behind the lazy imports in media.py. Together they pull in torch,
+# cv2, scipy, pandas, sklearn and opensmile, which take seconds to import.
+HEAVY_MODULES = (
+    "processingScripts.feature_engineering.extract_video_features",
+    "processingScripts.run_model",
+    "processingScripts.get_vital_signs",
+    "processingScripts.feature_engineering.extract_audio_features",
+    "processingScripts.run_mental_health_models",
+    "processingScripts.get_mental_health_scores",
+)
+
+
+def import_processing_stack() -> Dict[str, dict]:
+    """
+    Import every module of the processing pipeline.
+
+    Returns:
+        {module: {"imported": bool, "seconds": float, "error": str or None}};
+        a module that fails here is imported again (and raises) on first use
+    """
+    results = {}
+    for name in HEAVY_MODULES:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            results[name] = {"imported": True, "error": None}
+        except Exception as e:
+            results[name] = {"imported": False, "error": str(e)}
+        results[name]["seconds"] = round(time.perf_counter() - start, 3)
+    return results
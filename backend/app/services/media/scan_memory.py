@@ -0,0 +1,354 @@
+import logging
+import math
+import os
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from app.utils.metrics import (
+    scan_memory_budget_actions,
+    scan_peak_rss,
+    scan_stage_peak_rss,
+)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# The backend directory; allocation sites are reported relative to it
+_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+
+# Arrays preprocess() holds per frame after cropping: the 72x72x3 float64
+# crops, their diff-normalized (float32) and standardized copies and the
+# 6-channel concatenation
+PROCESSED_BYTES_PER_FRAME = 72 * 72 * 3 * 8 * 5
+
+
+def current_rss() -> Optional[int]:
+    """Resident memory of this process in bytes, None where it cannot be read"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """A scan input would need more memory than the configured budget"""
+
+
+class VideoMemoryBudget:
+    """
+    Keeps the decoded video of one scan within max_bytes.
+
+    extract_video_features asks for a frame scale while it decodes (the
+    frame count of recorded WebM is usually unknown up front). The estimate
+    is the decoded frames twice (the frame list and the array built from
+    it) plus what preprocessing keeps per frame. When it is over budget the
+    frames are downscaled, down to min_width pixels wide; face detection
+    and the 72x72 crops work the same on smaller frames. Past that, or with
+    downsample=False, the scan is rejected.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        downsample: bool = True,
+        min_width: int = 240,
+        scan_type: str = "video",
+    ):
+        self.max_bytes = max_bytes
+        self.downsample = downsample
+        self.min_width = min_width
+        self.scan_type = scan_type
+        self.downsampled = False
+
+    def estimate(self, frame_count: int, width: int, height: int) -> int:
+        """Bytes needed to decode and preprocess frame_count frames of width x height"""
+        return frame_count * (2 * width * height * 3 + PROCESSED_BYTES_PER_FRAME)
+
+    def scale_for(
+        self,
+        frame_count: int,
+        width: int,
+        height: int,
+        scale: float = 1.0,
+        more_frames: bool = True,
+    ) -> float:
+        """
+        Scale the frames must be decoded at so frame_count frames fit
+
+        Args:
+            frame_count: Frames decoded so far, or the container's frame count
+            width: Original frame width
+            height: Original frame height
+            scale: Scale used so far; the result is never larger
+            more_frames: frame_count is a running count; size the frames for
+                twice as many, so a long recording is resized a few times
+                rather than on every check
+
+        Returns:
+            scale if the frames still fit, else the largest smaller one that does
+
+        Raises:
+            MemoryBudgetExceeded if the frames cannot fit at an allowed scale
+        """
+        if frame_count <= 0 or self._fits(frame_count, width, height, scale):
+            return scale
+
+        if not self.downsample:
+            self._reject(frame_count, width, height, 1.0)
+
+        planned = 2 * frame_count if more_frames else frame_count
+        per_frame = self.max_bytes / planned - PROCESSED_BYTES_PER_FRAME
+        # 1% under the exact fit: frame sizes are rounded, which could put
+        # the next check just over budget again
+        new_scale = 0.99 * math.sqrt(max(0.0, per_frame) / (2 * width * height * 3))
+        min_scale = min(1.0, self.min_width / width)
+        if new_scale < min_scale:
+            if not self._fits(frame_count, width, height, min_scale):
+                self._reject(frame_count, width, height, min_scale)
+            new_scale = min_scale
+
+        new_scale = min(scale, new_scale)
+        if not self.downsampled:
+            scan_memory_budget_actions.labels(self.scan_type, "downsampled").inc()
+            self.downsampled = True
+        logger.warning(
+            "Video of %s frames at %sx%s is over the %.0fMB scan memory budget, "
+            "decoding at %.0f%% size",
+            frame_count,
+            width,
+            height,
+            self.max_bytes / MB,
+            new_scale * 100,
+        )
+        return new_scale
+
+    def _fits(self, frame_count: int, width: int, height: int, scale: float) -> bool:
+        size = self.estimate(frame_count, round(width * scale), round(height * scale))
+        return size <= self.max_bytes
+
+    def _reject(self, frame_count: int, width: int, height: int, scale: float):
+        scan_memory_budget_actions.labels(self.scan_type, "rejected").inc()
+        needed = self.estimate(frame_count, round(width * scale), round(height * scale))
+        raise MemoryBudgetExceeded(
+            f"Video needs at least {needed / MB:.0f}MB to process, over the scan "
+            f"memory budget of {self.max_bytes / MB:.0f}MB"
+        )
+
+
+class _MemorySession:
+    """Memory accounting of one scan; see ScanMemoryTracker.track"""
+
+    def __init__(self, tracker, scan_type, scan_id, timer):
+        self.tracker = tracker
+        self.scan_type = scan_type
+        self.scan_id = scan_id
+        self.timer = timer
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._owns_tracemalloc = False
+        self._peak_sites: Optional[List[Dict[str, Any]]] = None
+        self._sites_traced = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        self._stage_peak = self.start_rss
+        if self.tracker.tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start(self.tracker.tracemalloc_frames)
+            self._owns_tracemalloc = True
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        if self.timer is not None:
+            self.timer.stage_listeners.append(self._end_stage)
+        if self.start_rss is not None:
+            self._thread = threading.Thread(
+                target=self._sample, name="scan-memory", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.tracker.sample_interval):
+            self._update(current_rss())
+            if tracemalloc.is_tracing():
+                # Snapshot the allocation sites near the stage's peak: each
+                # time traced memory has grown 10% past the last snapshot
+                traced = tracemalloc.get_traced_memory()[0]
+                if traced > self._sites_traced * 1.1:
+                    sites = self._top_allocations()
+                    with self._lock:
+                        self._peak_sites, self._sites_traced = sites, traced
+
+    def _update(self, rss: Optional[int]) -> None:
+        if rss is None:
+            return
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            self._stage_peak = max(self._stage_peak, rss)
+
+    def _end_stage(self, stage: str) -> None:
+        rss = current_rss()
+        self._update(rss)
+        with self._lock:
+            entry = {"peak_rss_mb": _mb(self._stage_peak)}
+            if self._stage_peak is not None:
+                scan_stage_peak_rss.labels(self.scan_type, stage).observe(
+                    self._stage_peak
+                )
+            self._stage_peak = rss
+        if tracemalloc.is_tracing():
+            entry["traced_peak_mb"] = _mb(tracemalloc.get_traced_memory()[1])
+            with self._lock:
+                sites, self._peak_sites, self._sites_traced = self._peak_sites, None, 0
+            entry["top_allocations"] = sites or self._top_allocations()
+            tracemalloc.reset_peak()
+        self.stages[stage] = entry
+
+    def _top_allocations(self) -> List[Dict[str, Any]]:
+        """
+        Code holding the most traced memory right now. Each allocation is
+        attributed to the innermost line of the backend's own code in its
+        traceback (the numpy call in extract_video_features, not numpy's
+        internals); allocations under 1MB per site are left out.
+        """
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+        except RuntimeError:
+            # Tracing was stopped by the concurrent scan that started it
+            return []
+        sites: Dict[str, List[int]] = {}
+        for stat in snapshot.statistics("traceback"):
+            frame = next(
+                (f for f in reversed(stat.traceback) if f.filename.startswith(_ROOT)),
+                stat.traceback[-1],
+            )
+            site = f"{os.path.relpath(frame.filename, _ROOT)}:{frame.lineno}"
+            totals = sites.setdefault(site, [0, 0])
+            totals[0] += stat.size
+            totals[1] += stat.count
+        ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {"site": site, "size_mb": _mb(size), "count": count}
+            for site, (size, count) in ranked[: self.tracker.tracemalloc_top]
+            if size >= MB
+        ]
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.timer is not None:
+            self.timer.stage_listeners.remove(self._end_stage)
+            if self.timer.current_stage is not None:
+                self._end_stage(self.timer.current_stage)
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+        if self.peak_rss is not None:
+            scan_peak_rss.labels(self.scan_type).observe(self.peak_rss)
+        summary = {
+            "start_rss_mb": _mb(self.start_rss),
+            "peak_rss_mb": _mb(self.peak_rss),
+            "stages": self.stages,
+        }
+        logger.info(
+            "Scan memory: peak RSS %sMB (%sMB at start)",
+            summary["peak_rss_mb"],
+            summary["start_rss_mb"],
+            extra={"memory": summary},
+        )
+        return False
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / MB, 1)
+
+
+class _NotTracked:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOT_TRACKED = _NotTracked()
+
+
+class ScanMemoryTracker:
+    """
+    Per-scan memory accounting and the scan memory budget.
+
+    While a scan runs, a background thread samples the process's resident
+    memory (RSS); the peak of the scan and of each stage is logged with the
+    scan (the "memory" field) and recorded in the scan metrics. RSS is per
+    process, so scans running at the same time in one worker share their
+    peaks. With SCAN_MEMORY_TRACEMALLOC the log also has the traced peak of
+    each stage and the allocation sites holding the most memory near it
+    (tracemalloc slows allocation-heavy code down; enable it to investigate).
+
+    SCAN_MEMORY_BUDGET_MB bounds what one video scan may decode; see
+    VideoMemoryBudget. To run scans concurrently on a fixed-RAM device, set
+    it to what the device can spare divided by the concurrent scans.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = Config.SCAN_MEMORY_TRACKING,
+        sample_interval: float = Config.SCAN_MEMORY_SAMPLE_INTERVAL_MS / 1000,
+        use_tracemalloc: bool = Config.SCAN_MEMORY_TRACEMALLOC,
+        tracemalloc_top: int = Config.SCAN_MEMORY_TRACEMALLOC_TOP,
+        budget_mb: float = Config.SCAN_MEMORY_BUDGET_MB,
+        budget_policy: str = Config.SCAN_MEMORY_BUDGET_POLICY,
+    ):
+        self.enabled = enabled
+        self.sample_interval = max(0.005, sample_interval)
+        self.tracemalloc = use_tracemalloc
+        self.tracemalloc_top = tracemalloc_top
+        # Deep enough to reach the backend code calling numpy / cv2
+        self.tracemalloc_frames = 16
+        self.budget_mb = budget_mb
+        self.budget_policy = budget_policy
+
+    def track(self, scan_type: str, scan_id: str, timer: Any = None):
+        """
+        Context manager recording the memory used by the scan run inside it
+
+        Args:
+            scan_type: "video" or "audio"
+            scan_id: User id or trial id of the scan
+            timer: The scan's ScanTimer, for per-stage peaks
+        """
+        if not self.enabled:
+            return _NOT_TRACKED
+        return _MemorySession(self, scan_type, str(scan_id), timer)
+
+    def video_budget(self) -> Optional[VideoMemoryBudget]:
+        """Budget for decoding one video, None when no budget is set"""
+        if self.budget_mb <= 0:
+            return None
+        return VideoMemoryBudget(
+            int(self.budget_mb * MB),
+            downsample=self.budget_policy != "reject",
+        )
+
+
+# Create a global instance for easy access
+scan_memory = ScanMemoryTracker()
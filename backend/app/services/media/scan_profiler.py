@@ -0,0 +1,313 @@
+import cProfile
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import has_request_context, request
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# "1" / "sample" for a sampled profile of this scan, "cprofile" for pstats
+PROFILE_HEADER = "X-Profile-Scan"
+
+PROFILE_NAME = re.compile(r"^[\w.-]+\.(collapsed|pstats)$")
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread every interval seconds from a daemon
+    thread and counts identical stacks, in collapsed-stack form
+    ("root;caller;function count", the flamegraph.pl / speedscope input).
+
+    The profiled thread is not slowed down apart from the GIL the sampler
+    takes for each sample, so this can stay on for every scan.
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        root_frame,
+        interval: float,
+        stage: Callable[[], Optional[str]] = lambda: None,
+    ):
+        """
+        Args:
+            thread_id: Thread to sample
+            root_frame: Outermost frame to include; frames above it (Flask,
+                the server) are left out
+            interval: Seconds between samples
+            stage: Returns the current scan stage, added as the stack root
+        """
+        self.thread_id = thread_id
+        self.root_frame = root_frame
+        self.interval = interval
+        self.stage = stage
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="scan-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                if frame is self.root_frame:
+                    break
+                frame = frame.f_back
+            names.append(f"stage:{self.stage() or 'none'}")
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+            del frame
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class _ProfileSession:
+    """One profiled scan; see ScanProfiler.profile"""
+
+    def __init__(self, profiler, mode, forced, scan_type, scan_id, timer):
+        self.profiler = profiler
+        self.mode = mode
+        self.forced = forced
+        self.scan_type = scan_type
+        self.scan_id = scan_id
+        self.timer = timer
+        self.sampler: Optional[StackSampler] = None
+        self.cprofile: Optional[cProfile.Profile] = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.mode == "cprofile":
+            try:
+                self.cprofile = cProfile.Profile()
+                self.cprofile.enable()
+                return self
+            except ValueError:
+                # Another profiler is active on this thread
+                self.cprofile, self.mode = None, "sample"
+
+        stage = (lambda: self.timer.current_stage) if self.timer else (lambda: None)
+        self.sampler = StackSampler(
+            threading.get_ident(),
+            sys._getframe(1),
+            self.profiler.sample_interval,
+            stage,
+        )
+        self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+        seconds = time.perf_counter() - self.started
+
+        if self.forced or seconds >= self.profiler.threshold_seconds:
+            try:
+                self.profiler.save(self, seconds, exc_type is not None)
+            except Exception as e:
+                logger.warning(f"Failed to save scan profile: {e}")
+        return False
+
+
+class _NotProfiled:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOT_PROFILED = _NotProfiled()
+
+
+class ScanProfiler:
+    """
+    Opt-in profiles of slow scans, kept in a bounded directory.
+
+    With PROFILING_ENABLED every scan is sampled (StackSampler), and the
+    profile is kept when the scan took at least PROFILING_THRESHOLD_SECONDS.
+    With PROFILING_ALLOW_HEADER (off by default, as any client can send it),
+    a request can also ask for its scan to be profiled with the
+    X-Profile-Scan header ("cprofile" for a deterministic cProfile run,
+    anything else for sampling); those profiles are always kept.
+
+    Profiles are written next to a JSON file with the scan id, type and
+    duration. Only the newest PROFILING_MAX_PROFILES are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str = Config.PROFILING_DIR,
+        enabled: bool = Config.PROFILING_ENABLED,
+        threshold_seconds: float = Config.PROFILING_THRESHOLD_SECONDS,
+        sample_interval: float = Config.PROFILING_SAMPLE_INTERVAL_MS / 1000,
+        max_profiles: int = Config.PROFILING_MAX_PROFILES,
+        allow_header: bool = Config.PROFILING_ALLOW_HEADER,
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.threshold_seconds = threshold_seconds
+        self.sample_interval = max(0.001, sample_interval)
+        self.max_profiles = max(1, max_profiles)
+        self.allow_header = allow_header
+        self._lock = threading.Lock()
+
+    def _requested_mode(self) -> Optional[str]:
+        """Profiling mode asked for by the current request's header, if any"""
+        if not self.allow_header:
+            return None
+        if not has_request_context():
+            return None
+        value = request.headers.get(PROFILE_HEADER, "").strip().lower()
+        if not value or value in ("0", "false", "off"):
+            return None
+        return "cprofile" if value == "cprofile" else "sample"
+
+    def profile(self, scan_type: str, scan_id: str, timer: Any = None):
+        """
+        Context manager profiling the scan run inside it, if profiling is
+        enabled or requested
+
+        Args:
+            scan_type: "video" or "audio"
+            scan_id: User id or trial id of the scan
+            timer: The scan's ScanTimer, to tag samples with the stage
+        """
+        requested = self._requested_mode()
+        if requested is None and not self.enabled:
+            return _NOT_PROFILED
+        return _ProfileSession(
+            self,
+            requested or "sample",
+            requested is not None,
+            scan_type,
+            str(scan_id),
+            timer,
+        )
+
+    def save(self, session: _ProfileSession, seconds: float, failed: bool) -> str:
+        """
+        Write a finished session's profile and metadata, then drop the oldest
+        profiles over the limit
+
+        Returns:
+            File name of the profile
+        """
+        now = datetime.now(timezone.utc)
+        safe_id = re.sub(r"[^\w-]", "_", session.scan_id)[:64]
+        stem = (
+            f"{now.strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}"
+            f"-{session.scan_type}-{safe_id}"
+        )
+        extension = "pstats" if session.cprofile is not None else "collapsed"
+        name = f"{stem}.{extension}"
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+
+        if session.cprofile is not None:
+            session.cprofile.dump_stats(path)
+            samples = None
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(session.sampler.collapsed())
+            samples = session.sampler.samples
+
+        metadata = {
+            "name": name,
+            "scan_type": session.scan_type,
+            "scan_id": session.scan_id,
+            "format": extension,
+            "seconds": round(seconds, 3),
+            "failed": failed,
+            "requested": session.forced,
+            "samples": samples,
+            "created_at": now.isoformat(),
+            "size_bytes": os.path.getsize(path),
+        }
+        with open(os.path.join(self.directory, f"{stem}.json"), "w") as f:
+            json.dump(metadata, f)
+
+        logger.info(
+            "Saved %s profile of %s scan %s (%.1fs): %s",
+            extension,
+            session.scan_type,
+            session.scan_id,
+            seconds,
+            name,
+        )
+        self._evict()
+        return name
+
+    def _evict(self) -> None:
+        with self._lock:
+            stems = sorted(
+                entry.name[: -len(".json")]
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json")
+            )
+            for stem in stems[: max(0, len(stems) - self.max_profiles)]:
+                for extension in ("json", "collapsed", "pstats"):
+                    try:
+                        os.remove(os.path.join(self.directory, f"{stem}.{extension}"))
+                    except FileNotFoundError:
+                        pass
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Metadata of the stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda profile: profile.get("created_at", ""), reverse=True)
+        return profiles
+
+    def profile_path(self, name: str) -> Optional[str]:
+        """Path of a stored profile by file name, None if there is no such profile"""
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+# Create a global instance for easy access
+scan_profiler = ScanProfiler()
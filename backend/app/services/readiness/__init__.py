@@ -0,0 +1,6 @@
+from .readiness_service import ReadinessService, readiness_service
+
+__all__ = [
+    "ReadinessService",
+    "readiness_service",
+]
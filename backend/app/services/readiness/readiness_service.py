@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.readiness import warmup
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+# Run in order: the DeepPhys pass needs the loaded models, which need the
+# imported stack
+DEFAULT_STEPS: List[Tuple[str, Callable[[], Any]]] = [
+    ("processing_stack", warmup.import_stack),
+    ("models", warmup.load_models),
+    ("deepphys", warmup.run_deepphys),
+    ("opensmile", warmup.run_opensmile),
+    ("database", warmup.open_database),
+]
+
+
+class ReadinessService:
+    """
+    Startup warm-up and readiness state.
+
+    /api/health only says the process is up (liveness). This service runs the
+    warm-up steps in a background thread and records, per component, its
+    state and how long it took; the station is ready once every component
+    is. A failed step is reported with its error and does not stop the
+    remaining steps.
+    """
+
+    def __init__(self, steps: Optional[List[Tuple[str, Callable[[], Any]]]] = None):
+        """
+        Args:
+            steps: (component name, callable) pairs run in order
+        """
+        self.steps = steps if steps is not None else DEFAULT_STEPS
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at: Optional[datetime] = None
+        self._finished_at: Optional[datetime] = None
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._reset_components()
+
+    def _reset_components(self) -> None:
+        self._components = {
+            name: {"state": PENDING, "seconds": None, "error": None}
+            for name, _ in self.steps
+        }
+
+    def start_warmup(self, app: Any = None) -> threading.Thread:
+        """
+        Run the warm-up in a daemon thread. Safe to call more than once.
+
+        Args:
+            app: Flask app whose context the steps run in (the database step
+                reads its configuration)
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run_warmup, args=(app,), name="warmup", daemon=True
+                )
+                self._thread.start()
+            return self._thread
+
+    def run_warmup(self, app: Any = None) -> Dict[str, Any]:
+        """Run every warm-up step in the calling thread and return the status"""
+        with self._lock:
+            self._started_at = datetime.now(timezone.utc)
+            self._finished_at = None
+            self._reset_components()
+
+        if app is not None:
+            with app.app_context():
+                self._run_steps()
+        else:
+            self._run_steps()
+
+        with self._lock:
+            self._finished_at = datetime.now(timezone.utc)
+
+        status = self.status()
+        if status["ready"]:
+            logger.info(f"Warm-up finished in {status['seconds']}s, ready")
+        else:
+            failed = [
+                name
+                for name, component in status["components"].items()
+                if component["state"] == FAILED
+            ]
+            logger.warning(f"Warm-up finished, not ready: {', '.join(failed)} failed")
+        return status
+
+    def _run_steps(self) -> None:
+        for name, step in self.steps:
+            self._set(name, state=RUNNING)
+            start = time.perf_counter()
+            try:
+                step()
+                self._set(name, state=READY)
+            except Exception as e:
+                logger.warning(f"Warm-up step {name} failed: {e}")
+                self._set(name, state=FAILED, error=str(e))
+            finally:
+                self._set(name, seconds=round(time.perf_counter() - start, 3))
+
+    def _set(self, name: str, **values: Any) -> None:
+        with self._lock:
+            self._components[name].update(values)
+
+    @property
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(c["state"] == READY for c in self._components.values())
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionary with ready flag, overall state (pending, warming_up,
+            ready or degraded), per-component state/timing/error and the total
+            warm-up time in seconds
+        """
+        with self._lock:
+            components = {
+                name: dict(component) for name, component in self._components.items()
+            }
+            started_at, finished_at = self._started_at, self._finished_at
+
+        ready = all(c["state"] == READY for c in components.values())
+        if ready:
+            state = "ready"
+        elif started_at is None:
+            state = "pending"
+        elif finished_at is None:
+            state = "warming_up"
+        else:
+            state = "degraded"
+
+        end = finished_at or datetime.now(timezone.utc)
+        return {
+            "ready": ready,
+            "state": state,
+            "components": components,
+            "started_at": started_at.isoformat() if started_at else None,
+            "seconds": (
+                round((end - started_at).total_seconds(), 3) if started_at else None
+            ),
+        }
+
+
+# Create a global instance for easy access
+readiness_service = ReadinessService()
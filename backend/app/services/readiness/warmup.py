@@ -0,0 +1,106 @@
+"""
+Warm-up steps run before the station reports itself ready.
+
+Each step pays one of the costs the first scan after boot would otherwise
+pay: importing the processing stack, loading the models, the first DeepPhys
+forward pass (allocator and kernel setup), the first openSMILE extraction
+(config parsing and native library load) and opening the MongoDB connection
+pool (creating any missing indexes on the way, unless the prefork parent
+already did).
+"""
+
+# Shape of one feature chunk written by extract_video_features.preprocess
+CHUNK_LENGTH = 160
+FRAME_SIZE = 72
+
+AUDIO_SAMPLE_RATE = 16000
+
+
+def import_stack() -> None:
+    from app.services.media.processing_stack import import_processing_stack
+
+    failed = {
+        name: result["error"]
+        for name, result in import_processing_stack().items()
+        if not result["imported"]
+    }
+    if failed:
+        raise Exception(f"Failed to import processing modules: {failed}")
+
+
+def load_models() -> None:
+    from processingScripts import model_registry
+
+    failed = {
+        name: result["error"]
+        for name, result in model_registry.preload().items()
+        if not result["loaded"]
+    }
+    if failed:
+        raise Exception(f"Failed to load models: {failed}")
+
+
+def run_deepphys() -> None:
+    """Forward one all-zero feature chunk through the heart rate model"""
+    import torch
+    from processingScripts.model_registry import get_model
+
+    model, device = get_model("hr")
+    # Same layout as a saved feature chunk: frames x (diff + raw RGB) x H x W
+    batch = torch.zeros((CHUNK_LENGTH, 6, FRAME_SIZE, FRAME_SIZE), device=device)
+    with torch.no_grad():
+        model(batch)
+
+
+def run_opensmile() -> None:
+    """Extract the production feature set from one second of synthetic tone"""
+    import numpy as np
+    import opensmile
+
+    t = np.arange(AUDIO_SAMPLE_RATE, dtype=np.float32) / AUDIO_SAMPLE_RATE
+    signal = 0.1 * np.sin(2 * np.pi * 220 * t)
+
+    smile = opensmile.Smile(
+        feature_set=opensmile.FeatureSet.ComParE_2016,
+        feature_level=opensmile.FeatureLevel.Functionals,
+    )
+    smile.process_signal(signal, AUDIO_SAMPLE_RATE)
+
+
+# Set once the indexes exist; forked workers inherit it from the parent
+_indexes_ensured = False
+
+
+def ensure_database_indexes() -> None:
+    """
+    Create the application's indexes with a short-lived client.
+
+    The prefork parent calls this before forking (MongoClient is not
+    fork-safe, so the client is closed again), and the workers then skip the
+    index builds instead of racing each other on them. Needs an app context.
+    """
+    global _indexes_ensured
+    from flask import current_app
+    from app.db.db import create_client
+    from app.db.indexes import ensure_indexes
+
+    client = create_client()
+    try:
+        ensure_indexes(client[current_app.config["DATABASE_NAME"]])
+    finally:
+        client.close()
+    _indexes_ensured = True
+
+
+def open_database() -> None:
+    """
+    Create the MongoDB client and round-trip a ping through its pool. The
+    indexes are created here too unless the prefork parent already did
+    """
+    from app.db.indexes import ensure_indexes
+    from app.db.operations import get_db_connection
+
+    db = get_db_connection()
+    db.client.admin.command("ping")
+    if not _indexes_ensured:
+        ensure_indexes(db)
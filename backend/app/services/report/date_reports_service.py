@@ -4,6 +4,7 @@ from app.services.report.report_utils import (
     parse_iso8601_date,
     organize_reports_by_date_iso8601,
 )
+from app.services.report.report_cache import report_cache, is_closed_period
 from datetime import timedelta
 
 
@@ -19,10 +20,18 @@ def fetch_report_by_date(email: str, date: str):
 
     print(f"Searching for reports on {start_date.date()}")
 
-    report = find_data(
-        COLLECTIONS["USERS"],
-        {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
-        projection={"_id": 0},
-    )
+    def compute():
+        report = find_data(
+            COLLECTIONS["USERS"],
+            {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
+            projection={"_id": 0},
+        )
+        return organize_reports_by_date_iso8601(report)
 
-    return organize_reports_by_date_iso8601(report)
+    return report_cache.get_or_compute(
+        email,
+        "date",
+        (start_date, end_date),
+        compute,
+        closed=is_closed_period(end_date),
+    )
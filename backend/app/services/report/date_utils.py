@@ -0,0 +1,249 @@
+import math
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Precompiled patterns for the date formats sent by the dashboard
+FULL_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+YEAR_MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+YEAR_PATTERN = re.compile(r"^\d{4}$")
+
+# Month number -> bucket key suffix used by the yearly report
+YEAR_BUCKET_BY_MONTH = (
+    None,
+    "01",
+    "03",
+    "03",
+    "05",
+    "05",
+    "07",
+    "07",
+    "09",
+    "09",
+    "11",
+    "11",
+    "12",
+)
+
+
+class IntervalPlan(NamedTuple):
+    """Precomputed grouping of a month's days into report intervals"""
+
+    interval_size: int
+    # (start_day, end_day) for every interval after day 1
+    intervals: Tuple[Tuple[int, int], ...]
+    # day of month -> bucket index (0 is day 1, n is intervals[n - 1])
+    bucket_by_day: Tuple[int, ...]
+
+
+@lru_cache(maxsize=1024)
+def parse_iso8601_date(date_str: str) -> Optional[datetime]:
+    """
+    Parse ISO 8601 date formats.
+
+    Args:
+        date_str: ISO 8601 date string
+
+    Returns:
+        datetime object or None if parsing fails
+    """
+    try:
+        if "T" in date_str:
+            # Full ISO 8601 format with time
+            return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+
+        # Date only format YYYY-MM-DD
+        match = FULL_DATE_PATTERN.match(date_str)
+        if match:
+            return datetime(int(match[1]), int(match[2]), int(match[3]))
+        return datetime.strptime(date_str, "%Y-%m-%d")
+    except (ValueError, AttributeError, TypeError):
+        return None
+
+
+@lru_cache(maxsize=1024)
+def parse_date_input(date_input: str) -> tuple:
+    """
+    Parse different date input formats and return year, month, day components.
+    Supports ISO 8601 formats.
+
+    Args:
+        date_input: Date string in various formats (YYYY-MM-DD, YYYY-MM, YYYY, ISO 8601)
+
+    Returns:
+        tuple: (year, month, day) where month and day can be None
+    """
+    try:
+        # Handle ISO 8601 date range format: YYYY-MM-DD/YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS.ZZZZ/YYYY-MM-DDTHH:MM:SS.ZZZZ
+        if "/" in date_input:
+            start_date_str, end_date_str = date_input.split("/")
+            parsed_start = parse_iso8601_date(start_date_str.strip())
+            if parsed_start:
+                return (
+                    *_date_parts(parsed_start),
+                    start_date_str.strip(),
+                    end_date_str.strip(),
+                )
+
+        # Handle legacy date range format: YYYY-MM-DD - YYYY-MM-DD
+        if " - " in date_input:
+            start_date_str, end_date_str = date_input.split(" - ")
+            parsed_start = datetime.strptime(start_date_str.strip(), "%Y-%m-%d")
+            return (
+                *_date_parts(parsed_start),
+                start_date_str.strip(),
+                end_date_str.strip(),
+            )
+
+        match = FULL_DATE_PATTERN.match(date_input)
+        if match:
+            # Full date format YYYY-MM-DD (constructing the datetime validates it)
+            return _date_parts(
+                datetime(int(match[1]), int(match[2]), int(match[3]))
+            )
+
+        match = YEAR_MONTH_PATTERN.match(date_input)
+        if match:
+            return match[1], match[2], None
+
+        if YEAR_PATTERN.match(date_input):
+            return date_input, None, None
+
+        # Try to parse as ISO 8601 format
+        parsed_date = parse_iso8601_date(date_input)
+        if parsed_date:
+            return _date_parts(parsed_date)
+
+        print(f"Unable to parse date format: {date_input}")
+        return None, None, None
+    except (ValueError, AttributeError) as e:
+        print(f"Date parsing error: {e}")
+        return None, None, None
+
+
+def _date_parts(value: datetime) -> Tuple[str, str, str]:
+    return str(value.year), str(value.month).zfill(2), str(value.day).zfill(2)
+
+
+@lru_cache(maxsize=512)
+def create_date_range(year: str, month: Optional[str] = None) -> tuple:
+    """
+    Create start and end datetime objects for a given year, and optionally month.
+
+    Args:
+        year: Year as string
+        month: Month as string (can be None for year-only)
+
+    Returns:
+        tuple: (start_date, end_date) as datetime objects
+    """
+    if month:
+        start_date = datetime(int(year), int(month), 1)
+        if int(month) == 12:
+            end_date = datetime(int(year) + 1, 1, 1)
+        else:
+            end_date = datetime(int(year), int(month) + 1, 1)
+    else:
+        start_date = datetime(int(year), 1, 1)
+        end_date = datetime(int(year) + 1, 1, 1)
+
+    return start_date, end_date
+
+
+def get_interval(n):
+    """Get all factors of a given number and find a value in range [5, 7]"""
+    if n <= 0:
+        return []
+    return _interval_for(n)
+
+
+@lru_cache(maxsize=None)
+def _interval_for(n: int) -> Tuple[int, int]:
+    factors = set()
+    for i in range(1, int(n**0.5) + 1):
+        if n % i == 0:
+            factors.add(i)
+            factors.add(n // i)
+    factors = sorted(factors)
+
+    for factor in factors:
+        result = math.ceil(n / factor + 1)
+        if 5 <= result <= 7:
+            return result, factor
+
+    # If no factor works, try subsequent values starting from the largest factor
+    # that gives a result closest to our range
+    best_factor = None
+    for factor in reversed(factors):
+        if n / factor + 1 > 7:
+            best_factor = factor
+            break
+
+    if best_factor:
+        for test_factor in range(best_factor + 1, n + 1):
+            result = math.ceil(n / test_factor + 1)
+            if 5 <= result <= 7:
+                return result, test_factor
+
+    # For prime numbers or when no factor works, start from factor 2 and above
+    for test_factor in range(2, n + 1):
+        result = math.ceil(n / test_factor + 1)
+        if 5 <= result <= 7:
+            return result, test_factor
+
+    return 5, 5
+
+
+@lru_cache(maxsize=None)
+def interval_plan(days_in_month: int) -> IntervalPlan:
+    """
+    Group days 2..days_in_month into intervals of get_interval's size.
+    Day 1 always forms its own bucket.
+    """
+    _, interval_size = get_interval(days_in_month)
+
+    total_intervals = math.ceil((days_in_month - 1) / interval_size)
+    intervals = tuple(
+        (start, min(start + interval_size - 1, days_in_month))
+        for start in (
+            2 + (number - 1) * interval_size for number in range(1, total_intervals + 1)
+        )
+    )
+
+    # Index 0 is unused so the tuple can be indexed by day of month directly
+    bucket_by_day = (0, 0) + tuple(
+        math.ceil((day - 1) / interval_size) for day in range(2, days_in_month + 1)
+    )
+
+    return IntervalPlan(interval_size, intervals, bucket_by_day)
+
+
+def day_ordinal(value) -> Optional[int]:
+    """
+    Return the proleptic ordinal of the calendar day of a report timestamp.
+
+    Datetimes are used as-is; strings are parsed as ISO 8601, falling back to
+    their leading YYYY-MM-DD. Returns None when no day can be recovered.
+    """
+    if isinstance(value, datetime):
+        return value.toordinal()
+
+    text = str(value)
+    parsed = parse_iso8601_date(text) if "T" in text else None
+    if parsed:
+        return parsed.toordinal()
+
+    match = FULL_DATE_PATTERN.match(text[:10])
+    if match:
+        try:
+            return date(int(match[1]), int(match[2]), int(match[3])).toordinal()
+        except ValueError:
+            return None
+    return None
+
+
+@lru_cache(maxsize=4096)
+def ordinal_to_iso(ordinal: int) -> str:
+    """Serialize a day ordinal as YYYY-MM-DD"""
+    return date.fromordinal(ordinal).isoformat()
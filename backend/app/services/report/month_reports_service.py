@@ -5,6 +5,7 @@ from app.services.report.report_utils import (
     create_date_range,
     organize_reports_by_date_iso8601,
 )
+from app.services.report.report_cache import report_cache, is_closed_period
 
 
 def fetch_month_reports(email: str, month: str):
@@ -15,10 +16,18 @@ def fetch_month_reports(email: str, month: str):
 
     start_date, end_date = create_date_range(year, month_num)
 
-    report_list = find_data(
-        COLLECTIONS["USERS"],
-        {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
-        projection={"_id": 0},
-    )
+    def compute():
+        report_list = find_data(
+            COLLECTIONS["USERS"],
+            {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
+            projection={"_id": 0},
+        )
+        return organize_reports_by_date_iso8601(report_list)
 
-    return organize_reports_by_date_iso8601(report_list)
+    return report_cache.get_or_compute(
+        email,
+        "month",
+        (start_date, end_date),
+        compute,
+        closed=is_closed_period(end_date),
+    )
@@ -3,9 +3,9 @@ from app.db.collections import COLLECTIONS
 from app.services.report.report_utils import (
     parse_date_input,
     create_date_range,
-    get_interval,
 )
-import math
+from app.services.report.date_utils import interval_plan
+from app.services.report.report_cache import report_cache, is_closed_period
 from calendar import monthrange
 
 
@@ -18,56 +18,42 @@ def fetch_monthly_report_by_date(email: str, month: str):
 
     start_date, end_date = create_date_range(year, month_num)
 
-    report_list = find_data(
-        COLLECTIONS["USERS"],
-        {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
-        projection={"_id": 0},
+    def compute():
+        report_list = find_data(
+            COLLECTIONS["USERS"],
+            {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
+            projection={"_id": 0},
+        )
+        return _group_reports_by_interval(report_list, year, month_num)
+
+    return report_cache.get_or_compute(
+        email,
+        "monthly",
+        (start_date, end_date),
+        compute,
+        closed=is_closed_period(end_date),
     )
 
+
+def _group_reports_by_interval(report_list, year, month_num):
     if month_num:
         days_in_month = monthrange(int(year), int(month_num))[1]
     else:
         days_in_month = 365
 
-    _, interval_size = get_interval(days_in_month)
-
-    print(interval_size)
-
-    grouped_reports = {}
-
-    day1_key = f"{year}-{month_num.zfill(2) if month_num else '01'}-01"
-    grouped_reports[day1_key] = []
-
-    remaining_days = days_in_month - 1  # Exclude day 1
-    total_intervals = math.ceil(remaining_days / interval_size)
+    plan = interval_plan(days_in_month)
+    month_prefix = f"{year}-{month_num.zfill(2) if month_num else '01'}"
 
-    for interval_num in range(1, total_intervals + 1):
-        interval_start = 2 + ((interval_num - 1) * interval_size)
-        interval_end = min(interval_start + interval_size - 1, days_in_month)
-
-        start_date_str = f"{year}-{month_num.zfill(2) if month_num else '01'}-{str(interval_start).zfill(2)}"
-        end_date_str = f"{year}-{month_num.zfill(2) if month_num else '01'}-{str(interval_end).zfill(2)}"
-        interval_key = f"{start_date_str}/{end_date_str}"
-
-        grouped_reports[interval_key] = []
+    # Bucket 0 is day 1, the rest follow the precomputed intervals
+    interval_keys = [f"{month_prefix}-01"] + [
+        f"{month_prefix}-{start:02d}/{month_prefix}-{end:02d}"
+        for start, end in plan.intervals
+    ]
+    buckets = [[] for _ in interval_keys]
 
     for report_item in report_list:
         created_at = report_item.get("created_at")
-        if created_at:
-            day = created_at.day
-
-            if day == 1:
-                interval_key = f"{year}-{month_num.zfill(2) if month_num else '01'}-01"
-            else:
-                interval_number = math.ceil((day - 1) / interval_size)
-                interval_start = 2 + ((interval_number - 1) * interval_size)
-                interval_end = min(interval_start + interval_size - 1, days_in_month)
-
-                start_date_str = f"{year}-{month_num.zfill(2) if month_num else '01'}-{str(interval_start).zfill(2)}"
-                end_date_str = f"{year}-{month_num.zfill(2) if month_num else '01'}-{str(interval_end).zfill(2)}"
-                interval_key = f"{start_date_str}/{end_date_str}"
-
-            if interval_key in grouped_reports:
-                grouped_reports[interval_key].append(report_item)
+        if created_at and created_at.day < len(plan.bucket_by_day):
+            buckets[plan.bucket_by_day[created_at.day]].append(report_item)
 
-    return grouped_reports
+    return dict(zip(interval_keys, buckets))
@@ -0,0 +1,174 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from config import Config
+from app.utils.cache import CacheBackend, LRUCacheBackend
+
+RangeKey = Union[str, Tuple[Optional[datetime], Optional[datetime]]]
+
+
+def normalize_datetime(value: Optional[datetime]) -> Optional[datetime]:
+    """Convert aware datetimes to naive UTC so they compare with stored report dates"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def is_closed_period(end_date: Optional[datetime]) -> bool:
+    """
+    A period is closed once its (exclusive) end lies in the past.
+
+    Reports are always stored with created_at = now, so a closed period can
+    never gain new reports. Its reports can still be updated in place (audio
+    results arrive after the video report is saved), which invalidate_email
+    covers like any other change.
+    """
+    end_date = normalize_datetime(end_date)
+    if end_date is None:
+        return False
+    return end_date <= datetime.utcnow()
+
+
+class ReportCache:
+    """
+    Response cache for the report endpoints, keyed by (email, endpoint, range).
+
+    Every entry is tied to a per-email generation token; saving or updating a
+    report for an email rotates the token, which makes every entry for that
+    email unreachable in one write. Entries for open periods (and rewards)
+    also carry a TTL; entries for closed past periods only change through
+    such a write, so they are stored without one.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl_seconds: float = 300,
+    ):
+        self.backend = backend or LRUCacheBackend(Config.REPORT_CACHE_MAX_ENTRIES)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._endpoint_stats: Dict[str, Dict[str, int]] = {}
+        self._shared_epoch = None
+
+    def get_or_compute(
+        self,
+        email: str,
+        endpoint: str,
+        range_key: RangeKey,
+        compute: Callable[[], Any],
+        closed: bool = False,
+    ) -> Any:
+        """
+        Return the cached response or compute and store it
+
+        Args:
+            email: User the report belongs to
+            endpoint: Logical endpoint name (date, weekly, month, ...)
+            range_key: Normalized range, either a string or a (start, end) tuple
+            compute: Zero-argument callable producing the response on a miss
+            closed: Whether the range is a closed past period
+
+        Returns:
+            The cached or freshly computed response (treat as read-only)
+        """
+        key = self._make_key(email, endpoint, range_key)
+
+        value = self.backend.get(key)
+        if value is not None:
+            self._record(endpoint, "hits")
+            return value
+
+        self._record(endpoint, "misses")
+        value = compute()
+        self.backend.set(key, value, None if closed else self.ttl_seconds)
+        return value
+
+    def share_invalidations(self) -> None:
+        """
+        Make invalidations visible to forked worker processes.
+
+        Must be called in the parent before forking. Every invalidation then
+        also bumps a shared epoch that is part of all keys, so a report saved
+        by one worker retires the entries of the others.
+        """
+        self._shared_epoch = multiprocessing.Value("Q", 0)
+
+    def invalidate_email(self, email: Optional[str]) -> None:
+        """Drop every entry cached for this email"""
+        if not email:
+            return
+        self.backend.set(self._generation_key(email), self._new_generation())
+        if self._shared_epoch is not None:
+            with self._shared_epoch.get_lock():
+                self._shared_epoch.value += 1
+        with self._lock:
+            self._invalidations += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, overall and per endpoint"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+                "entries": len(self.backend),
+                "evictions": getattr(self.backend, "evictions", 0),
+                "endpoints": {
+                    name: dict(counts) for name, counts in self._endpoint_stats.items()
+                },
+            }
+
+    def _record(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            if outcome == "hits":
+                self._hits += 1
+            else:
+                self._misses += 1
+            counts = self._endpoint_stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def _make_key(self, email: str, endpoint: str, range_key: RangeKey) -> str:
+        if isinstance(range_key, tuple):
+            range_key = "/".join(
+                normalize_datetime(value).isoformat() if value else ""
+                for value in range_key
+            )
+
+        generation = self._generation(email)
+        if self._shared_epoch is not None:
+            generation = f"{self._shared_epoch.value}.{generation}"
+        return f"report:{email}:{generation}:{endpoint}:{range_key}"
+
+    def _generation(self, email: str) -> str:
+        key = self._generation_key(email)
+        generation = self.backend.get(key)
+        if generation is None:
+            # A missing (or evicted) token is replaced by a fresh one, so old
+            # entries can never become reachable again.
+            generation = self._new_generation()
+            self.backend.set(key, generation)
+        return generation
+
+    def _generation_key(self, email: str) -> str:
+        return f"generation:{email}"
+
+    def _new_generation(self) -> str:
+        return f"{time.time_ns():x}.{next(self._counter)}"
+
+
+# Create a global instance for easy access
+report_cache = ReportCache(ttl_seconds=Config.REPORT_CACHE_TTL_SECONDS)
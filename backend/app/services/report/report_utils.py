@@ -1,94 +1,14 @@
 from datetime import datetime, timedelta
-import re
 from typing import Dict, List, Any, Optional
-import math
 
-
-def parse_date_input(date_input: str) -> tuple:
-    """
-    Parse different date input formats and return year, month, day components.
-    Supports ISO 8601 formats.
-
-    Args:
-        date_input: Date string in various formats (YYYY-MM-DD, YYYY-MM, YYYY, ISO 8601)
-
-    Returns:
-        tuple: (year, month, day) where month and day can be None
-    """
-    try:
-        # Handle ISO 8601 date range format: YYYY-MM-DD/YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS.ZZZZ/YYYY-MM-DDTHH:MM:SS.ZZZZ
-        if "/" in date_input:
-            start_date_str, end_date_str = date_input.split("/")
-            # Parse start date for the main return values
-            parsed_start = parse_iso8601_date(start_date_str.strip())
-            if parsed_start:
-                year = str(parsed_start.year)
-                month = str(parsed_start.month).zfill(2)
-                day = str(parsed_start.day).zfill(2)
-                return year, month, day, start_date_str.strip(), end_date_str.strip()
-
-        # Handle legacy date range format: YYYY-MM-DD - YYYY-MM-DD
-        if " - " in date_input:
-            start_date_str, end_date_str = date_input.split(" - ")
-            # Parse start date for the main return values
-            parsed_start = datetime.strptime(start_date_str.strip(), "%Y-%m-%d")
-            year = str(parsed_start.year)
-            month = str(parsed_start.month).zfill(2)
-            day = str(parsed_start.day).zfill(2)
-            return year, month, day, start_date_str.strip(), end_date_str.strip()
-
-        # Handle different date formats that might come from frontend
-        if re.match(r"^\d{4}-\d{2}-\d{2}$", date_input):
-            # Full date format YYYY-MM-DD
-            parsed_date = datetime.strptime(date_input, "%Y-%m-%d")
-            year = str(parsed_date.year)
-            month = str(parsed_date.month).zfill(2)
-            day = str(parsed_date.day).zfill(2)
-        elif re.match(r"^\d{4}-\d{2}$", date_input):
-            # Month format YYYY-MM
-            year, month = date_input.split("-")
-            day = None
-        elif re.match(r"^\d{4}$", date_input):
-            # Year format YYYY
-            year = date_input
-            month = None
-            day = None
-        else:
-            # Try to parse as ISO 8601 format
-            parsed_date = parse_iso8601_date(date_input)
-            if parsed_date:
-                year = str(parsed_date.year)
-                month = str(parsed_date.month).zfill(2)
-                day = str(parsed_date.day).zfill(2)
-            else:
-                print(f"Unable to parse date format: {date_input}")
-                return None, None, None
-    except (ValueError, AttributeError) as e:
-        print(f"Date parsing error: {e}")
-        return None, None, None
-
-    return year, month, day
-
-
-def parse_iso8601_date(date_str: str) -> Optional[datetime]:
-    """
-    Parse ISO 8601 date formats.
-
-    Args:
-        date_str: ISO 8601 date string
-
-    Returns:
-        datetime object or None if parsing fails
-    """
-    try:
-        if "T" in date_str:
-            # Full ISO 8601 format with time
-            return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-        else:
-            # Date only format YYYY-MM-DD
-            return datetime.strptime(date_str, "%Y-%m-%d")
-    except (ValueError, AttributeError):
-        return None
+from app.services.report.date_utils import (
+    parse_date_input,
+    parse_iso8601_date,
+    create_date_range,
+    get_interval,
+    day_ordinal,
+    ordinal_to_iso,
+)
 
 
 def parse_iso8601_range(date_range: str) -> tuple:
@@ -116,39 +36,6 @@ def parse_iso8601_range(date_range: str) -> tuple:
         return None, None
 
 
-def create_date_range(year: str, month: Optional[str] = None) -> tuple:
-    """
-    Create start and end datetime objects for a given year, month, and optionally day.
-
-    Args:
-        year: Year as string
-        month: Month as string (can be None for year-only)
-        day: Day as string (can be None for month/year-only)
-
-    Returns:
-        tuple: (start_date, end_date) as datetime objects
-    """
-    if month:
-        # Month query
-        start_date = datetime(int(year), int(month), 1)
-
-        # Calculate end date (next month)
-        if month == "12":
-            end_year = int(year) + 1
-            end_month = 1
-        else:
-            end_year = int(year)
-            end_month = int(month) + 1
-
-        end_date = datetime(end_year, end_month, 1)
-    else:
-        # Year only search
-        start_date = datetime(int(year), 1, 1)
-        end_date = datetime(int(year) + 1, 1, 1)
-
-    return start_date, end_date
-
-
 def organize_reports_by_date_iso8601(
     reports: List[Dict[str, Any]],
     include_time: bool = False,
@@ -159,6 +46,9 @@ def organize_reports_by_date_iso8601(
     Organize reports by date using ISO 8601 format as keys.
     If start_date and end_date are provided, creates entries for all dates in the range.
 
+    Reports are bucketed by integer day ordinal and the keys are only turned
+    into ISO strings once, when the result is built.
+
     Args:
         reports: List of report dictionaries
         include_time: Whether to include time in the date key (default: False for date only)
@@ -168,103 +58,76 @@ def organize_reports_by_date_iso8601(
     Returns:
         Dict with ISO 8601 date keys and report lists as values
     """
-    reports_by_date = {}
+    if include_time:
+        return _organize_reports_by_timestamp(reports, start_date, end_date)
+
+    has_range = bool(start_date and end_date)
+    reports_by_day = {}
 
     # If date range is provided, create entries for all dates in the range
-    if start_date and end_date:
-        current_date = start_date
-        while current_date <= end_date:
-            if include_time:
-                date_key = current_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-            else:
-                date_key = current_date.strftime("%Y-%m-%d")
-            reports_by_date[date_key] = []
-            current_date += timedelta(days=1)
+    if has_range:
+        first_day = start_date.toordinal()
+        for offset in range((end_date - start_date).days + 1):
+            reports_by_day[first_day + offset] = []
 
     # Populate with actual reports
     for report_item in reports:
         created_at = report_item.get("created_at")
-        if created_at:
-            # Convert datetime to ISO 8601 format
-            if isinstance(created_at, datetime):
-                if include_time:
-                    date_key = created_at.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-                else:
-                    date_key = created_at.strftime("%Y-%m-%d")
-            else:
-                # Handle string dates
-                try:
-                    parsed_date = datetime.fromisoformat(
-                        str(created_at).replace("Z", "+00:00")
-                    )
-                    if include_time:
-                        date_key = parsed_date.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-                    else:
-                        date_key = parsed_date.strftime("%Y-%m-%d")
-                except:
-                    # Fallback to date only if parsing fails
-                    date_str = str(created_at)[
-                        :10
-                    ]  # Take first 10 chars for YYYY-MM-DD
-                    date_key = date_str
-
-            # Add report to the appropriate date
-            if date_key in reports_by_date:
-                reports_by_date[date_key].append(report_item)
-            elif not start_date and not end_date:
-                # If no range provided, create entry dynamically
-                if date_key not in reports_by_date:
-                    reports_by_date[date_key] = []
-                reports_by_date[date_key].append(report_item)
-
-    return reports_by_date
-
+        if not created_at:
+            continue
 
-def get_interval(n):
-    """Get all factors of a given number and find a value in range [5, 7]"""
+        day_key = day_ordinal(created_at)
+        if day_key is None:
+            # Fallback to the raw leading YYYY-MM-DD if parsing fails
+            day_key = str(created_at)[:10]
 
-    if n <= 0:
-        return []
+        bucket = reports_by_day.get(day_key)
+        if bucket is not None:
+            bucket.append(report_item)
+        elif not has_range:
+            # If no range provided, create entry dynamically
+            reports_by_day[day_key] = [report_item]
 
-    factors = []
-    for i in range(1, int(n**0.5) + 1):
-        if n % i == 0:
-            factors.append(i)
-            if i != n // i:  # Avoid adding the same factor twice for perfect squares
-                factors.append(n // i)
+    return {
+        ordinal_to_iso(day_key) if isinstance(day_key, int) else day_key: day_reports
+        for day_key, day_reports in reports_by_day.items()
+    }
 
-    factors = sorted(factors)
 
-    for factor in factors:
-        result = n / factor + 1
-        result = math.ceil(result)
-        if 5 <= result <= 7:
-            return result, factor
+def _organize_reports_by_timestamp(
+    reports: List[Dict[str, Any]],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """organize_reports_by_date_iso8601 with full timestamp keys"""
+    timestamp_format = "%Y-%m-%dT%H:%M:%S.000Z"
+    reports_by_date = {}
 
-    # If no factor works, try subsequent values starting from the largest factor
-    # that gives a result closest to our range
-    best_factor = None
-    for factor in reversed(factors):  # Start from largest factors
-        result = n / factor + 1
-        if result > 7:  # If result is too large, this factor is a good starting point
-            best_factor = factor
-            break
+    if start_date and end_date:
+        current_date = start_date
+        while current_date <= end_date:
+            reports_by_date[current_date.strftime(timestamp_format)] = []
+            current_date += timedelta(days=1)
 
-    # If we found a good starting factor, increment it until we get in range
-    if best_factor:
-        test_factor = best_factor + 1
-        while test_factor <= n:
-            result = n / test_factor + 1
-            result = math.ceil(result)
-            if 5 <= result <= 7:
-                return result, test_factor
-            test_factor += 1
+    for report_item in reports:
+        created_at = report_item.get("created_at")
+        if not created_at:
+            continue
 
-    # For prime numbers or when no factor works, start from factor 2 and above
-    for test_factor in range(2, n + 1):
-        result = n / test_factor + 1
-        result = math.ceil(result)
-        if 5 <= result <= 7:
-            return result, test_factor
+        if isinstance(created_at, datetime):
+            date_key = created_at.strftime(timestamp_format)
+        else:
+            try:
+                parsed_date = datetime.fromisoformat(
+                    str(created_at).replace("Z", "+00:00")
+                )
+                date_key = parsed_date.strftime(timestamp_format)
+            except ValueError:
+                date_key = str(created_at)[:10]
+
+        if date_key in reports_by_date:
+            reports_by_date[date_key].append(report_item)
+        elif not start_date and not end_date:
+            reports_by_date[date_key] = [report_item]
 
-    return 5, 5
+    return reports_by_date
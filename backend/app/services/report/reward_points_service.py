@@ -1,51 +1,70 @@
-from app.db.collections import COLLECTIONS
-from app.db.operations import update_data, insert_data, find_data
-from datetime import datetime, timezone
-
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-# def check_if_first_report_of_day(email: str, report_date: datetime):
-#     """
-#     Check if this is the user's first report of the day.
-#     Returns True if this is the first report, False otherwise.
-#     """
-#     # Convert report_date to start and end of day for comparison
-#     start_of_day = report_date.replace(hour=0, minute=0, second=0, microsecond=0)
-#     end_of_day = start_of_day.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-#     # Check if there are any existing reports for this user on this date
-#     existing_reports = find_data(
-#         COLLECTIONS["USERS"],
-#         {"email": email, "created_at": {"$gte": start_of_day, "$lte": end_of_day}},
-#     )
+from config import Config
+from app.db.async_operations import async_db
+from app.db.collections import COLLECTIONS
+from app.db.operations import (
+    insert_data,
+    find_data,
+    find_one_and_update_data,
+    update_data,
+)
+from app.services.report.report_cache import report_cache
 
-#     # If no existing reports found, this is the first report of the day
-#     return len(existing_reports) == 0
+STREAK_BONUS_DAYS = 5
+DAILY_POINTS = 1
+STREAK_BONUS_POINTS = 2
 
+# Single worker so deferred ledger entries are written in order
+_ledger_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reward-ledger")
 
-def update_user_rewards(
-    email: str, new_streak: int, points_earned: int, report_date: datetime
-):
-    user = get_user(email)
-    if not user:
-        return None
 
-    user_id = user.get("user_id")
+def _reward_update_pipeline(report_date: datetime, previous_day_start: datetime):
+    """
+    Pipeline update applying one daily check-in to a user_auth document.
 
-    update_data(
-        COLLECTIONS["USER_AUTH"],
-        {"email": email},
+    Only runs on documents whose last_report_date is before today, so the
+    streak is extended when the last report was yesterday and reset otherwise.
+    """
+    return [
+        {
+            "$set": {
+                "current_streak": {
+                    "$cond": [
+                        {"$gte": ["$last_report_date", previous_day_start]},
+                        {"$add": [{"$ifNull": ["$current_streak", 0]}, 1]},
+                        1,
+                    ]
+                }
+            }
+        },
         {
-            "$inc": {"total_reward_points": points_earned},
             "$set": {
-                "current_streak": new_streak,
+                "total_reward_points": {
+                    "$add": [
+                        {"$ifNull": ["$total_reward_points", 0]},
+                        {
+                            "$cond": [
+                                {"$eq": ["$current_streak", STREAK_BONUS_DAYS]},
+                                DAILY_POINTS + STREAK_BONUS_POINTS,
+                                DAILY_POINTS,
+                            ]
+                        },
+                    ]
+                },
+                "streak_start_date": {
+                    "$cond": [
+                        {"$eq": ["$current_streak", 1]},
+                        report_date,
+                        "$streak_start_date",
+                    ]
+                },
                 "last_report_date": report_date,
-                "streak_start_date": (
-                    report_date if new_streak == 1 else user["streak_start_date"]
-                ),
-                "updated_at": datetime.now(timezone.utc),
-            },
+            }
         },
-    )
+    ]
 
 
 def record_reward_transaction(
@@ -63,99 +82,178 @@ def record_reward_transaction(
     insert_data(COLLECTIONS["REWARD_POINTS"], reward_record)
 
 
-def get_user(email: str):
-    users = find_data(COLLECTIONS["USER_AUTH"], {"email": email})
-    if len(users) > 0:
-        return users[0]
-    return None
+def _record_reward_transaction_safely(*args):
+    try:
+        record_reward_transaction(*args)
+    except Exception as e:
+        print(f"Failed to record deferred reward transaction: {e}")
 
 
-def calculate_rewards(email: str, report_date: datetime):
+def calculate_rewards(
+    email: str, report_date: datetime, deferred: Optional[bool] = None
+) -> int:
     """
-    Calculate rewards for a user's report.
-    Returns a tuple: (points_earned, reason, new_streak)
+    Apply the daily check-in reward for a user's report.
+
+    The streak and point totals are updated in a single atomic
+    find_one_and_update that only matches when the user has not been
+    rewarded yet today, followed by one insert into the reward ledger.
+
+    Args:
+        email: User the report belongs to
+        report_date: Time of the report (UTC)
+        deferred: Write the ledger entry in the background
+            (defaults to Config.REWARDS_DEFERRED_LEDGER)
+
+    Returns:
+        Points earned; 0 if the user was already rewarded today or is unknown
     """
-    # # 1. Check if this is the first report of the day
-    # is_first_report = check_if_first_report_of_day(email, report_date)
-
-    # 1. Get user's current streak info
-    user = get_user(email)
-    if not user:
-        return None
-
-    last_report = user.get("last_report_date")
-    current_streak = user.get("current_streak", 0)
-
-    # 2. Check if this is consecutive day
-    if last_report:
-        days_diff = (report_date.date() - last_report.date()).days
-        if days_diff == 1:
-            # Consecutive day - increment streak
-            new_streak = current_streak + 1
-        elif days_diff == 0:
-            # Same day - no change
-            return 0
-        else:
-            # Gap in streak - reset to 1
-            new_streak = 1
-    else:
-        # First report ever
-        new_streak = 1
+    day_start = report_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    previous_day_start = day_start - timedelta(days=1)
 
-    # 3. Calculate points
-    points_earned = 1  # Base daily point
+    user = find_one_and_update_data(
+        COLLECTIONS["USER_AUTH"],
+        {
+            "email": email,
+            "$or": [
+                {"last_report_date": {"$lt": day_start}},
+                {"last_report_date": None},
+            ],
+        },
+        _reward_update_pipeline(report_date, previous_day_start),
+        projection={"_id": 0, "current_streak": 1},
+    )
+    if user is None:
+        return 0
 
-    # 4. Check for 5-day streak bonus
-    if new_streak == 5:
-        points_earned += 2  # Bonus points
+    new_streak = user.get("current_streak", 1)
+    if new_streak == STREAK_BONUS_DAYS:
+        points_earned = DAILY_POINTS + STREAK_BONUS_POINTS
         reason = "5_day_streak"
     else:
+        points_earned = DAILY_POINTS
         reason = "daily_checkin"
 
-    # 5. Update user record
-    update_user_rewards(email, new_streak, points_earned, report_date)
+    if deferred is None:
+        deferred = Config.REWARDS_DEFERRED_LEDGER
 
-    # 6. Record reward transaction
-    record_reward_transaction(email, points_earned, reason, new_streak, report_date)
+    transaction = (email, points_earned, reason, new_streak, report_date)
+    if deferred:
+        _ledger_executor.submit(_record_reward_transaction_safely, *transaction)
+    else:
+        record_reward_transaction(*transaction)
+
+    # Cached reward totals for this user are now stale
+    report_cache.invalidate_email(email)
 
     return points_earned
 
 
-def fetch_reward_points(email: str, report_id: str = None):
+def reward_saved_report(email: str, report_query: dict, report_date: datetime) -> int:
     """
-    Fetch reward points for a user.
-    If current_scan_date is provided, also check if this scan should show rewards modal.
-    """
-    users = find_data(COLLECTIONS["USER_AUTH"], {"email": email})
-    if len(users) > 0:
-        total_points = users[0].get("total_reward_points", 0)
-        if not report_id:
-            return {"total_reward_points": total_points, "should_show_rewards": False}
+    Apply the daily reward for a report that is already stored, and record
+    the outcome on the report.
 
-        report = find_data(COLLECTIONS["USERS"], {"user_Id": report_id})
+    Rewards are only granted once the report exists, so a failed insert never
+    credits points. A failure here is logged and leaves the report without
+    the reward fields; fetching its rewards then falls back to a day scan.
 
-        if not report:
-            return {"total_reward_points": total_points, "should_show_rewards": False}
+    Args:
+        email: User the report belongs to
+        report_query: Query matching the stored report in the users collection
+        report_date: Time of the report (UTC)
 
-        start_of_day = (
-            report[0]
-            .get("created_at")
-            .replace(hour=0, minute=0, second=0, microsecond=0)
-        )
-        end_of_day = start_of_day.replace(
-            hour=23, minute=59, second=59, microsecond=999999
+    Returns:
+        Points earned; 0 if none were granted
+    """
+    try:
+        points_earned = calculate_rewards(email, report_date)
+        update_data(
+            COLLECTIONS["USERS"],
+            report_query,
+            {
+                "$set": {
+                    "reward_points_earned": points_earned,
+                    "first_scan_of_day": points_earned > 0,
+                }
+            },
         )
+    except Exception as e:
+        print(f"Failed to apply reward for stored report: {e}")
+        return 0
+    return points_earned
+
+
+def fetch_reward_points(email: str, report_id: str = None):
+    """
+    Fetch reward points for a user.
+    If report_id is provided, also check if this scan should show rewards modal.
+    """
+    return report_cache.get_or_compute(
+        email,
+        "rewards",
+        report_id or "",
+        lambda: _compute_reward_points(email, report_id),
+    )
+
 
-        existing_reports = find_data(
+def _compute_reward_points(email: str, report_id: str = None):
+    # The user's totals and the report are independent lookups
+    user_future = async_db.find_data(
+        COLLECTIONS["USER_AUTH"],
+        {"email": email},
+        limit=1,
+        projection={"_id": 0, "total_reward_points": 1},
+    )
+    report_future = (
+        async_db.find_data(
             COLLECTIONS["USERS"],
-            {"email": email, "created_at": {"$gte": start_of_day, "$lte": end_of_day}},
+            {"user_Id": report_id},
+            limit=1,
+            projection={"_id": 0, "first_scan_of_day": 1, "created_at": 1},
         )
+        if report_id
+        else None
+    )
+
+    if report_future is None:
+        users = user_future.result()
+        report = None
+    else:
+        users, report = async_db.gather(user_future, report_future)
+
+    if not users:
+        return {"total_reward_points": 0, "should_show_rewards": False}
+
+    total_points = users[0].get("total_reward_points", 0)
+    if not report:
+        return {"total_reward_points": total_points, "should_show_rewards": False}
+
+    if "first_scan_of_day" in report[0]:
+        should_show_rewards = bool(report[0]["first_scan_of_day"])
+    else:
+        should_show_rewards = _is_only_report_of_day(email, report[0]["created_at"])
+
+    return {
+        "total_reward_points": total_points,
+        "should_show_rewards": should_show_rewards,
+    }
 
-        should_show_rewards = len(existing_reports) <= 1
-        print("data", should_show_rewards, existing_reports, start_of_day, end_of_day)
-        return {
-            "total_reward_points": total_points,
-            "should_show_rewards": should_show_rewards,
-        }
 
-    return {"total_reward_points": 0, "should_show_rewards": False}
+def _is_only_report_of_day(email: str, created_at: datetime) -> bool:
+    """Fallback for reports stored before first_scan_of_day was recorded"""
+    start_of_day = created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    existing_reports = find_data(
+        COLLECTIONS["USERS"],
+        {
+            "email": email,
+            "created_at": {
+                "$gte": start_of_day,
+                "$lt": start_of_day + timedelta(days=1),
+            },
+        },
+        limit=2,
+        projection={"_id": 1},
+    )
+    return len(existing_reports) <= 1
@@ -4,6 +4,7 @@ from app.services.report.report_utils import (
     parse_iso8601_range,
     organize_reports_by_date_iso8601,
 )
+from app.services.report.report_cache import report_cache, is_closed_period
 
 
 def fetch_weekly_report_by_date(email: str, date_range: str):
@@ -15,12 +16,20 @@ def fetch_weekly_report_by_date(email: str, date_range: str):
 
     print(f"Searching from {start_date} to {end_date}")
 
-    report_list = find_data(
-        COLLECTIONS["USERS"],
-        {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
-        projection={"_id": 0},
-    )
+    def compute():
+        report_list = find_data(
+            COLLECTIONS["USERS"],
+            {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
+            projection={"_id": 0},
+        )
+        return organize_reports_by_date_iso8601(
+            report_list, include_time=False, start_date=start_date, end_date=end_date
+        )
 
-    return organize_reports_by_date_iso8601(
-        report_list, include_time=False, start_date=start_date, end_date=end_date
+    return report_cache.get_or_compute(
+        email,
+        "weekly",
+        (start_date, end_date),
+        compute,
+        closed=is_closed_period(end_date),
     )
@@ -4,6 +4,8 @@ from app.services.report.report_utils import (
     parse_date_input,
     create_date_range,
 )
+from app.services.report.date_utils import YEAR_BUCKET_BY_MONTH
+from app.services.report.report_cache import report_cache, is_closed_period
 
 
 def fetch_yearly_report_by_date(email: str, date: str):
@@ -15,35 +17,28 @@ def fetch_yearly_report_by_date(email: str, date: str):
 
     print(start_date, end_date)
 
-    report = find_data(
-        COLLECTIONS["USERS"],
-        {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
-        projection={"_id": 0},
-    )
+    def compute():
+        report = find_data(
+            COLLECTIONS["USERS"],
+            {"email": email, "created_at": {"$gte": start_date, "$lt": end_date}},
+            projection={"_id": 0},
+        )
+        return _group_reports_by_quarter(report, year)
 
-    quarterly_reports = {}
+    return report_cache.get_or_compute(
+        email,
+        "year",
+        (start_date, end_date),
+        compute,
+        closed=is_closed_period(end_date),
+    )
 
-    # Create entries for all months with empty arrays
-    for month in range(1, 13):
-        if month == 1:
-            quarter_key = f"{year}-01"
-        elif month in [2, 3]:
-            quarter_key = f"{year}-03"
-        elif month in [4, 5]:
-            quarter_key = f"{year}-05"
-        elif month in [6, 7]:
-            quarter_key = f"{year}-07"
-        elif month in [8, 9]:
-            quarter_key = f"{year}-09"
-        elif month in [10, 11]:
-            quarter_key = f"{year}-11"
-        elif month == 12:
-            quarter_key = f"{year}-12"
-        else:
-            continue
 
-        if quarter_key not in quarterly_reports:
-            quarterly_reports[quarter_key] = []
+def _group_reports_by_quarter(report, year):
+    # Create entries for all buckets with empty arrays
+    quarterly_reports = {
+        f"{year}-{suffix}": [] for suffix in YEAR_BUCKET_BY_MONTH if suffix
+    }
 
     # Populate with actual reports
     for report_item in report:
@@ -65,22 +60,7 @@ def fetch_yearly_report_by_date(email: str, date: str):
                     continue
 
             # Determine quarter key for this month
-            if month == 1:
-                quarter_key = f"{year}-01"
-            elif month in [2, 3]:
-                quarter_key = f"{year}-03"
-            elif month in [4, 5]:
-                quarter_key = f"{year}-05"
-            elif month in [6, 7]:
-                quarter_key = f"{year}-07"
-            elif month in [8, 9]:
-                quarter_key = f"{year}-09"
-            elif month in [10, 11]:
-                quarter_key = f"{year}-11"
-            elif month == 12:
-                quarter_key = f"{year}-12"
-            else:
-                continue
+            quarter_key = f"{year}-{YEAR_BUCKET_BY_MONTH[month]}"
 
             # Add report to the appropriate quarter
             if quarter_key in quarterly_reports:
@@ -0,0 +1,289 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import Config
+from app.services.resources.youtube_service import YouTubeService
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_VERSION = 1
+
+# (playlist_id, max_results) -> videos; raises when the API call fails
+PlaylistFetcher = Callable[[str, int], List[Dict]]
+
+
+def _fetch_from_youtube(playlist_id: str, max_results: int) -> List[Dict]:
+    return YouTubeService().fetch_playlist_videos(playlist_id, max_results)
+
+
+class PlaylistCache:
+    """
+    Videos of YouTube playlists, cached per playlist id.
+
+    A playlist younger than ttl_seconds is served from memory. Up to
+    stale_seconds past that it is still served immediately while one
+    background refresh fetches it again (stale-while-revalidate); older or
+    unknown playlists are fetched on the request, once per playlist however
+    many requests are waiting. A failed refresh keeps serving the old videos.
+
+    Fetched playlists are written to a JSON file so a restart (or another
+    worker process) starts with them instead of calling the API again.
+    """
+
+    def __init__(
+        self,
+        fetch: Optional[PlaylistFetcher] = None,
+        ttl_seconds: float = 21600,
+        stale_seconds: float = 604800,
+        max_videos: int = 200,
+        max_playlists: int = 64,
+        path: Optional[str] = None,
+    ):
+        """
+        Args:
+            fetch: Function fetching a playlist (defaults to the Data API)
+            ttl_seconds: Age until a playlist is refreshed
+            stale_seconds: How long past the TTL a playlist is still served
+                while it is being refreshed
+            max_videos: Videos fetched and kept per playlist
+            max_playlists: Playlists kept in memory, least recently used dropped
+            path: JSON file persisting the cache (None disables persistence)
+        """
+        self.fetch = fetch or _fetch_from_youtube
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_videos = max(1, max_videos)
+        self.max_playlists = max(1, max_playlists)
+        self.path = path
+
+        self._entries = OrderedDict()  # playlist_id -> {"videos", "fetched_at"}
+        self._lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing = set()
+        self._loaded = False
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    def get(self, playlist_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Videos of a playlist, in playlist order
+
+        Args:
+            playlist_id: YouTube playlist id
+            limit: Return at most this many videos (at most max_videos)
+
+        Raises:
+            Exception if the playlist is not cached and cannot be fetched
+        """
+        self._load()
+        entry = self._entry(playlist_id)
+        age = time.time() - entry["fetched_at"] if entry else None
+
+        if entry and age < self.ttl_seconds:
+            self._count("hits")
+            videos = entry["videos"]
+        elif entry and age < self.ttl_seconds + self.stale_seconds:
+            self._count("stale_hits")
+            self._refresh_in_background(playlist_id)
+            videos = entry["videos"]
+        else:
+            self._count("misses")
+            videos = self._fetch(playlist_id)
+
+        return list(videos[:limit] if limit is not None else videos)
+
+    def prefetch(self, playlist_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Fetch every playlist that is not fresh in memory or on disk
+
+        Returns:
+            Dictionary mapping each playlist id to "cached", "fetched" or the
+            error that prevented fetching it
+        """
+        self._load()
+        results = {}
+        for playlist_id in dict.fromkeys(playlist_ids):
+            if self._is_fresh(self._entry(playlist_id)):
+                results[playlist_id] = "cached"
+                continue
+            try:
+                self._fetch(playlist_id)
+                results[playlist_id] = "fetched"
+            except Exception as e:
+                results[playlist_id] = f"error: {e}"
+        return results
+
+    def start_prefetch(self, playlist_ids: Iterable[str]) -> threading.Thread:
+        """Run prefetch in a daemon thread so startup does not wait on the API"""
+        playlist_ids = list(playlist_ids)
+
+        def run():
+            results = list(self.prefetch(playlist_ids).values())
+            fetched, cached = results.count("fetched"), results.count("cached")
+            logger.info(
+                f"Playlist prefetch: {fetched} fetched, {cached} already cached, "
+                f"{len(results) - fetched - cached} failed"
+            )
+
+        thread = threading.Thread(target=run, name="playlist-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self, playlist_id: Optional[str] = None) -> None:
+        """Forget one playlist, or all of them, in memory (the file is kept)"""
+        with self._lock:
+            if playlist_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(playlist_id, None)
+
+    def stats(self) -> Dict[str, object]:
+        """Hit/miss counters and the age of every cached playlist"""
+        now = time.time()
+        with self._lock:
+            return {
+                **self._stats,
+                "refreshing": sorted(self._refreshing),
+                "playlists": {
+                    playlist_id: {
+                        "videos": len(entry["videos"]),
+                        "age_seconds": round(now - entry["fetched_at"], 1),
+                    }
+                    for playlist_id, entry in self._entries.items()
+                },
+            }
+
+    def _fetch(self, playlist_id: str) -> List[Dict]:
+        """
+        Fetch a playlist once, however many threads ask for it.
+
+        Threads that waited for a fetch in progress use its result. Before
+        calling the API the file is checked too, in case another process
+        fetched the playlist meanwhile.
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(playlist_id, threading.Lock())
+
+        with fetch_lock:
+            self._load(reload=True)
+            stored = self._entry(playlist_id)
+            if self._is_fresh(stored):
+                return stored["videos"]
+
+            try:
+                videos = self.fetch(playlist_id, self.max_videos)
+            except Exception as e:
+                self._count("errors")
+                if stored:
+                    logger.warning(
+                        f"Refreshing playlist {playlist_id} failed, serving cached videos: {e}"
+                    )
+                    return stored["videos"]
+                raise Exception(f"Failed to fetch playlist {playlist_id}: {str(e)}")
+
+            self._store(playlist_id, {"videos": videos, "fetched_at": time.time()})
+            self._persist()
+            return videos
+
+    def _refresh_in_background(self, playlist_id: str) -> None:
+        with self._lock:
+            if playlist_id in self._refreshing:
+                return
+            self._refreshing.add(playlist_id)
+
+        def run():
+            try:
+                self._fetch(playlist_id)
+                self._count("refreshes")
+            except Exception as e:
+                logger.warning(f"Background refresh of playlist {playlist_id}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(playlist_id)
+
+        threading.Thread(
+            target=run, name=f"playlist-refresh-{playlist_id}", daemon=True
+        ).start()
+
+    def _is_fresh(self, entry: Optional[Dict]) -> bool:
+        return bool(entry) and time.time() - entry["fetched_at"] < self.ttl_seconds
+
+    def _entry(self, playlist_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(playlist_id)
+            if entry:
+                self._entries.move_to_end(playlist_id)
+            return entry
+
+    def _store(self, playlist_id: str, entry: Dict) -> None:
+        with self._lock:
+            self._entries[playlist_id] = entry
+            self._entries.move_to_end(playlist_id)
+            while len(self._entries) > self.max_playlists:
+                self._entries.popitem(last=False)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _load(self, reload: bool = False) -> None:
+        """Merge the playlists from the file that are newer than in memory"""
+        if not self.path or (self._loaded and not reload):
+            return
+        self._loaded = True
+
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable playlist cache {self.path}: {e}")
+            return
+        if data.get("version") != CACHE_FILE_VERSION:
+            return
+
+        for playlist_id, entry in data.get("playlists", {}).items():
+            current = self._entry(playlist_id)
+            if not current or entry["fetched_at"] > current["fetched_at"]:
+                self._store(playlist_id, entry)
+
+    def _persist(self) -> None:
+        """Write the cache atomically, so readers never see a partial file"""
+        if not self.path:
+            return
+
+        with self._lock:
+            data = {
+                "version": CACHE_FILE_VERSION,
+                "playlists": dict(self._entries),
+            }
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._persist_lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(temp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write playlist cache {self.path}: {e}")
+
+
+# Create a global instance for easy access
+playlist_cache = PlaylistCache(
+    ttl_seconds=Config.PLAYLIST_CACHE_TTL_SECONDS,
+    stale_seconds=Config.PLAYLIST_CACHE_STALE_SECONDS,
+    max_videos=Config.PLAYLIST_CACHE_MAX_VIDEOS,
+    path=Config.PLAYLIST_CACHE_PATH or None,
+)
@@ -1,6 +1,8 @@
-from typing import Dict
+from typing import Dict, Optional
+from config import Config
 from app.db.collections import COLLECTIONS
 from app.db.operations import find_data
+from app.utils.cache import LRUCacheBackend
 from .playlist_config import EMOTIONAL_PROFILE_PLAYLISTS
 from .exceptions import (
     TrialUserRestrictedError,
@@ -10,6 +12,52 @@ from .exceptions import (
     ReportNotFoundError,
 )
 
+SEVERITY_CODES = {"low": 0, "medium": 1, "high": 2}
+UNKNOWN_PROFILE = "mixed_emotions"
+
+# (stress, anxiety, depression) -> emotional profile group key
+PROFILE_MAPPING = {
+    ("low", "low", "low"): "green",
+    ("low", "low", "medium"): "green",
+    ("low", "low", "high"): "yellow",
+    ("low", "medium", "low"): "green",
+    ("low", "medium", "medium"): "yellow",
+    ("low", "medium", "high"): "yellow",
+    ("low", "high", "low"): "yellow",
+    ("low", "high", "medium"): "yellow",
+    ("low", "high", "high"): "red",
+    ("medium", "low", "low"): "green",
+    ("medium", "low", "medium"): "green",
+    ("medium", "low", "high"): "yellow",
+    ("medium", "medium", "low"): "green",
+    ("medium", "medium", "medium"): "yellow",
+    ("medium", "medium", "high"): "red",
+    ("medium", "high", "low"): "yellow",
+    ("medium", "high", "medium"): "red",
+    ("medium", "high", "high"): "red",
+    ("high", "low", "low"): "green",
+    ("high", "low", "medium"): "yellow",
+    ("high", "low", "high"): "yellow",
+    ("high", "medium", "low"): "yellow",
+    ("high", "medium", "medium"): "yellow",
+    ("high", "medium", "high"): "red",
+    ("high", "high", "low"): "yellow",
+    ("high", "high", "medium"): "red",
+    ("high", "high", "high"): "red",
+}
+
+# PROFILE_MAPPING compiled into a flat table indexed by
+# stress * 9 + anxiety * 3 + depression (severity codes)
+PROFILE_TABLE = tuple(
+    PROFILE_MAPPING[(stress, anxiety, depression)]
+    for stress in SEVERITY_CODES
+    for anxiety in SEVERITY_CODES
+    for depression in SEVERITY_CODES
+)
+
+# Report id -> emotional profile of registered users' reports
+_profile_cache = LRUCacheBackend(Config.PROFILE_CACHE_MAX_ENTRIES)
+
 
 class ProfileGroupService:
     """Service for determining emotional profile groups based on mental health levels"""
@@ -22,41 +70,25 @@ class ProfileGroupService:
         Determine emotional profile group based on mental health levels
         Returns the emotional profile group key (snake_case)
         """
-        profile_mapping = {
-            ("low", "low", "low"): "green",
-            ("low", "low", "medium"): "green",
-            ("low", "low", "high"): "yellow",
-            ("low", "medium", "low"): "green",
-            ("low", "medium", "medium"): "yellow",
-            ("low", "medium", "high"): "yellow",
-            ("low", "high", "low"): "yellow",
-            ("low", "high", "medium"): "yellow",
-            ("low", "high", "high"): "red",
-            ("medium", "low", "low"): "green",
-            ("medium", "low", "medium"): "green",
-            ("medium", "low", "high"): "yellow",
-            ("medium", "medium", "low"): "green",
-            ("medium", "medium", "medium"): "yellow",
-            ("medium", "medium", "high"): "red",
-            ("medium", "high", "low"): "yellow",
-            ("medium", "high", "medium"): "red",
-            ("medium", "high", "high"): "red",
-            ("high", "low", "low"): "green",
-            ("high", "low", "medium"): "yellow",
-            ("high", "low", "high"): "yellow",
-            ("high", "medium", "low"): "yellow",
-            ("high", "medium", "medium"): "yellow",
-            ("high", "medium", "high"): "red",
-            ("high", "high", "low"): "yellow",
-            ("high", "high", "medium"): "red",
-            ("high", "high", "high"): "red",
-        }
+        stress = SEVERITY_CODES.get(stress_level.lower())
+        anxiety = SEVERITY_CODES.get(anxiety_level.lower())
+        depression = SEVERITY_CODES.get(depression_level.lower())
 
-        stress = stress_level.lower()
-        anxiety = anxiety_level.lower()
-        depression = depression_level.lower()
+        if stress is None or anxiety is None or depression is None:
+            return UNKNOWN_PROFILE
+        return PROFILE_TABLE[stress * 9 + anxiety * 3 + depression]
 
-        return profile_mapping.get((stress, anxiety, depression), "mixed_emotions")
+    @staticmethod
+    def profile_key_for_scores(mental_health_scores: Dict[str, str]) -> str:
+        """
+        Emotional profile group key for stored mental health scores
+        (missing levels count as "medium")
+        """
+        return ProfileGroupService.determine_emotional_profile_group(
+            mental_health_scores.get("stress", "medium"),
+            mental_health_scores.get("anxiety", "medium"),
+            mental_health_scores.get("depression", "medium"),
+        )
 
     @staticmethod
     def get_playlist_id(emotional_profile_key: str) -> str:
@@ -124,22 +156,28 @@ class ProfileGroupService:
             'display_name': str,
             'playlist_id': str
         }
+
+        Profiles of registered users are cached per report id. A report is
+        read once (the user report, else the trial report) and uses the
+        emotional_profile_key stored with its scores when present.
         """
         try:
-            # First check if this is a registered user (not a trial user)
-            if not ProfileGroupService._is_registered_user(report_id):
-                raise TrialUserRestrictedError(
-                    "Resources are only available for registered users. Trial users cannot access this feature."
-                )
-
-            # For registered users, try to get data from USERS collection first
-            user_data = find_data(COLLECTIONS["USERS"], {"user_Id": report_id}, limit=1)
+            cached = _profile_cache.get(report_id)
+            if cached is not None:
+                return dict(cached)
+
+            projection = {
+                "_id": 0,
+                "mental_health_scores": 1,
+                "emotional_profile_key": 1,
+            }
+            user_data = find_data(
+                COLLECTIONS["USERS"], {"user_Id": report_id}, 1, projection
+            )
 
             if user_data:
-                user_report = user_data[0]
-                mental_health_scores = user_report.get("mental_health_scores", {})
-
-                if not mental_health_scores:
+                report = user_data[0]
+                if not report.get("mental_health_scores"):
                     raise MentalHealthScoresNotFoundError(
                         "Mental health scores not found in user report"
                     )
@@ -147,40 +185,33 @@ class ProfileGroupService:
             else:
                 # Check if it's a linked trial (trial that was converted to registered user)
                 trial_data = find_data(
-                    COLLECTIONS["TRIAL_REPORTS"], {"trial_id": report_id}, limit=1
+                    COLLECTIONS["TRIAL_REPORTS"],
+                    {"trial_id": report_id},
+                    1,
+                    {**projection, "linked_user_id": 1, "status": 1},
                 )
 
-                if not trial_data:
-                    raise ReportNotFoundError(f"Report not found: {report_id}")
-
-                trial = trial_data[0]
-
-                # Verify this trial is linked to a registered user
+                # Unknown reports and trials not linked to a registered user
                 if (
-                    not trial.get("linked_user_id")
-                    or trial.get("status") != "completed"
+                    not trial_data
+                    or not trial_data[0].get("linked_user_id")
+                    or trial_data[0].get("status") != "completed"
                 ):
-                    raise UserNotRegisteredError(
-                        "Trial report is not properly linked to a registered user"
+                    raise TrialUserRestrictedError(
+                        "Resources are only available for registered users. Trial users cannot access this feature."
                     )
 
-                mental_health_scores = trial.get("mental_health_scores", {})
-
-                if not mental_health_scores:
+                report = trial_data[0]
+                if not report.get("mental_health_scores"):
                     raise MentalHealthScoresNotFoundError(
                         "Mental health scores not found in trial report"
                     )
 
-            # The levels should already be "low", "medium", or "high" from your existing system
-            stress_level = mental_health_scores.get("stress", "medium")
-            anxiety_level = mental_health_scores.get("anxiety", "medium")
-            depression_level = mental_health_scores.get("depression", "medium")
-
-            # Determine emotional profile group key
-            emotional_profile_key = (
-                ProfileGroupService.determine_emotional_profile_group(
-                    stress_level, anxiety_level, depression_level
-                )
+            # Reports scored before the key was stored get it computed
+            emotional_profile_key = report.get(
+                "emotional_profile_key"
+            ) or ProfileGroupService.profile_key_for_scores(
+                report["mental_health_scores"]
             )
 
             # Get display name
@@ -189,11 +220,13 @@ class ProfileGroupService:
             # Get playlist ID
             playlist_id = ProfileGroupService.get_playlist_id(emotional_profile_key)
 
-            return {
+            profile = {
                 "emotional_profile_key": emotional_profile_key,
                 "display_name": display_name,
                 "playlist_id": playlist_id,
             }
+            _profile_cache.set(report_id, profile, Config.PROFILE_CACHE_TTL_SECONDS)
+            return dict(profile)
 
         except (
             TrialUserRestrictedError,
@@ -212,3 +245,8 @@ class ProfileGroupService:
                 "display_name": "Yellow",
                 "playlist_id": EMOTIONAL_PROFILE_PLAYLISTS.get("yellow", ""),
             }
+
+    @staticmethod
+    def invalidate_report(report_id: str) -> None:
+        """Drop the cached profile of a report whose scores changed"""
+        _profile_cache.delete(report_id)
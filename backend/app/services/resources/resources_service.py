@@ -1,6 +1,7 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from app.services.resources.profile_group_service import ProfileGroupService
 from app.services.resources.youtube_service import YouTubeService
+from app.services.resources.playlist_cache import playlist_cache
 from .exceptions import (
     TrialUserRestrictedError,
     UserNotRegisteredError,
@@ -15,6 +16,7 @@ class ResourcesService:
 
     def __init__(self):
         self.youtube_service = YouTubeService()
+        self.playlist_cache = playlist_cache
 
     def get_personalized_recommendations(self, report_id: str, limit: int = 3) -> Dict:
         """
@@ -41,7 +43,7 @@ class ResourcesService:
                     "No playlist found for emotional profile group"
                 )
 
-            all_videos = self.youtube_service.get_playlist_videos(playlist_id)
+            all_videos = self._get_playlist_videos(playlist_id)
 
             recommended_videos = all_videos[:limit]
 
@@ -99,7 +101,7 @@ class ResourcesService:
         Get all videos from a specific playlist
         """
         try:
-            videos = self.youtube_service.get_playlist_videos(playlist_id, max_results)
+            videos = self._get_playlist_videos(playlist_id, max_results)
 
             return {
                 "playlist_id": playlist_id,
@@ -116,6 +118,19 @@ class ResourcesService:
                 "error": str(e),
             }
 
+    def _get_playlist_videos(
+        self, playlist_id: str, limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Videos of a playlist from the playlist cache
+        Returns an empty list if the playlist cannot be fetched
+        """
+        try:
+            return self.playlist_cache.get(playlist_id, limit)
+        except Exception as e:
+            print(f"Error fetching playlist videos: {e}")
+            return []
+
     def get_video_by_id(self, video_id: str) -> Optional[Dict]:
         """
         Get detailed information about a specific video
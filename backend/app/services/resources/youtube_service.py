@@ -1,18 +1,71 @@
-from typing import List, Dict, Optional
-from googleapiclient.discovery import build
+import json
+import threading
+from typing import Any, List, Dict, Optional
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 from config import Config
 
+# The Data API returns at most 50 items per playlistItems page / videos call
+API_PAGE_SIZE = 50
+
+_document_lock = threading.Lock()
+_document: Optional[Dict[str, Any]] = None
+_thread_clients = threading.local()
+
+
+def get_discovery_document() -> Dict[str, Any]:
+    """
+    The Data API discovery document bundled with googleapiclient, parsed
+    once per process.
+    """
+    global _document
+    with _document_lock:
+        if _document is None:
+            _document = json.loads(get_static_doc("youtube", "v3"))
+        return _document
+
+
+def get_youtube_client(api_key: str):
+    """
+    Data API client for the calling thread.
+
+    googleapiclient clients and their httplib2.Http are not thread-safe, so
+    request threads, playlist refreshes and prefetches each get their own,
+    built from the shared discovery document instead of parsing it again.
+    """
+    clients = getattr(_thread_clients, "clients", None)
+    if clients is None:
+        clients = _thread_clients.clients = {}
+    if api_key not in clients:
+        clients[api_key] = build_from_document(
+            get_discovery_document(), developerKey=api_key
+        )
+    return clients[api_key]
+
 
 class YouTubeService:
     """Service for interacting with YouTube Data API v3"""
 
-    def __init__(self):
+    def __init__(self, youtube: Optional[Any] = None):
+        """
+        Args:
+            youtube: Data API client to use instead of the per-thread one (tests)
+        """
+        self._youtube = youtube
+        if youtube is not None:
+            return
+
         self.api_key = Config.YOUTUBE_API_KEY
         if not self.api_key:
             raise ValueError("YouTube API key not configured")
 
-        self.youtube = build("youtube", "v3", developerKey=self.api_key)
+    @property
+    def youtube(self):
+        """Client to call the API with from the current thread"""
+        if self._youtube is not None:
+            return self._youtube
+        return get_youtube_client(self.api_key)
 
     def get_playlist_videos(
         self, playlist_id: str, max_results: int = 50
@@ -22,70 +75,95 @@ class YouTubeService:
         Returns list of video objects with metadata
         """
         try:
+            return self.fetch_playlist_videos(playlist_id, max_results)
+        except HttpError as e:
+            print(f"YouTube API error: {e}")
+            return []
+        except Exception as e:
+            print(f"Error fetching playlist videos: {e}")
+            return []
+
+    def fetch_playlist_videos(
+        self, playlist_id: str, max_results: int = 50
+    ) -> List[Dict]:
+        """
+        Fetch up to max_results videos of a playlist, following page tokens
+        past the API's 50 items per page.
+
+        Raises:
+            HttpError and other client errors, so callers can tell a failed
+            fetch from an empty playlist
+        """
+        video_ids = []
+        playlist_channel_title = "Unknown Channel"
+        page_token = None
+
+        while len(video_ids) < max_results:
             playlist_response = (
                 self.youtube.playlistItems()
                 .list(
                     part="snippet,contentDetails",
                     playlistId=playlist_id,
-                    maxResults=max_results,
+                    maxResults=min(API_PAGE_SIZE, max_results - len(video_ids)),
+                    pageToken=page_token,
                 )
                 .execute()
             )
+            items = playlist_response.get("items", [])
 
             # Get playlist channel title (the curator of the playlist)
-            playlist_channel_title = (
-                playlist_response.get("items", [{}])[0]
-                .get("snippet", {})
-                .get("channelTitle", "Unknown Channel")
-            )
-
-            video_ids = [
-                item["contentDetails"]["videoId"] for item in playlist_response["items"]
-            ]
+            if items and not video_ids:
+                playlist_channel_title = (
+                    items[0].get("snippet", {}).get("channelTitle", "Unknown Channel")
+                )
 
-            if not video_ids:
-                return []
+            video_ids.extend(item["contentDetails"]["videoId"] for item in items)
+            page_token = playlist_response.get("nextPageToken")
+            if not page_token or not items:
+                break
 
+        videos_by_id = {}
+        for offset in range(0, len(video_ids), API_PAGE_SIZE):
             videos_response = (
                 self.youtube.videos()
-                .list(part="snippet,contentDetails,statistics", id=",".join(video_ids))
+                .list(
+                    part="snippet,contentDetails,statistics",
+                    id=",".join(video_ids[offset : offset + API_PAGE_SIZE]),
+                )
                 .execute()
             )
-
-            videos = []
             for video in videos_response["items"]:
-                duration = YouTubeService._format_duration(
-                    video["contentDetails"]["duration"]
+                videos_by_id[video["id"]] = self._video_data(
+                    video, playlist_channel_title
                 )
 
-                video_data = {
-                    "id": video["id"],
-                    "title": video["snippet"]["title"],
-                    "description": (
-                        video["snippet"]["description"][:200] + "..."
-                        if len(video["snippet"]["description"]) > 200
-                        else video["snippet"]["description"]
-                    ),
-                    "thumbnail": video["snippet"]["thumbnails"]["high"]["url"],
-                    "duration": duration,
-                    "playlist_channel_title": playlist_channel_title,  # Single channel name for all videos
-                    "individual_video_creator": video["snippet"][
-                        "channelTitle"
-                    ],  # Individual video creator (for reference)
-                    "published_at": video["snippet"]["publishedAt"],
-                    "view_count": video["statistics"].get("viewCount", 0),
-                    "like_count": video["statistics"].get("likeCount", 0),
-                }
-                videos.append(video_data)
-
-            return videos
+        # Playlist order; deleted or private videos have no details
+        return [
+            videos_by_id[video_id] for video_id in video_ids if video_id in videos_by_id
+        ]
 
-        except HttpError as e:
-            print(f"YouTube API error: {e}")
-            return []
-        except Exception as e:
-            print(f"Error fetching playlist videos: {e}")
-            return []
+    @staticmethod
+    def _video_data(video: Dict, playlist_channel_title: str) -> Dict:
+        duration = YouTubeService._format_duration(video["contentDetails"]["duration"])
+
+        return {
+            "id": video["id"],
+            "title": video["snippet"]["title"],
+            "description": (
+                video["snippet"]["description"][:200] + "..."
+                if len(video["snippet"]["description"]) > 200
+                else video["snippet"]["description"]
+            ),
+            "thumbnail": video["snippet"]["thumbnails"]["high"]["url"],
+            "duration": duration,
+            "playlist_channel_title": playlist_channel_title,  # Single channel name for all videos
+            "individual_video_creator": video["snippet"][
+                "channelTitle"
+            ],  # Individual video creator (for reference)
+            "published_at": video["snippet"]["publishedAt"],
+            "view_count": video["statistics"].get("viewCount", 0),
+            "like_count": video["statistics"].get("likeCount", 0),
+        }
 
     def get_video_details(self, video_id: str) -> Optional[Dict]:
         """
@@ -1,9 +1,15 @@
 from .trial_service import trial_service, TrialService
 from .trial_media import getTrialReport, cleanupTrialFiles
+from .trial_reaper import trial_reaper, TrialReaper
+from .trial_statistics import trial_statistics, TrialStatistics
 
 __all__ = [
     "trial_service",
     "TrialService",
     "getTrialReport",
     "cleanupTrialFiles",
+    "trial_reaper",
+    "TrialReaper",
+    "trial_statistics",
+    "TrialStatistics",
 ]
@@ -1,8 +1,7 @@
-import os
 from typing import Dict, Any
 
-from app.utils.fileUtils import delete_directory
 from app.services.trial.trial_service import trial_service
+from app.services.trial.trial_reaper import delete_trial_media
 
 
 def getTrialReport(trial_id: str) -> Dict[str, Any]:
@@ -32,28 +31,7 @@ def cleanupTrialFiles(trial_id: str) -> bool:
         True if cleanup successful, False otherwise
     """
     try:
-        # Clean up media files
-        media_dir = os.path.join(os.getcwd(), "media", f"trial_{trial_id}")
-        if os.path.exists(media_dir):
-            delete_directory(media_dir)
-
-        # Clean up processing files
-        processing_dirs = [
-            os.path.join(
-                os.getcwd(), "processingScripts", "features", f"trial_{trial_id}"
-            ),
-            os.path.join(
-                os.getcwd(), "processingScripts", "model_outputs", f"trial_{trial_id}"
-            ),
-            os.path.join(
-                os.getcwd(), "processingScripts", "final_outputs", f"trial_{trial_id}"
-            ),
-        ]
-
-        for directory in processing_dirs:
-            if os.path.exists(directory):
-                delete_directory(directory)
-
+        delete_trial_media(trial_id)
         return True
 
     except Exception as e:
@@ -0,0 +1,232 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from app.db.collections import COLLECTIONS
+from app.db.operations import bulk_update, count_data, stream_batches
+from app.services.trial.trial_statistics import trial_statistics
+
+logger = logging.getLogger(__name__)
+
+
+def trial_media_dirs(trial_id: str) -> List[str]:
+    """Directories the processing pipeline writes for a trial"""
+    base = os.getcwd()
+    return [
+        os.path.join(base, "media", f"trial_{trial_id}"),
+        os.path.join(base, "processingScripts", "features", f"trial_{trial_id}"),
+        os.path.join(base, "processingScripts", "model_outputs", f"trial_{trial_id}"),
+        os.path.join(base, "processingScripts", "final_outputs", f"trial_{trial_id}"),
+    ]
+
+
+def delete_trial_media(trial_id: str) -> None:
+    """
+    Delete every directory of a trial. Missing directories are fine.
+
+    Raises:
+        OSError if a directory exists but could not be removed
+    """
+    for directory in trial_media_dirs(trial_id):
+        try:
+            shutil.rmtree(directory)
+        except FileNotFoundError:
+            pass
+
+
+def _expired_unpurged_query() -> Dict[str, Any]:
+    return {
+        "expires_at": {"$lt": datetime.now(timezone.utc)},
+        "media_purged": {"$ne": True},
+    }
+
+
+class TrialReaper:
+    """
+    Background job deleting the media of expired trials.
+
+    Each run streams expired trials whose media has not been purged yet
+    through one cursor, in batches. The directories of a batch are deleted
+    on a thread pool, then the whole batch is recorded with one bulk update:
+    media_purged is set, and trials still marked active become expired
+    (linked trials keep their "completed" status). A trial whose media could
+    not be deleted is left unmarked and retried on the next run.
+
+    MongoDB deletes the expired trials the TTL grace period after they
+    expire, but only once a run has purged their media (see
+    app/db/indexes.py); linked trials are kept.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        interval_seconds: float = 300,
+        delete_workers: int = 4,
+    ):
+        """
+        Args:
+            batch_size: Trials per cursor batch and bulk update
+            interval_seconds: Pause between scheduled runs
+            delete_workers: Threads deleting media directories
+        """
+        self.batch_size = max(1, batch_size)
+        self.interval_seconds = interval_seconds
+        self.delete_workers = max(1, delete_workers)
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._totals = {"runs": 0, "reaped": 0, "failed": 0, "seconds": 0.0}
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Reap every expired trial currently in the backlog.
+
+        Concurrent calls (e.g. the manual cleanup endpoint during a scheduled
+        run) wait for the running pass instead of reaping the same trials.
+
+        Returns:
+            Dictionary with reaped/failed counts, batches, seconds, throughput
+            (trials per second) and the backlog left afterwards
+        """
+        with self._run_lock:
+            started_at = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            reaped = failed = batches = 0
+
+            with ThreadPoolExecutor(
+                max_workers=self.delete_workers, thread_name_prefix="trial-reaper"
+            ) as executor:
+                for batch in stream_batches(
+                    COLLECTIONS["TRIAL_REPORTS"],
+                    _expired_unpurged_query(),
+                    batch_size=self.batch_size,
+                    projection={"_id": 0, "trial_id": 1, "status": 1},
+                ):
+                    batch_reaped, batch_failed = self._reap_batch(executor, batch)
+                    reaped += batch_reaped
+                    failed += batch_failed
+                    batches += 1
+
+            seconds = time.perf_counter() - start
+            result = {
+                "started_at": started_at.isoformat(),
+                "reaped": reaped,
+                "failed": failed,
+                "batches": batches,
+                "seconds": round(seconds, 3),
+                "trials_per_second": round(reaped / seconds, 1) if seconds else 0.0,
+                "backlog": count_data(
+                    COLLECTIONS["TRIAL_REPORTS"], _expired_unpurged_query()
+                ),
+            }
+
+            with self._stats_lock:
+                self._totals["runs"] += 1
+                self._totals["reaped"] += reaped
+                self._totals["failed"] += failed
+                self._totals["seconds"] += seconds
+                self._last_run = result
+
+            return result
+
+    def _reap_batch(self, executor: ThreadPoolExecutor, batch: List[dict]):
+        trial_ids = [trial["trial_id"] for trial in batch]
+        outcomes = list(executor.map(self._delete_safely, trial_ids))
+
+        now = datetime.now(timezone.utc)
+        updates = []
+        newly_expired = 0
+        for trial, deleted in zip(batch, outcomes):
+            if not deleted:
+                continue
+            fields = {"media_purged": True, "media_purged_at": now}
+            if trial.get("status") == "active":
+                fields["status"] = "expired"
+                newly_expired += 1
+            updates.append(
+                (
+                    {"trial_id": trial["trial_id"], "media_purged": {"$ne": True}},
+                    {"$set": fields},
+                )
+            )
+
+        result = bulk_update(COLLECTIONS["TRIAL_REPORTS"], updates, ordered=False)
+        trial_statistics.record("expired", newly_expired)
+        return result["modified_count"], len(batch) - len(updates)
+
+    def _delete_safely(self, trial_id: str) -> bool:
+        try:
+            delete_trial_media(trial_id)
+            return True
+        except OSError as e:
+            logger.warning(f"Could not delete media of trial {trial_id}: {e}")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals since startup and the result of the last run"""
+        with self._stats_lock:
+            totals = dict(self._totals)
+            last_run = dict(self._last_run) if self._last_run else None
+        totals["seconds"] = round(totals["seconds"], 3)
+        totals["trials_per_second"] = (
+            round(totals["reaped"] / totals["seconds"], 1) if totals["seconds"] else 0.0
+        )
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval_seconds": self.interval_seconds,
+            "totals": totals,
+            "last_run": last_run,
+        }
+
+    def start(self, app: Any = None) -> threading.Thread:
+        """
+        Run the reaper every interval_seconds in a daemon thread. Safe to call
+        more than once.
+
+        Args:
+            app: Flask app whose context the runs use (for the DB connection)
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop, args=(app,), name="trial-reaper", daemon=True
+            )
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self, app: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        result = self.run_once()
+                else:
+                    result = self.run_once()
+                if result["reaped"] or result["failed"]:
+                    logger.info(
+                        f"Trial reaper: {result['reaped']} reaped, "
+                        f"{result['failed']} failed, {result['backlog']} left "
+                        f"({result['trials_per_second']}/s)"
+                    )
+            except Exception as e:
+                logger.warning(f"Trial reaper run failed: {e}")
+            self._stop.wait(self.interval_seconds)
+
+
+# Create a global instance for easy access
+trial_reaper = TrialReaper(
+    batch_size=Config.TRIAL_REAPER_BATCH_SIZE,
+    interval_seconds=Config.TRIAL_REAPER_INTERVAL_SECONDS,
+    delete_workers=Config.TRIAL_REAPER_DELETE_WORKERS,
+)
@@ -1,11 +1,23 @@
 import uuid
-import os
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any
 
+from config import Config
 from app.db.collections import COLLECTIONS
-from app.db.operations import insert_data, find_data, update_data
-from app.services.report.reward_points_service import calculate_rewards
+from app.db.operations import (
+    insert_data,
+    find_data,
+    update_data,
+    find_one_and_update_data,
+)
+from app.services.report.reward_points_service import reward_saved_report
+from app.services.report.report_cache import report_cache
+from app.services.trial.trial_reaper import trial_reaper
+from app.services.trial.trial_statistics import trial_statistics
+from app.utils.cache import LRUCacheBackend
+
+# Stages at which video and audio have both been processed
+REPORT_READY_STAGES = ("audio_processed", "completed")
 
 
 class TrialService:
@@ -16,6 +28,9 @@ class TrialService:
         self.trial_expiry_days = 7
         # Maximum trial attempts per IP address per day
         self.max_trials_per_ip_per_day = 5
+        # Finished reports are polled by the frontend; keep them briefly
+        self._report_cache = LRUCacheBackend(Config.TRIAL_REPORT_CACHE_MAX_ENTRIES)
+        self.report_cache_ttl = Config.TRIAL_REPORT_CACHE_TTL_SECONDS
 
     def generate_trial_id(self) -> str:
         """Generate a unique trial session identifier"""
@@ -66,6 +81,7 @@ class TrialService:
 
         try:
             insert_data(COLLECTIONS["TRIAL_REPORTS"], trial_session)
+            trial_statistics.record("started")
             return {
                 "trial_id": trial_id,
                 "expires_at": expires_at,  # Return datetime object, not string
@@ -88,30 +104,95 @@ class TrialService:
             result = find_data(
                 COLLECTIONS["TRIAL_REPORTS"], {"trial_id": trial_id}, limit=1
             )
-            if result:
-                trial_data = result[0]
-                print(
-                    f"Debug: Retrieved trial data for {trial_id}: {trial_data.get('status')}"
-                )
-                print(
-                    f"Debug: expires_at type: {type(trial_data.get('expires_at'))}, value: {trial_data.get('expires_at')}"
-                )
+            if not result:
+                return None
 
-                # Check if trial has expired
-                if self._is_trial_expired(trial_data):
-                    print(f"Debug: Trial {trial_id} has expired, marking as expired")
-                    self._mark_trial_expired(trial_id)
-                    return None
+            trial_data = result[0]
+            if self._is_trial_expired(trial_data):
+                self._mark_trial_expired(trial_id)
+                return None
 
-                print(f"Debug: Trial {trial_id} is active and not expired")
-                return trial_data
-            else:
-                print(f"Debug: No trial found for {trial_id}")
-            return None
+            return trial_data
         except Exception as e:
-            print(f"Debug: Error in get_trial_session for {trial_id}: {str(e)}")
             raise Exception(f"Failed to retrieve trial session: {str(e)}")
 
+    def _active_trial_query(self, trial_id: str, **conditions) -> Dict[str, Any]:
+        """Filter matching the trial only while it is active and unexpired"""
+        return {
+            "trial_id": trial_id,
+            "status": "active",
+            "expires_at": {"$gt": datetime.now(timezone.utc)},
+            **conditions,
+        }
+
+    def is_trial_active(self, trial_id: str) -> bool:
+        """
+        Check that a trial can still take scan results, without loading it
+
+        Args:
+            trial_id: The trial session identifier
+
+        Returns:
+            True if the trial exists, is active and has not expired
+        """
+        try:
+            return bool(
+                find_data(
+                    COLLECTIONS["TRIAL_REPORTS"],
+                    self._active_trial_query(trial_id),
+                    limit=1,
+                    projection={"_id": 1},
+                )
+            )
+        except Exception as e:
+            raise Exception(f"Failed to check trial session: {str(e)}")
+
+    def _update_active_trial(
+        self,
+        trial_id: str,
+        fields: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+        return_updated: bool = True,
+        mismatch_error: str = "Trial session does not match the request",
+        **conditions,
+    ) -> Dict[str, Any]:
+        """
+        Validate and update an active trial in a single find_one_and_update
+
+        Args:
+            trial_id: The trial session identifier
+            fields: Fields to $set on the trial
+            projection: Fields of the trial document to return
+            return_updated: Return the document after the update instead of before
+            mismatch_error: Error raised when only the extra conditions fail
+            **conditions: Extra filter conditions the trial must satisfy
+
+        Returns:
+            The trial document
+
+        Raises:
+            Exception if the trial is missing, expired, not active or does not
+            satisfy the conditions
+        """
+        trial = find_one_and_update_data(
+            COLLECTIONS["TRIAL_REPORTS"],
+            self._active_trial_query(trial_id, **conditions),
+            {"$set": fields},
+            projection=projection,
+            return_updated=return_updated,
+        )
+        self._report_cache.delete(trial_id)
+        if trial is not None:
+            return trial
+
+        # Only failed updates pay for a second query, to explain the failure
+        trial_session = self.get_trial_session(trial_id)
+        if not trial_session:
+            raise Exception("Trial session not found or expired")
+        if trial_session["status"] != "active":
+            raise Exception("Trial session is not active")
+        raise Exception(mismatch_error)
+
     def update_trial_video_data(
         self, trial_id: str, video_data: Dict[str, Any]
     ) -> bool:
@@ -126,17 +207,9 @@ class TrialService:
             True if successful, False otherwise
         """
         try:
-            # Validate trial session exists and is active
-            trial_session = self.get_trial_session(trial_id)
-            if not trial_session:
-                raise Exception("Trial session not found or expired")
-
-            if trial_session["status"] != "active":
-                raise Exception("Trial session is not active")
-
-            # Update with video data
-            update_operations = {
-                "$set": {
+            self._update_active_trial(
+                trial_id,
+                {
                     "venue": video_data.get("venue"),
                     "language": video_data.get("language"),
                     "ageRange": video_data.get("ageRange"),
@@ -144,15 +217,10 @@ class TrialService:
                     "email": video_data.get("email"),
                     "vital_signs": video_data.get("vital_signs"),
                     "processing_stage": "video_processed",
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            }
-
-            result = update_data(
-                COLLECTIONS["TRIAL_REPORTS"], {"trial_id": trial_id}, update_operations
+                },
+                projection={"_id": 0, "trial_id": 1},
             )
-
-            return result is not None
+            return True
 
         except Exception as e:
             raise Exception(f"Failed to update trial video data: {str(e)}")
@@ -171,28 +239,16 @@ class TrialService:
             True if successful, False otherwise
         """
         try:
-            # Validate trial session exists and is active
-            trial_session = self.get_trial_session(trial_id)
-            if not trial_session:
-                raise Exception("Trial session not found or expired")
-
-            if trial_session["status"] != "active":
-                raise Exception("Trial session is not active")
-
-            # Update with audio data
-            update_operations = {
-                "$set": {
+            self._update_active_trial(
+                trial_id,
+                {
                     "mental_health_scores": audio_data.get("mental_health_scores"),
+                    "emotional_profile_key": audio_data.get("emotional_profile_key"),
                     "processing_stage": "audio_processed",
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            }
-
-            result = update_data(
-                COLLECTIONS["TRIAL_REPORTS"], {"trial_id": trial_id}, update_operations
+                },
+                projection={"_id": 0, "trial_id": 1},
             )
-
-            return result is not None
+            return True
 
         except Exception as e:
             raise Exception(f"Failed to update trial audio data: {str(e)}")
@@ -201,6 +257,9 @@ class TrialService:
         """
         Get the complete trial report
 
+        Finished reports are cached in-process for a short TTL (never past the
+        trial's expiry); any update to the trial drops the entry.
+
         Args:
             trial_id: The trial session identifier
 
@@ -208,12 +267,16 @@ class TrialService:
             Complete trial report or None if not found
         """
         try:
+            report = self._report_cache.get(trial_id)
+            if report is not None:
+                return report
+
             trial_data = self.get_trial_session(trial_id)
             if not trial_data:
                 return None
 
             # Check if both video and audio processing are complete
-            if trial_data["processing_stage"] != "completed":
+            if trial_data["processing_stage"] not in REPORT_READY_STAGES:
                 raise Exception(
                     "Trial processing not complete. Both video and audio must be processed."
                 )
@@ -231,6 +294,14 @@ class TrialService:
                 "status": "ready_for_registration",
             }
 
+            expires_at = self._normalize_datetime(trial_data.get("expires_at"))
+            ttl = min(
+                self.report_cache_ttl,
+                (expires_at - datetime.now(timezone.utc)).total_seconds(),
+            )
+            if ttl > 0:
+                self._report_cache.set(trial_id, report, ttl)
+
             return report
 
         except Exception as e:
@@ -251,47 +322,42 @@ class TrialService:
             Dictionary containing linking result and user data
         """
         try:
-            trial_data = self.get_trial_session(trial_id)
-            if not trial_data:
-                raise Exception("Trial session not found or expired")
-
-            if trial_data["status"] != "active":
-                raise Exception("Trial session is not active")
-
-            if trial_data.get("email") and trial_data["email"] != email:
-                raise Exception("Email address does not match trial session")
-
-            user_report = {
-                "user_id": user_id,
-                "report_id": trial_id,
-                "trial_id": trial_id,
-                "venue": trial_data["venue"],
-                "language": trial_data["language"],
-                "ageRange": trial_data["ageRange"],
-                "gender": trial_data["gender"],
-                "email": email,
-                "vital_signs": trial_data["vital_signs"],
-                "mental_health_scores": trial_data["mental_health_scores"],
-                "created_from_trial": True,
-                "created_at": datetime.now(timezone.utc),
-            }
-
-            user_report_result = insert_data(COLLECTIONS["USERS"], user_report)
-
-            update_data(
-                COLLECTIONS["TRIAL_REPORTS"],
-                {"trial_id": trial_id},
+            # Claim the trial in one round trip: only an active, unexpired
+            # trial whose email is unset or matches can be linked, and only once
+            trial_data = self._update_active_trial(
+                trial_id,
                 {
-                    "$set": {
-                        "status": "completed",
-                        "linked_user_id": user_id,
-                        "linked_at": datetime.now(timezone.utc),
-                        "processing_stage": "completed",
-                    }
+                    "status": "completed",
+                    "linked_user_id": user_id,
+                    "linked_at": datetime.now(timezone.utc),
+                    "processing_stage": "completed",
                 },
+                return_updated=False,
+                mismatch_error="Email address does not match trial session",
+                email={"$in": [None, "", email]},
             )
 
-            calculate_rewards(email, datetime.now(timezone.utc))
+            try:
+                user_report_result = self._create_user_report(
+                    trial_data, user_id, email
+                )
+            except Exception:
+                # Release the claim so the user can retry the link
+                update_data(
+                    COLLECTIONS["TRIAL_REPORTS"],
+                    {"trial_id": trial_id, "linked_user_id": user_id},
+                    {
+                        "$set": {
+                            "status": "active",
+                            "processing_stage": trial_data["processing_stage"],
+                            "linked_user_id": None,
+                            "linked_at": None,
+                        }
+                    },
+                )
+                raise
+            report_cache.invalidate_email(email)
+            trial_statistics.record("completed")
 
             return {
                 "success": True,
@@ -303,79 +369,80 @@ class TrialService:
         except Exception as e:
             raise Exception(f"Failed to link trial to user: {str(e)}")
 
+    def _create_user_report(
+        self, trial_data: Dict[str, Any], user_id: str, email: str
+    ) -> Dict[str, Any]:
+        """Copy a claimed trial into the user's reports, then apply the daily reward"""
+        trial_id = trial_data["trial_id"]
+
+        user_report = {
+            "user_id": user_id,
+            "report_id": trial_id,
+            "trial_id": trial_id,
+            "venue": trial_data["venue"],
+            "language": trial_data["language"],
+            "ageRange": trial_data["ageRange"],
+            "gender": trial_data["gender"],
+            "email": email,
+            "vital_signs": trial_data["vital_signs"],
+            "mental_health_scores": trial_data["mental_health_scores"],
+            "emotional_profile_key": trial_data.get("emotional_profile_key"),
+            "created_from_trial": True,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+        saved_report = insert_data(COLLECTIONS["USERS"], user_report)
+        # The reward is only granted once the report is stored
+        reward_saved_report(
+            email,
+            {"report_id": trial_id, "user_id": user_id},
+            user_report["created_at"],
+        )
+        return saved_report
+
     def cleanup_expired_trials(self) -> Dict[str, Any]:
         """
-        Clean up expired trial sessions and their associated files
+        Clean up expired trial sessions and their associated files now,
+        instead of waiting for the scheduled reaper run
 
         Returns:
             Dictionary containing cleanup results
         """
         try:
-            now = datetime.now(timezone.utc)
-            expired_trials = find_data(
-                COLLECTIONS["TRIAL_REPORTS"],
-                {"expires_at": {"$lt": now}},
-                limit=100,  # Process in batches
-            )
-
-            cleaned_count = 0
-            for trial in expired_trials:
-                trial_id = trial["trial_id"]
-
-                # Clean up associated files
-                self._cleanup_trial_files(trial_id)
-
-                # Mark as expired in database
-                update_data(
-                    COLLECTIONS["TRIAL_REPORTS"],
-                    {"trial_id": trial_id},
-                    {"$set": {"status": "expired"}},
-                )
-
-                cleaned_count += 1
+            result = trial_reaper.run_once()
+            cleaned_count = result["reaped"]
 
             return {
                 "success": True,
                 "message": f"Cleaned up {cleaned_count} expired trial sessions",
                 "cleaned_count": cleaned_count,
+                "failed_count": result["failed"],
+                "backlog": result["backlog"],
+                "seconds": result["seconds"],
             }
 
         except Exception as e:
             raise Exception(f"Failed to cleanup expired trials: {str(e)}")
 
-    def get_trial_statistics(self) -> Dict[str, Any]:
+    def get_trial_statistics(self, days: Optional[int] = None) -> Dict[str, Any]:
         """
         Get statistics about trial usage
 
+        Args:
+            days: Also include per-venue and per-day stats for the trials
+                created in the last `days` days
+
         Returns:
             Dictionary containing trial statistics
         """
         try:
-            total_trials = len(find_data(COLLECTIONS["TRIAL_REPORTS"], {}))
-
-            active_trials = len(
-                find_data(COLLECTIONS["TRIAL_REPORTS"], {"status": "active"})
-            )
-
-            completed_trials = len(
-                find_data(COLLECTIONS["TRIAL_REPORTS"], {"status": "completed"})
-            )
-
-            expired_trials = len(
-                find_data(COLLECTIONS["TRIAL_REPORTS"], {"status": "expired"})
-            )
-
-            conversion_rate = (
-                (completed_trials / total_trials * 100) if total_trials > 0 else 0
-            )
-
-            return {
-                "total_trials": total_trials,
-                "active_trials": active_trials,
-                "completed_trials": completed_trials,
-                "expired_trials": expired_trials,
-                "conversion_rate": round(conversion_rate, 2),
-            }
+            stats = trial_statistics.totals()
+            if days:
+                stats["window"] = trial_statistics.window(days)
+                stats["window"]["daily_transitions"] = (
+                    trial_statistics.daily_transitions(days)
+                )
+            return stats
 
         except Exception as e:
             raise Exception(f"Failed to get trial statistics: {str(e)}")
@@ -461,66 +528,12 @@ class TrialService:
             trial_id: The trial session identifier
         """
         try:
-            update_data(
+            result = update_data(
                 COLLECTIONS["TRIAL_REPORTS"],
-                {"trial_id": trial_id},
+                {"trial_id": trial_id, "status": "active"},
                 {"$set": {"status": "expired"}},
             )
-        except Exception:
-            pass
-
-    def _cleanup_trial_files(self, trial_id: str) -> None:
-        """
-        Clean up files associated with a trial session
-
-        Args:
-            trial_id: The trial session identifier
-        """
-        try:
-            media_dir = os.path.join(os.getcwd(), "media", f"trial_{trial_id}")
-            if os.path.exists(media_dir):
-                self._remove_directory(media_dir)
-
-            processing_dirs = [
-                os.path.join(
-                    os.getcwd(), "processingScripts", "features", f"trial_{trial_id}"
-                ),
-                os.path.join(
-                    os.getcwd(),
-                    "processingScripts",
-                    "model_outputs",
-                    f"trial_{trial_id}",
-                ),
-                os.path.join(
-                    os.getcwd(),
-                    "processingScripts",
-                    "final_outputs",
-                    f"trial_{trial_id}",
-                ),
-            ]
-
-            for directory in processing_dirs:
-                if os.path.exists(directory):
-                    self._remove_directory(directory)
-
-        except Exception:
-            pass
-
-    def _remove_directory(self, path: str) -> None:
-        """
-        Recursively remove a directory and its contents
-
-        Args:
-            path: Path to the directory to remove
-        """
-        try:
-            if os.path.exists(path):
-                for root, dirs, files in os.walk(path, topdown=False):
-                    for name in files:
-                        os.remove(os.path.join(root, name))
-                    for name in dirs:
-                        os.rmdir(os.path.join(root, name))
-                os.rmdir(path)
+            trial_statistics.record("expired", result["modified_count"])
         except Exception:
             pass
 
@@ -0,0 +1,255 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from app.db.collections import COLLECTIONS
+from app.db.operations import (
+    aggregate_data,
+    bulk_upsert,
+    estimated_count_data,
+    find_data,
+    update_data,
+)
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("active", "completed", "expired")
+TOTALS_ID = "totals"
+
+# Transition -> status counters it moves between (None = trial created)
+TRANSITIONS = {
+    "started": (None, "active"),
+    "completed": ("active", "completed"),
+    "expired": ("active", "expired"),
+}
+
+
+def _day(moment: Optional[datetime] = None) -> str:
+    return (moment or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def _conversion_rate(completed: int, total: int) -> float:
+    return round(completed / total * 100, 2) if total > 0 else 0
+
+
+class TrialStatistics:
+    """
+    Trial usage statistics.
+
+    Totals per status come from a counters document in TRIAL_STATS that
+    trial state transitions increment, so reading them is one lookup no
+    matter how many trials exist. Without counters (or before they are
+    seeded) a single $group aggregation over TRIAL_REPORTS is used instead.
+    Per-day counters record how many trials were started, completed and
+    expired each day (UTC).
+
+    The counters are lifetime totals: trials the TTL index deletes after
+    they expire (app/db/indexes.py) stay counted as expired, and
+    deleted_trials reports how many of the counted trials are gone.
+
+    Time-windowed stats per venue and per day come from one aggregation
+    over the trials created in the window, served by the created_at index.
+    """
+
+    def __init__(self, counters_enabled: bool = True):
+        self.counters_enabled = counters_enabled
+
+    def record(self, transition: str, count: int = 1) -> None:
+        """
+        Count trial state transitions in the counters documents.
+
+        Never raises: the counters are an optimisation and can be rebuilt
+        from the trials with rebuild_counters().
+
+        Args:
+            transition: "started", "completed" or "expired"
+            count: Number of trials that made the transition
+        """
+        if not self.counters_enabled or count <= 0:
+            return
+
+        source, target = TRANSITIONS[transition]
+        totals = {f"{target}_trials": count}
+        if source is None:
+            totals["total_trials"] = count
+        else:
+            totals[f"{source}_trials"] = -count
+
+        try:
+            bulk_upsert(
+                COLLECTIONS["TRIAL_STATS"],
+                [
+                    ({"_id": TOTALS_ID}, {"$inc": totals}),
+                    ({"_id": f"day:{_day()}"}, {"$inc": {transition: count}}),
+                ],
+                ordered=False,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record trial transition {transition}: {e}")
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dictionary with total/active/completed/expired trial counts, how
+            many of them were deleted, the conversion rate and the source of
+            the numbers
+        """
+        if self.counters_enabled:
+            counters = find_data(
+                COLLECTIONS["TRIAL_STATS"], {"_id": TOTALS_ID}, limit=1
+            )
+            # Transitions recorded before the first rebuild create the
+            # document without the trials that already existed
+            if not counters or not counters[0].get("seeded"):
+                counters = [self.rebuild_counters()]
+            totals = {
+                key: counters[0].get(key, 0)
+                for key in ("total_trials", *(f"{s}_trials" for s in STATUSES))
+            }
+            # The TTL index deletes trials inside MongoDB, so deletions are
+            # derived from the collection size (metadata, not a scan)
+            stored = estimated_count_data(COLLECTIONS["TRIAL_REPORTS"])
+            totals["deleted_trials"] = max(0, totals["total_trials"] - stored)
+            source = "counters"
+        else:
+            # Only the trials still stored
+            totals = self._aggregate_totals()
+            totals["deleted_trials"] = 0
+            source = "aggregation"
+
+        return {
+            **totals,
+            "conversion_rate": _conversion_rate(
+                totals["completed_trials"], totals["total_trials"]
+            ),
+            "source": source,
+        }
+
+    def rebuild_counters(self) -> Dict[str, Any]:
+        """
+        Reset the totals counters from the trials themselves. Trials deleted
+        since the counters were seeded are kept in the totals as expired.
+        """
+        totals = self._aggregate_totals()
+        previous = find_data(COLLECTIONS["TRIAL_STATS"], {"_id": TOTALS_ID}, limit=1)
+        if previous and previous[0].get("seeded"):
+            deleted = max(
+                0, previous[0].get("total_trials", 0) - totals["total_trials"]
+            )
+            totals["total_trials"] += deleted
+            totals["expired_trials"] += deleted
+        update_data(
+            COLLECTIONS["TRIAL_STATS"],
+            {"_id": TOTALS_ID},
+            {"$set": {**totals, "seeded": True}},
+            upsert=True,
+        )
+        return totals
+
+    def _aggregate_totals(self) -> Dict[str, int]:
+        groups = aggregate_data(
+            COLLECTIONS["TRIAL_REPORTS"],
+            [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        )
+        counts = {group["_id"]: group["count"] for group in groups}
+        totals = {f"{status}_trials": counts.get(status, 0) for status in STATUSES}
+        totals["total_trials"] = sum(counts.values())
+        return totals
+
+    def window(self, days: int) -> Dict[str, Any]:
+        """
+        Stats for the trials created in the last `days` days, per venue and
+        per day
+
+        Args:
+            days: Size of the window, ending now
+
+        Returns:
+            Dictionary with the window bounds and lists by_venue and by_day,
+            each entry holding total/active/completed/expired counts and the
+            conversion rate
+        """
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(days=days)
+
+        counts = {
+            "total": {"$sum": 1},
+            **{
+                status: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+                for status in STATUSES
+            },
+        }
+        result = aggregate_data(
+            COLLECTIONS["TRIAL_REPORTS"],
+            [
+                {"$match": {"created_at": {"$gte": start, "$lt": end}}},
+                {
+                    "$facet": {
+                        "by_venue": [
+                            {"$group": {"_id": "$venue", **counts}},
+                            {"$sort": {"total": -1}},
+                        ],
+                        "by_day": [
+                            {
+                                "$group": {
+                                    "_id": {
+                                        "$dateToString": {
+                                            "format": "%Y-%m-%d",
+                                            "date": "$created_at",
+                                        }
+                                    },
+                                    **counts,
+                                }
+                            },
+                            {"$sort": {"_id": 1}},
+                        ],
+                    }
+                },
+            ],
+        )
+        facets = result[0] if result else {"by_venue": [], "by_day": []}
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "by_venue": self._rows(facets["by_venue"], "venue"),
+            "by_day": self._rows(facets["by_day"], "day"),
+        }
+
+    def daily_transitions(self, days: int) -> List[Dict[str, Any]]:
+        """Started/completed/expired counts per day from the counters"""
+        if not self.counters_enabled:
+            return []
+        first_day = _day(datetime.now(timezone.utc) - timedelta(days=days))
+        documents = find_data(
+            COLLECTIONS["TRIAL_STATS"],
+            {"_id": {"$gte": f"day:{first_day}", "$lt": "day;"}},
+            limit=days + 1,
+        )
+        return sorted(
+            (
+                {
+                    "day": document["_id"][len("day:") :],
+                    **{t: document.get(t, 0) for t in TRANSITIONS},
+                }
+                for document in documents
+            ),
+            key=lambda row: row["day"],
+        )
+
+    @staticmethod
+    def _rows(groups: List[dict], label: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                label: group["_id"],
+                "total_trials": group["total"],
+                **{f"{status}_trials": group[status] for status in STATUSES},
+                "conversion_rate": _conversion_rate(group["completed"], group["total"]),
+            }
+            for group in groups
+        ]
+
+
+# Create a global instance for easy access
+trial_statistics = TrialStatistics(counters_enabled=Config.TRIAL_STATS_COUNTERS)
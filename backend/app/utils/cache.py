@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class CacheBackend:
+    """
+    Minimal key/value interface used by the in-process caches.
+
+    Any store that can get, set with an optional TTL and delete can back a
+    cache (e.g. a shared Redis instance). Values are returned as stored, so
+    callers must treat them as read-only.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    Thread-safe in-process LRU store with per-entry TTL.
+
+    Entries stored with ttl=None never expire and are only dropped when the
+    store exceeds max_entries and they are the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,544 @@
+import glob
+import hmac
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.utils.structured_logging import set_stage
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; HTTP covers fast reads up to video scans
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+# Bytes, 64MB to 8GB
+MEMORY_BUCKETS = tuple(2**i * 1024 * 1024 for i in range(6, 14))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, object] = {}
+
+    def labels(self, *values, **labelled) -> "_Child":
+        """Series with these label values"""
+        if labelled:
+            values = tuple(labelled[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return _Child(self, tuple(str(value) for value in values))
+
+    def snapshot(self) -> Dict[LabelValues, object]:
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class _Child:
+    """A metric bound to one set of label values"""
+
+    __slots__ = ("metric", "key")
+
+    def __init__(self, metric: _Metric, key: LabelValues):
+        self.metric, self.key = metric, key
+
+    def inc(self, amount: float = 1) -> None:
+        self.metric._inc(self.key, amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self.metric._inc(self.key, -amount)
+
+    def set(self, value: float) -> None:
+        self.metric._set(self.key, value)
+
+    def observe(self, value: float) -> None:
+        self.metric._observe(self.key, value)
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @contextmanager
+    def track_inprogress(self) -> Iterator[None]:
+        """Gauge +1 for the duration of the block"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _inc(self, key: LabelValues, amount: float) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def inc(self, amount: float = 1) -> None:
+        self._inc((), amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _inc(self, key: LabelValues, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _set(self, key: LabelValues, value: float) -> None:
+        with self._lock:
+            self._values[key] = value
+
+    def set(self, value: float) -> None:
+        self._set((), value)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram; each series holds its bucket counts, sum and count"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _observe(self, key: LabelValues, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # counts per bucket (+Inf last), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def observe(self, value: float) -> None:
+        self._observe((), value)
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1]]
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms, rendered in the Prometheus
+    text exposition format.
+
+    Under the prefork server every worker has its own registry. With a
+    directory configured, workers write a snapshot of their metrics there
+    every few seconds (and the worker serving a scrape writes its own
+    first), and render() merges all of them: counters and histograms are
+    summed over every worker that ever ran, so they stay monotonic across
+    worker restarts; gauges are summed over live workers only.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or None
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = HTTP_BUCKETS,
+    ) -> Histogram:
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, labelnames, **kwargs
+                )
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+
+    def clear(self) -> None:
+        """Reset every series"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    # --- Multi-process snapshots ---------------------------------------------
+
+    def enable_multiprocess(self, directory: str) -> None:
+        """
+        Share metrics between worker processes through snapshot files in
+        directory. Call in the parent before forking: snapshots of a previous
+        run are deleted.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def write_snapshot(self) -> None:
+        """Write this process's metrics for the other workers to merge"""
+        if not self.directory:
+            return
+        data = {
+            "pid": os.getpid(),
+            "metrics": {
+                name: [[list(key), value] for key, value in metric.snapshot().items()]
+                for name, metric in list(self._metrics.items())
+            },
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    def start_worker(self, interval: float = 5.0) -> None:
+        """
+        Call in each forked worker: drops what the parent recorded before the
+        fork (every worker would report it again) and writes snapshots every
+        interval seconds from a daemon thread
+        """
+        self.clear()
+        if not self.directory or (self._writer and self._writer.is_alive()):
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except Exception as e:
+                    logger.warning(f"Failed to write metrics snapshot: {e}")
+
+        self._writer = threading.Thread(
+            target=run, name="metrics-snapshot", daemon=True
+        )
+        self._writer.start()
+
+    def _other_snapshots(self) -> List[dict]:
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("pid") != os.getpid():
+                snapshots.append(snapshot)
+        return snapshots
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+    def _merged(
+        self, metric: _Metric, snapshots: List[dict]
+    ) -> Dict[LabelValues, object]:
+        merged = metric.snapshot()
+        for snapshot in snapshots:
+            if metric.kind == "gauge" and not self._is_alive(snapshot["pid"]):
+                continue
+            for key, value in snapshot["metrics"].get(metric.name, []):
+                key = tuple(key)
+                current = merged.get(key)
+                if metric.kind == "histogram":
+                    if current is None or len(current[0]) != len(value[0]):
+                        merged[key] = [list(value[0]), value[1]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                else:
+                    merged[key] = (current or 0) + value
+        return merged
+
+    # --- Flask ---------------------------------------------------------------
+
+    def init_app(self, app, route: str = "/api/metrics") -> None:
+        """
+        Record per-route request count, status and latency, and serve the
+        metrics at route. The route template (e.g. /api/trial/report/<trial_id>)
+        is used as the label, so ids do not create new series.
+
+        With METRICS_TOKEN set in the app config, the endpoint requires
+        "Authorization: Bearer <token>".
+        """
+        from flask import Response, g, jsonify, request
+
+        def start_timer():
+            g.metrics_start = time.perf_counter()
+            http_requests_in_flight.labels().inc()
+
+        def record(response):
+            start = g.get("metrics_start")
+            if start is not None:
+                rule = request.url_rule.rule if request.url_rule else "unmatched"
+                http_request_duration.labels(request.method, rule).observe(
+                    time.perf_counter() - start
+                )
+                http_requests.labels(request.method, rule, response.status_code).inc()
+            return response
+
+        def end_in_flight(exc=None):
+            # teardown runs even when an after_request hook raised
+            if g.pop("metrics_start", None) is not None:
+                http_requests_in_flight.labels().dec()
+
+        def expose():
+            token = app.config.get("METRICS_TOKEN")
+            if token and not hmac.compare_digest(
+                request.headers.get("Authorization", ""), f"Bearer {token}"
+            ):
+                return jsonify({"status": "error", "message": "Unauthorized"}), 401
+            return Response(self.render(), content_type=CONTENT_TYPE)
+
+        # First, so the time spent in other before_request hooks is included
+        app.before_request_funcs.setdefault(None, []).insert(0, start_timer)
+        app.after_request(record)
+        app.teardown_request(end_in_flight)
+        app.add_url_rule(route, "metrics", expose, methods=["GET"])
+
+    # --- Exposition -----------------------------------------------------------
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        snapshots = []
+        if self.directory:
+            try:
+                self.write_snapshot()
+            except OSError as e:
+                logger.warning(f"Failed to write metrics snapshot: {e}")
+            snapshots = self._other_snapshots()
+
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(self._merged(metric, snapshots).items()):
+                if metric.kind == "histogram":
+                    lines.extend(self._histogram_lines(metric, key, value))
+                else:
+                    labels = _labels(metric.labelnames, key)
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(metric: Histogram, key: LabelValues, value) -> List[str]:
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(metric.buckets + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            labels = _labels(metric.labelnames, key, le)
+            lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+        labels = _labels(metric.labelnames, key)
+        lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{metric.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Create a global instance for easy access
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "wellstation_http_requests_total",
+    "HTTP requests by route template, method and status",
+    ("method", "route", "status"),
+)
+http_request_duration = metrics.histogram(
+    "wellstation_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route"),
+    HTTP_BUCKETS,
+)
+http_requests_in_flight = metrics.gauge(
+    "wellstation_http_requests_in_flight", "HTTP requests being handled"
+)
+db_operation_duration = metrics.histogram(
+    "wellstation_db_operation_duration_seconds",
+    "MongoDB operation latency (app.db.operations) by operation and collection",
+    ("operation", "collection"),
+    DB_BUCKETS,
+)
+db_operation_errors = metrics.counter(
+    "wellstation_db_operation_errors_total",
+    "MongoDB operations that raised, by operation and collection",
+    ("operation", "collection"),
+)
+scan_stage_duration = metrics.histogram(
+    "wellstation_scan_stage_duration_seconds",
+    "Time spent in each processing stage of a scan",
+    ("scan_type", "stage"),
+    STAGE_BUCKETS,
+)
+scan_duration = metrics.histogram(
+    "wellstation_scan_duration_seconds",
+    "Total processing time of a scan by outcome",
+    ("scan_type", "outcome"),
+    STAGE_BUCKETS,
+)
+scans_in_progress = metrics.gauge(
+    "wellstation_scans_in_progress",
+    "Scans being processed (queue depth of the processing pipeline)",
+    ("scan_type",),
+)
+scan_peak_rss = metrics.histogram(
+    "wellstation_scan_peak_rss_bytes",
+    "Highest resident memory of the process while a scan ran",
+    ("scan_type",),
+    MEMORY_BUCKETS,
+)
+scan_stage_peak_rss = metrics.histogram(
+    "wellstation_scan_stage_peak_rss_bytes",
+    "Highest resident memory of the process in each stage of a scan",
+    ("scan_type", "stage"),
+    MEMORY_BUCKETS,
+)
+scan_memory_budget_actions = metrics.counter(
+    "wellstation_scan_memory_budget_actions_total",
+    "Inputs downsampled or rejected to stay within the scan memory budget",
+    ("scan_type", "action"),
+)
+
+
+class ScanTimer:
+    """
+    Times the stages of one scan: stage(name) ends the previous stage,
+    records its duration and marks the new one in the log context.
+
+    Functions in stage_listeners are called with the name of each stage as
+    it ends (on the scan's thread), before the next one starts.
+    """
+
+    def __init__(self, scan_type: str):
+        self.scan_type = scan_type
+        self.started = time.perf_counter()
+        self.stage_listeners: List[Callable[[str], None]] = []
+        self._stage: Optional[str] = None
+        self._stage_started = self.started
+
+    @property
+    def current_stage(self) -> Optional[str]:
+        return self._stage
+
+    def stage(self, name: str) -> None:
+        self._end_stage()
+        self._stage, self._stage_started = name, time.perf_counter()
+        set_stage(name)
+
+    def _end_stage(self) -> None:
+        if self._stage is not None:
+            scan_stage_duration.labels(self.scan_type, self._stage).observe(
+                time.perf_counter() - self._stage_started
+            )
+            for listener in self.stage_listeners:
+                listener(self._stage)
+            self._stage = None
+
+    def finish(self, outcome: str) -> None:
+        self._end_stage()
+        scan_duration.labels(self.scan_type, outcome).observe(
+            time.perf_counter() - self.started
+        )
+
+
+@contextmanager
+def track_scan(scan_type: str) -> Iterator[ScanTimer]:
+    """
+    Count the scan as in progress for the duration of the block and record
+    its stage and total durations, with outcome "success" or "error"
+
+    Yields:
+        The ScanTimer to mark stages with
+    """
+    timer = ScanTimer(scan_type)
+    gauge = scans_in_progress.labels(scan_type)
+    gauge.inc()
+    try:
+        yield timer
+    except BaseException:
+        timer.finish("error")
+        raise
+    else:
+        timer.finish("success")
+    finally:
+        gauge.dec()
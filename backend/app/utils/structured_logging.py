@@ -0,0 +1,267 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Fields of the current request / scan (request_id, scan_id, stage), added
+# to every record logged in it
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+TEXT_FORMAT = (
+    "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
+)
+CONSOLE_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener: Optional["ContextQueueListener"] = None
+
+
+def get_context() -> Dict[str, Any]:
+    """Log context fields set in the current request / scan"""
+    return _context.get()
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Add fields (request_id, scan_id, stage, ...) to every record logged
+    inside the block on this thread; nested blocks add to the outer fields
+
+    Yields:
+        The merged context
+    """
+    merged = {**_context.get(), **fields}
+    token = _context.set(merged)
+    try:
+        yield merged
+    finally:
+        _context.reset(token)
+
+
+def set_stage(stage: str) -> None:
+    """
+    Set the stage field of the log context; it reverts when the enclosing
+    log_context block exits
+    """
+    _context.set({**_context.get(), "stage": stage})
+
+
+def bind(**fields: Any) -> Token:
+    """
+    Add fields to the log context until unbind(token); for hooks that cannot
+    wrap the work in log_context, like Flask's before/teardown_request
+    """
+    return _context.set({**_context.get(), **fields})
+
+
+def unbind(token: Token) -> None:
+    _context.reset(token)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def init_app(app) -> None:
+    """
+    Tag everything logged while handling a request with its request_id:
+    the caller's X-Request-ID header if sent, else a new one, echoed back
+    in the response
+    """
+    from flask import g, request
+
+    def bind_request_id():
+        request_id = request.headers.get(REQUEST_ID_HEADER) or new_request_id()
+        g.log_context_token = bind(request_id=request_id[:64])
+
+    def add_request_id_header(response):
+        request_id = get_context().get("request_id")
+        if request_id:
+            response.headers.setdefault(REQUEST_ID_HEADER, request_id)
+        return response
+
+    def unbind_request_id(exc=None):
+        token = g.pop("log_context_token", None)
+        if token is not None:
+            unbind(token)
+
+    # Runs before the other before_request hooks, so they log with the id
+    app.before_request_funcs.setdefault(None, []).insert(0, bind_request_id)
+    app.after_request(add_request_id_header)
+    app.teardown_request(unbind_request_id)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Puts records on the logging queue instead of writing them.
+
+    The caller's thread only renders the message and copies the log context
+    onto the record; formatting and file I/O happen on the listener thread.
+    """
+
+    def close(self) -> None:
+        # logging.shutdown() closes handlers: write out what is still queued
+        stop_logging()
+        super().close()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # This is the only handler on the root logger, so the record is
+        # updated in place instead of copied
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None  # tracebacks cannot be queued across processes
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, location, message, the
+    log context and any extra= fields, and the traceback if there is one.
+
+    time and level come first so view_logs.py can read them without parsing
+    the whole line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "location": f"{record.filename}:{record.lineno}",
+            "message": record.getMessage(),
+            "process": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextQueueListener(QueueListener):
+    """QueueListener that can be restarted in a forked child process"""
+
+    def restart(self) -> None:
+        """
+        Start over with a fresh queue and thread; the parent's listener
+        thread does not exist in a forked child
+        """
+        self.queue = queue.SimpleQueue()
+        self._thread = None
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, ContextQueueHandler):
+                handler.queue = self.queue
+        self.start()
+
+
+def setup_logging(
+    logs_dir: str = "logs",
+    level: str = "INFO",
+    file_format: str = "json",
+) -> ContextQueueListener:
+    """
+    Route all logging through a queue to the console and the rotating log
+    files, written by one background thread.
+
+    Logging calls on request and scan threads only enqueue the record, so
+    they never wait on disk or terminal I/O. The queue is unbounded: under a
+    burst it grows rather than blocking the caller.
+
+    Args:
+        logs_dir: Directory of wellstation.log and wellstation_errors.log
+        level: Root logger level
+        file_format: "json" for one JSON object per line, "text" for the
+            previous "time - logger - level - location - message" lines
+
+    Returns:
+        The started listener (stopped automatically at exit)
+    """
+    global _listener
+
+    logs_path = Path(logs_dir)
+    logs_path.mkdir(exist_ok=True)
+
+    file_formatter = (
+        JsonFormatter() if file_format == "json" else logging.Formatter(TEXT_FORMAT)
+    )
+
+    # Console handler (INFO level and above)
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    # File handler for all logs
+    all_logs_handler = RotatingFileHandler(
+        logs_path / "wellstation.log", maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
+    )
+    all_logs_handler.setLevel(logging.DEBUG)
+    all_logs_handler.setFormatter(file_formatter)
+
+    # File handler for errors only (ERROR level and above)
+    error_logs_handler = RotatingFileHandler(
+        logs_path / "wellstation_errors.log",
+        maxBytes=10 * 1024 * 1024,  # 10MB
+        backupCount=5,
+    )
+    error_logs_handler.setLevel(logging.ERROR)
+    error_logs_handler.setFormatter(file_formatter)
+
+    handlers: List[logging.Handler] = [
+        console_handler,
+        all_logs_handler,
+        error_logs_handler,
+    ]
+
+    if _listener is not None:
+        stop_logging()
+        for handler in _listener.handlers:
+            handler.close()
+
+    # Configure root logger
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+    # Clear any existing handlers
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(ContextQueueHandler(log_queue))
+    _listener = ContextQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Write out everything still queued and stop the listener thread"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+def _restart_in_child() -> None:
+    if _listener is not None and _listener._thread is not None:
+        _listener.restart()
+
+
+atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -1,33 +1,136 @@
+import hashlib
+import threading
+import time
 from functools import wraps
+from typing import Any, Dict, Optional
 
 from flask import current_app, jsonify, request, g
 import jwt
 
+from config import Config
+from app.utils.cache import LRUCacheBackend
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified JWT payloads.
+
+    Dashboard pages fire several report requests with the same token, so the
+    payload verified for the first one is reused by the rest. Entries are
+    keyed by a SHA-256 of the signing key, algorithm and token (raw tokens
+    are never kept) and expire at the token's own exp claim, after which the
+    token goes through full verification again and is rejected.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Args:
+            max_entries: Maximum cached tokens; 0 disables the cache
+        """
+        self.enabled = max_entries > 0
+        self.backend = LRUCacheBackend(max(1, max_entries))
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def verify(self, token: str, secret: str, algorithm: str) -> Dict[str, Any]:
+        """
+        Return the verified payload of a token, from the cache when possible
+
+        Raises:
+            jwt.InvalidTokenError (or a subclass) if the token does not verify
+        """
+        if not self.enabled:
+            return jwt.decode(token, secret, algorithms=[algorithm])
+
+        key = hashlib.sha256(f"{secret}\0{algorithm}\0{token}".encode()).hexdigest()
+        payload = self.backend.get(key)
+        # The entry's TTL already ends at exp; checking it again means the
+        # cache can never extend a token's lifetime, whatever the backend
+        if payload is not None and not _is_expired(payload):
+            self._record(hit=True)
+            return payload
+
+        self._record(hit=False)
+        payload = jwt.decode(token, secret, algorithms=[algorithm])
+
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        if ttl is None or ttl > 0:
+            self.backend.set(key, payload, ttl)
+        return payload
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self.backend),
+                "max_entries": self.backend.max_entries,
+                "evictions": self.backend.evictions,
+            }
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+
+def _is_expired(payload: Dict[str, Any]) -> bool:
+    exp = payload.get("exp")
+    return isinstance(exp, (int, float)) and exp <= time.time()
+
+
+# Create a global instance for easy access
+token_cache = TokenCache(Config.JWT_CACHE_MAX_ENTRIES)
+
+
+def get_bearer_token(header: str) -> Optional[str]:
+    """
+    Token from an "Authorization: Bearer <token>" header (scheme matched
+    case-insensitively, extra whitespace ignored), None if malformed
+    """
+    parts = header.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    return parts[1]
+
 
 def login_required(allowed_roles=None):
 
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            token = None
-            if "Authorization" in request.headers:
-                token = request.headers["Authorization"].split(" ")[1]
+            header = request.headers.get("Authorization")
+            if not header:
+                return jsonify({"error": "Missing token"}), 401
 
+            token = get_bearer_token(header)
             if not token:
-                return jsonify({"error": "Missing token"}), 401
+                return jsonify({"error": "Invalid authorization header"}), 401
 
             try:
-                payload = jwt.decode(
+                payload = token_cache.verify(
                     token,
                     current_app.config["JWT_SECRET_KEY"],
-                    algorithms=[current_app.config["JWT_ALGORITHM"]],
+                    current_app.config["JWT_ALGORITHM"],
                 )
                 user_role = payload.get("role")
 
                 if allowed_roles and user_role not in allowed_roles:
                     return jsonify({"error": "Access denied"}), 403
 
-                g.user = payload
+                # Copy so a handler cannot change the cached payload
+                g.user = dict(payload)
             except jwt.ExpiredSignatureError:
                 return jsonify({"error": "Token expired"}), 401
             except jwt.InvalidTokenError:
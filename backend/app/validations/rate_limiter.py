@@ -0,0 +1,238 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, jsonify, request
+import jwt
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from config import Config
+from app.validations.login_required import get_bearer_token, token_cache
+
+# Tokens taken from the caller's buckets per request. Scans run the models
+# and hold an inference worker for seconds, report fetches are a query or
+# a cache hit. Routes not listed cost DEFAULT_COST.
+ROUTE_COSTS: Dict[str, int] = {
+    "/api/video": 20,
+    "/api/audio": 10,
+    "/api/trial/video": 20,
+    "/api/trial/audio": 10,
+    "/api/trial/start": 5,
+    "/api/login": 3,
+    "/api/register": 3,
+    "/api/auth/reset-pin": 5,
+    "/api/send/email": 5,
+}
+DEFAULT_COST = 1
+
+# Never limited: liveness/readiness probes from the shell, metrics scrapes
+# and the shutdown hook
+EXEMPT_ROUTES = {
+    "/api/health",
+    "/health",
+    "/api/ready",
+    "/api/metrics",
+    "/api/shutdown",
+}
+
+
+class RateLimitBackend:
+    """
+    Shared state for token buckets.
+
+    The local backend keeps buckets in process memory. A backend shared by
+    every worker (e.g. a Redis script doing the same arithmetic atomically)
+    can be passed to RateLimiter to enforce limits across processes.
+    """
+
+    def consume(
+        self, key: str, cost: float, capacity: float, refill_per_second: float
+    ) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from the bucket `key` (a negative cost refunds)
+
+        Returns:
+            (allowed, retry_after): retry_after is the number of seconds until
+            the bucket holds enough tokens, 0 when allowed
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """
+    Thread-safe in-process token buckets.
+
+    Buckets are kept in LRU order and the least recently used are dropped
+    beyond max_keys; a dropped bucket comes back full, which only ever errs
+    on the side of letting a request through.
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max(1, int(max_keys))
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def consume(
+        self, key: str, cost: float, capacity: float, refill_per_second: float
+    ) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+
+            if tokens >= cost:
+                allowed, retry_after = True, 0.0
+                tokens -= cost
+            else:
+                allowed = False
+                if cost > capacity or refill_per_second <= 0:
+                    retry_after = math.inf
+                else:
+                    retry_after = (cost - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting for the API, per client IP and per user.
+
+    Every request takes its route's cost from the bucket of its IP address
+    (the forwarded client address with TRUSTED_PROXIES set) and, when it
+    carries a valid token, from the bucket of that user. A request that
+    either bucket cannot pay for is answered with 429 and a Retry-After
+    header before the view runs.
+
+    LocalRateLimitBackend buckets live in each process, so under
+    SERVER_MODE=production every prefork worker has its own: the effective
+    limit is the configured one times SERVER_WORKERS. Pass a shared backend
+    to enforce a single limit across workers.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[RateLimitBackend] = None,
+        route_costs: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Args:
+            backend: Bucket store (defaults to LocalRateLimitBackend)
+            route_costs: Cost per URL rule (defaults to ROUTE_COSTS)
+        """
+        self.backend = backend or LocalRateLimitBackend(Config.RATE_LIMIT_MAX_KEYS)
+        self.route_costs = route_costs if route_costs is not None else ROUTE_COSTS
+        self._lock = threading.Lock()
+        self._allowed = 0
+        self._limited: Dict[str, int] = {}
+
+    def init_app(self, app) -> None:
+        trusted_proxies = app.config.get("TRUSTED_PROXIES", 0)
+        if trusted_proxies > 0:
+            # Behind nginx every request comes from 127.0.0.1; take the client
+            # address from the X-Forwarded-For the trusted proxies appended
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+        app.before_request(self._before_request)
+
+    def cost_for(self, rule: str) -> int:
+        return self.route_costs.get(rule, DEFAULT_COST)
+
+    def check(
+        self, ip_address: str, user: Optional[str], cost: int
+    ) -> Tuple[bool, float]:
+        """
+        Take `cost` from the IP bucket and, if given, the user bucket
+
+        Returns:
+            (allowed, retry_after in seconds)
+        """
+        config = current_app.config
+        ip_bucket = (
+            f"ip:{ip_address}",
+            config["RATE_LIMIT_IP_CAPACITY"],
+            config["RATE_LIMIT_IP_REFILL_PER_SECOND"],
+        )
+        allowed, retry_after = self._consume(ip_bucket, cost)
+        if allowed and user:
+            allowed, retry_after = self._consume(
+                (
+                    f"user:{user}",
+                    config["RATE_LIMIT_USER_CAPACITY"],
+                    config["RATE_LIMIT_USER_REFILL_PER_SECOND"],
+                ),
+                cost,
+            )
+            if not allowed:
+                # A rejected request should not drain the IP's bucket
+                self._consume(ip_bucket, -cost)
+        return allowed, retry_after
+
+    def _consume(self, bucket: Tuple[str, float, float], cost: int):
+        key, capacity, refill_per_second = bucket
+        return self.backend.consume(key, cost, capacity, refill_per_second)
+
+    def stats(self) -> Dict[str, object]:
+        """Allowed request count and limited requests per route"""
+        with self._lock:
+            return {"allowed": self._allowed, "limited": dict(self._limited)}
+
+    def _before_request(self):
+        if not current_app.config["RATE_LIMIT_ENABLED"] or request.method == "OPTIONS":
+            return None
+
+        rule = request.url_rule.rule if request.url_rule else request.path
+        if rule in EXEMPT_ROUTES:
+            return None
+
+        allowed, retry_after = self.check(
+            request.remote_addr or "unknown", self._request_user(), self.cost_for(rule)
+        )
+
+        with self._lock:
+            if allowed:
+                self._allowed += 1
+            else:
+                self._limited[rule] = self._limited.get(rule, 0) + 1
+
+        if allowed:
+            return None
+
+        response = jsonify(
+            {"status": "error", "message": "Too many requests, please try again later"}
+        )
+        response.status_code = 429
+        if math.isfinite(retry_after):
+            response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def _request_user(self) -> Optional[str]:
+        """Identity from a valid bearer token; login_required rejects the rest"""
+        token = get_bearer_token(request.headers.get("Authorization", ""))
+        if not token:
+            return None
+        try:
+            payload = token_cache.verify(
+                token,
+                current_app.config["JWT_SECRET_KEY"],
+                current_app.config["JWT_ALGORITHM"],
+            )
+        except jwt.InvalidTokenError:
+            return None
+        return payload.get("user_id") or payload.get("email")
+
+
+# Create a global instance for easy access
+rate_limiter = RateLimiter()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the logging setup
+Measures how long a logging call blocks the calling (request / scan)
+thread with the previous synchronous handlers (console + two
+RotatingFileHandlers, copied below) and with the queue-based setup in
+app.utils.structured_logging, and what the level-gated replacements of
+the processingScripts prints cost compared to print().
+
+Console output goes to os.devnull so terminal speed does not skew either
+side; the log files are written to a temporary directory. --disk-latency-ms
+adds a delay to every log file write, like a slow SD card on a kiosk.
+
+Usage: python bench_logging.py [--number N] [--disk-latency-ms MS]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import structured_logging
+from app.utils.structured_logging import log_context
+
+# --- Previous implementation --------------------------------------------------
+
+
+def legacy_setup_logging(logs_dir):
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+
+    detailed_formatter = logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
+    )
+    simple_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(simple_formatter)
+    logger.addHandler(console_handler)
+
+    all_logs_handler = RotatingFileHandler(
+        Path(logs_dir) / "wellstation.log", maxBytes=10 * 1024 * 1024, backupCount=5
+    )
+    all_logs_handler.setLevel(logging.DEBUG)
+    all_logs_handler.setFormatter(detailed_formatter)
+    logger.addHandler(all_logs_handler)
+
+    error_logs_handler = RotatingFileHandler(
+        Path(logs_dir) / "wellstation_errors.log",
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5,
+    )
+    error_logs_handler.setLevel(logging.ERROR)
+    error_logs_handler.setFormatter(detailed_formatter)
+    logger.addHandler(error_logs_handler)
+
+
+def teardown_legacy():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+# --- Measurement ----------------------------------------------------------------
+
+
+class SlowStream:
+    """File stream whose writes take at least latency seconds"""
+
+    def __init__(self, stream, latency):
+        self.stream, self.latency = stream, latency
+
+    def write(self, text):
+        time.sleep(self.latency)
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def slow_down(handlers, latency):
+    for handler in handlers:
+        if latency and isinstance(handler, RotatingFileHandler):
+            handler.stream = SlowStream(handler.stream, latency)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_calls(call, number):
+    samples = []
+    for i in range(number):
+        start = time.perf_counter()
+        call(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(label, samples):
+    mean = sum(samples) / len(samples)
+    print(
+        f"{label:<44} mean {mean * 1e6:7.2f}us  p50 {percentile(samples, 0.5) * 1e6:7.2f}us"
+        f"  p99 {percentile(samples, 0.99) * 1e6:8.2f}us  max {max(samples) * 1e6:9.2f}us"
+    )
+    return mean
+
+
+def bench_handlers(number, latency):
+    logger = logging.getLogger("app.services.media.media")
+    vital_signs = {"heart_rate": 72, "spo2": 98, "blood_pressure_systolic": 120}
+
+    def info(i):
+        logger.info("Vital signs: %s", vital_signs)
+
+    def error(i):
+        logger.error("Error during audio processing: %s", "timeout")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as logs_dir:
+        legacy_setup_logging(logs_dir)
+        slow_down(logging.getLogger().handlers, latency)
+        results["legacy_info"] = report(
+            "info, synchronous handlers", time_calls(info, number)
+        )
+        results["legacy_error"] = report(
+            "error, synchronous handlers", time_calls(error, number // 10)
+        )
+        teardown_legacy()
+
+    with tempfile.TemporaryDirectory() as logs_dir:
+        listener = structured_logging.setup_logging(
+            logs_dir=logs_dir, file_format="json"
+        )
+        slow_down(listener.handlers, latency)
+        with log_context(request_id="bench", scan_id="scan-1", stage="hr"):
+            results["queued_info"] = report(
+                "info, queue handler (JSON)", time_calls(info, number)
+            )
+            results["queued_error"] = report(
+                "error, queue handler (JSON)", time_calls(error, number // 10)
+            )
+        start = time.perf_counter()
+        structured_logging.stop_logging()
+        drain = time.perf_counter() - start
+        lines = sum(1 for _ in open(Path(logs_dir) / "wellstation.log"))
+        print(f"  listener wrote {lines} JSON lines, drained in {drain * 1e3:.1f}ms")
+    return results
+
+
+def bench_prints(number):
+    logger = logging.getLogger("processingScripts.model_utils.spo2_model_utils")
+    logger.setLevel(logging.INFO)
+    pred_file = "processingScripts/model_outputs/hr/scan/video_preds_0003.npy"
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        printed = time_calls(lambda i: print(pred_file, 97), number)
+    gated = time_calls(lambda i: logger.debug("%s spo2 %s", pred_file, 97), number)
+    report("per-chunk print() to stdout", printed)
+    report("per-chunk logger.debug at INFO level", gated)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--disk-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # The console handlers bind sys.stderr when they are created
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stderr(devnull):
+        results = bench_handlers(args.number, args.disk_latency_ms / 1000)
+
+    print(
+        f"Caller-side cost per info call: {results['legacy_info'] * 1e6:.2f}us -> "
+        f"{results['queued_info'] * 1e6:.2f}us "
+        f"({results['legacy_info'] / results['queued_info']:.1f}x less time blocked)"
+    )
+    print()
+    bench_prints(args.number)
+
+
+if __name__ == "__main__":
+    main()
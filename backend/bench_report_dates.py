@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the report date utilities
+Compares the memoized helpers in app.services.report.date_utils against the
+previous implementations (copied below) and checks that both produce the
+same output before timing them.
+
+Usage: python bench_report_dates.py [--number N]
+"""
+
+import argparse
+import math
+import os
+import random
+import re
+import sys
+import timeit
+from calendar import monthrange
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.report.report_utils import (
+    parse_date_input,
+    organize_reports_by_date_iso8601,
+)
+from app.services.report.month_reports_with_intervals_service import (
+    _group_reports_by_interval,
+)
+
+
+# --- Previous implementations -------------------------------------------------
+
+
+def legacy_parse_iso8601_date(date_str):
+    try:
+        if "T" in date_str:
+            return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        else:
+            return datetime.strptime(date_str, "%Y-%m-%d")
+    except (ValueError, AttributeError):
+        return None
+
+
+def legacy_parse_date_input(date_input):
+    try:
+        if "/" in date_input:
+            start_date_str, end_date_str = date_input.split("/")
+            parsed_start = legacy_parse_iso8601_date(start_date_str.strip())
+            if parsed_start:
+                year = str(parsed_start.year)
+                month = str(parsed_start.month).zfill(2)
+                day = str(parsed_start.day).zfill(2)
+                return year, month, day, start_date_str.strip(), end_date_str.strip()
+
+        if " - " in date_input:
+            start_date_str, end_date_str = date_input.split(" - ")
+            parsed_start = datetime.strptime(start_date_str.strip(), "%Y-%m-%d")
+            year = str(parsed_start.year)
+            month = str(parsed_start.month).zfill(2)
+            day = str(parsed_start.day).zfill(2)
+            return year, month, day, start_date_str.strip(), end_date_str.strip()
+
+        if re.match(r"^\d{4}-\d{2}-\d{2}$", date_input):
+            parsed_date = datetime.strptime(date_input, "%Y-%m-%d")
+            year = str(parsed_date.year)
+            month = str(parsed_date.month).zfill(2)
+            day = str(parsed_date.day).zfill(2)
+        elif re.match(r"^\d{4}-\d{2}$", date_input):
+            year, month = date_input.split("-")
+            day = None
+        elif re.match(r"^\d{4}$", date_input):
+            year = date_input
+            month = None
+            day = None
+        else:
+            parsed_date = legacy_parse_iso8601_date(date_input)
+            if parsed_date:
+                year = str(parsed_date.year)
+                month = str(parsed_date.month).zfill(2)
+                day = str(parsed_date.day).zfill(2)
+            else:
+                return None, None, None
+    except (ValueError, AttributeError):
+        return None, None, None
+
+    return year, month, day
+
+
+def legacy_organize_reports_by_date(reports, start_date=None, end_date=None):
+    reports_by_date = {}
+
+    if start_date and end_date:
+        current_date = start_date
+        while current_date <= end_date:
+            reports_by_date[current_date.strftime("%Y-%m-%d")] = []
+            current_date += timedelta(days=1)
+
+    for report_item in reports:
+        created_at = report_item.get("created_at")
+        if created_at:
+            if isinstance(created_at, datetime):
+                date_key = created_at.strftime("%Y-%m-%d")
+            else:
+                try:
+                    parsed_date = datetime.fromisoformat(
+                        str(created_at).replace("Z", "+00:00")
+                    )
+                    date_key = parsed_date.strftime("%Y-%m-%d")
+                except:
+                    date_key = str(created_at)[:10]
+
+            if date_key in reports_by_date:
+                reports_by_date[date_key].append(report_item)
+            elif not start_date and not end_date:
+                if date_key not in reports_by_date:
+                    reports_by_date[date_key] = []
+                reports_by_date[date_key].append(report_item)
+
+    return reports_by_date
+
+
+def legacy_get_interval(n):
+    if n <= 0:
+        return []
+
+    factors = []
+    for i in range(1, int(n**0.5) + 1):
+        if n % i == 0:
+            factors.append(i)
+            if i != n // i:
+                factors.append(n // i)
+
+    factors = sorted(factors)
+
+    for factor in factors:
+        result = math.ceil(n / factor + 1)
+        if 5 <= result <= 7:
+            return result, factor
+
+    best_factor = None
+    for factor in reversed(factors):
+        if n / factor + 1 > 7:
+            best_factor = factor
+            break
+
+    if best_factor:
+        test_factor = best_factor + 1
+        while test_factor <= n:
+            result = math.ceil(n / test_factor + 1)
+            if 5 <= result <= 7:
+                return result, test_factor
+            test_factor += 1
+
+    for test_factor in range(2, n + 1):
+        result = math.ceil(n / test_factor + 1)
+        if 5 <= result <= 7:
+            return result, test_factor
+
+    return 5, 5
+
+
+def legacy_group_reports_by_interval(report_list, year, month_num):
+    if month_num:
+        days_in_month = monthrange(int(year), int(month_num))[1]
+    else:
+        days_in_month = 365
+
+    _, interval_size = legacy_get_interval(days_in_month)
+    prefix = f"{year}-{month_num.zfill(2) if month_num else '01'}"
+
+    grouped_reports = {f"{prefix}-01": []}
+    total_intervals = math.ceil((days_in_month - 1) / interval_size)
+    for interval_num in range(1, total_intervals + 1):
+        interval_start = 2 + ((interval_num - 1) * interval_size)
+        interval_end = min(interval_start + interval_size - 1, days_in_month)
+        key = f"{prefix}-{str(interval_start).zfill(2)}/{prefix}-{str(interval_end).zfill(2)}"
+        grouped_reports[key] = []
+
+    for report_item in report_list:
+        created_at = report_item.get("created_at")
+        if created_at:
+            day = created_at.day
+            if day == 1:
+                interval_key = f"{prefix}-01"
+            else:
+                interval_number = math.ceil((day - 1) / interval_size)
+                interval_start = 2 + ((interval_number - 1) * interval_size)
+                interval_end = min(interval_start + interval_size - 1, days_in_month)
+                interval_key = f"{prefix}-{str(interval_start).zfill(2)}/{prefix}-{str(interval_end).zfill(2)}"
+
+            if interval_key in grouped_reports:
+                grouped_reports[interval_key].append(report_item)
+
+    return grouped_reports
+
+
+# --- Fixtures -----------------------------------------------------------------
+
+
+def make_reports(count, start, days):
+    rng = random.Random(42)
+    reports = []
+    for index in range(count):
+        created_at = start + timedelta(seconds=rng.randrange(days * 86400))
+        if index % 4 == 0:
+            # Some legacy documents carry string timestamps
+            created_at = created_at.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        reports.append({"report_id": index, "created_at": created_at})
+    return reports
+
+
+DATE_INPUTS = [
+    "2025-03-14",
+    "2025-03",
+    "2025",
+    "2025-03-01/2025-03-07",
+    "2025-03-01T00:00:00.000Z/2025-03-31T23:59:59.999Z",
+    "2025-03-01 - 2025-03-07",
+    "2025-03-14T10:20:30Z",
+]
+
+
+def check_equivalence():
+    for value in DATE_INPUTS:
+        assert parse_date_input(value) == legacy_parse_date_input(value), value
+
+    start = datetime(2025, 3, 1)
+    end = datetime(2025, 3, 31)
+    reports = make_reports(2000, start, 31)
+    assert organize_reports_by_date_iso8601(
+        reports, start_date=start, end_date=end
+    ) == legacy_organize_reports_by_date(reports, start, end)
+    assert organize_reports_by_date_iso8601(
+        reports
+    ) == legacy_organize_reports_by_date(reports)
+
+    for month in range(1, 13):
+        month_num = str(month).zfill(2)
+        days = monthrange(2024, month)[1]
+        month_reports = [
+            item
+            for item in make_reports(500, datetime(2024, month, 1), days)
+            if isinstance(item["created_at"], datetime)
+        ]
+        assert _group_reports_by_interval(
+            month_reports, "2024", month_num
+        ) == legacy_group_reports_by_interval(month_reports, "2024", month_num)
+
+
+def bench(label, new, old, number):
+    new_time = min(timeit.repeat(new, number=number, repeat=5))
+    old_time = min(timeit.repeat(old, number=number, repeat=5))
+    print(
+        f"{label:<32} legacy {old_time / number * 1e6:9.2f} us   "
+        f"new {new_time / number * 1e6:9.2f} us   x{old_time / new_time:5.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    check_equivalence()
+    print("Outputs match the previous implementation\n")
+
+    number = args.number
+    start = datetime(2025, 3, 1)
+    end = datetime(2025, 3, 31)
+    reports = make_reports(300, start, 31)
+    month_reports = [
+        item for item in reports if isinstance(item["created_at"], datetime)
+    ]
+
+    bench(
+        "parse_date_input (7 formats)",
+        lambda: [parse_date_input(value) for value in DATE_INPUTS],
+        lambda: [legacy_parse_date_input(value) for value in DATE_INPUTS],
+        number * 10,
+    )
+    bench(
+        "organize by date (300, ranged)",
+        lambda: organize_reports_by_date_iso8601(
+            reports, start_date=start, end_date=end
+        ),
+        lambda: legacy_organize_reports_by_date(reports, start, end),
+        number,
+    )
+    bench(
+        "organize by date (300, open)",
+        lambda: organize_reports_by_date_iso8601(reports),
+        lambda: legacy_organize_reports_by_date(reports),
+        number,
+    )
+    bench(
+        "group by interval (225)",
+        lambda: _group_reports_by_interval(month_reports, "2025", "03"),
+        lambda: legacy_group_reports_by_interval(month_reports, "2025", "03"),
+        number,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for decoding scan videos in segments across cores
+Times decoding, face cropping and resizing of a synthetic recording in one
+process (read_frames + crop_faces) and in 160-frame segments with
+read_faces_parallel for each worker count, and checks that both produce the
+same faces before timing them.
+
+The video is an MJPG file written to a temporary directory, at 60 fps and
+1280x720 by default, like a fast webcam. Face detection runs as in a scan;
+the synthetic frames have no face, which costs about the same. Pass
+--video to time a real recording instead.
+
+Usage: python bench_video_decode.py [--seconds S] [--fps F] [--workers 2,4,8]
+       [--repeat N] [--video PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from processingScripts.feature_engineering.extract_video_features import (
+    crop_faces,
+    read_faces_parallel,
+    read_frames,
+)
+
+
+def write_video(path, seconds, fps, width, height):
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height)
+    )
+    if not writer.isOpened():
+        sys.exit("No MJPG encoder in this OpenCV build; pass --video")
+    ys, xs = np.mgrid[0:height, 0:width]
+    background = ((xs + ys) % 256).astype("uint8")
+    for i in range(int(seconds * fps)):
+        frame = np.dstack([background, np.roll(background, i, axis=1), background])
+        cv2.circle(
+            frame, (width // 2 + i % 40, height // 2), height // 5, (90, 140, 200), -1
+        )
+        writer.write(frame)
+    writer.release()
+
+
+def sequential(video):
+    frames, windows, _ = read_frames(video)
+    return crop_faces(frames, windows)
+
+
+def best_of(call, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--workers", default="2,4,6,8")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--video")
+    args = parser.parse_args()
+    worker_counts = [int(count) for count in args.workers.split(",")]
+
+    with tempfile.TemporaryDirectory() as directory:
+        video = args.video
+        if video is None:
+            video = os.path.join(directory, "bench.avi")
+            write_video(video, args.seconds, args.fps, args.width, args.height)
+
+        baseline, expected = best_of(lambda: sequential(video), args.repeat)
+        print(f"{os.cpu_count()} cores, {len(expected)} frames kept")
+        print(f"{'one process':<20} {baseline:7.2f}s")
+        for workers in worker_counts:
+            seconds, (faces, info) = best_of(
+                lambda: read_faces_parallel(video, workers), args.repeat
+            )
+            if faces is None:
+                sys.exit("The video cannot be split in segments")
+            if not np.array_equal(faces, expected):
+                sys.exit(f"{workers} workers produced different faces")
+            print(
+                f"{f'{workers} workers':<20} {seconds:7.2f}s  "
+                f"{baseline / seconds:4.2f}x  ({info['segments']} segments)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -78,6 +78,160 @@ class Config:
     # YouTube API Configuration
     YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
     YOUTUBE_API_QUOTA_LIMIT = int(os.getenv("YOUTUBE_API_QUOTA_LIMIT", "10000"))
+    # Playlist videos are cached (app/services/resources/playlist_cache.py):
+    # refreshed after the TTL, served stale while refreshing for up to
+    # STALE_SECONDS more, and persisted to PLAYLIST_CACHE_PATH ("" = memory only)
+    PLAYLIST_CACHE_TTL_SECONDS = float(os.getenv("PLAYLIST_CACHE_TTL_SECONDS", "21600"))
+    PLAYLIST_CACHE_STALE_SECONDS = float(
+        os.getenv("PLAYLIST_CACHE_STALE_SECONDS", "604800")
+    )
+    PLAYLIST_CACHE_MAX_VIDEOS = int(os.getenv("PLAYLIST_CACHE_MAX_VIDEOS", "200"))
+    PLAYLIST_CACHE_PATH = os.getenv(
+        "PLAYLIST_CACHE_PATH", os.path.join("cache", "youtube_playlists.json")
+    )
+    PLAYLIST_PREFETCH_ON_STARTUP = (
+        os.getenv("PLAYLIST_PREFETCH_ON_STARTUP", "true").lower() == "true"
+    )
+    # Emotional profile per report id, for resource requests
+    PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+    PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "2048"))
+
+    # Report response cache
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "2048"))
+    REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))
+
+    # Verified JWT payloads reused until the token expires (0 disables)
+    JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "1024"))
+
+    # Token-bucket rate limits (app/validations/rate_limiter.py). Each request
+    # costs its route's weight; a video scan costs 20, a report fetch 1.
+    # Behind a reverse proxy every client is 127.0.0.1 and shares one IP
+    # bucket: set TRUSTED_PROXIES to the number of proxies in front (1 for
+    # the nginx in Deployment.txt) before enabling the limits. Buckets are per
+    # process, so with the prefork server each worker enforces them separately.
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXIES", "0"))
+    RATE_LIMIT_IP_CAPACITY = float(os.getenv("RATE_LIMIT_IP_CAPACITY", "120"))
+    RATE_LIMIT_IP_REFILL_PER_SECOND = float(
+        os.getenv("RATE_LIMIT_IP_REFILL_PER_SECOND", "1")
+    )
+    RATE_LIMIT_USER_CAPACITY = float(os.getenv("RATE_LIMIT_USER_CAPACITY", "60"))
+    RATE_LIMIT_USER_REFILL_PER_SECOND = float(
+        os.getenv("RATE_LIMIT_USER_REFILL_PER_SECOND", "0.5")
+    )
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+    # Finished trial reports cached in-process (the frontend polls them)
+    TRIAL_REPORT_CACHE_TTL_SECONDS = float(
+        os.getenv("TRIAL_REPORT_CACHE_TTL_SECONDS", "60")
+    )
+    TRIAL_REPORT_CACHE_MAX_ENTRIES = int(
+        os.getenv("TRIAL_REPORT_CACHE_MAX_ENTRIES", "512")
+    )
+    # MongoDB deletes active trials this long after expires_at (TTL index)
+    TRIAL_TTL_GRACE_SECONDS = int(os.getenv("TRIAL_TTL_GRACE_SECONDS", "259200"))
+    # Background job deleting the media of expired trials
+    TRIAL_REAPER_ENABLED = os.getenv("TRIAL_REAPER_ENABLED", "true").lower() == "true"
+    TRIAL_REAPER_INTERVAL_SECONDS = float(
+        os.getenv("TRIAL_REAPER_INTERVAL_SECONDS", "300")
+    )
+    TRIAL_REAPER_BATCH_SIZE = int(os.getenv("TRIAL_REAPER_BATCH_SIZE", "200"))
+    TRIAL_REAPER_DELETE_WORKERS = int(os.getenv("TRIAL_REAPER_DELETE_WORKERS", "4"))
+    # Maintain trial counters on state transitions so statistics are one read
+    TRIAL_STATS_COUNTERS = os.getenv("TRIAL_STATS_COUNTERS", "true").lower() == "true"
+
+    # HTTP server: "development" runs the Werkzeug dev server, "production"
+    # the prefork runner in app/server. The prefork runner is opt-in in every
+    # environment; set SERVER_MODE=production to use it
+    SERVER_MODE = os.getenv("SERVER_MODE", "development")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "0"))  # 0 = one per CPU core
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "4"))
+    # Socket idle timeout: how long a read of the request or a write of the
+    # response may stall. It does not limit how long a request (a scan) runs.
+    # SERVER_REQUEST_TIMEOUT is its earlier name, still read as a fallback
+    SERVER_IDLE_TIMEOUT = float(
+        os.getenv("SERVER_IDLE_TIMEOUT", os.getenv("SERVER_REQUEST_TIMEOUT", "120"))
+    )
+    SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+    SERVER_PRELOAD_MODELS = os.getenv("SERVER_PRELOAD_MODELS", "true").lower() == "true"
+    # Logging goes through a queue to a background writer thread
+    # (app/utils/structured_logging.py). LOG_FORMAT "json" writes one JSON
+    # object per line with request_id / scan_id / stage; "text" the old lines.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    # Prometheus metrics at /api/metrics (app/utils/metrics.py). Prefork
+    # workers share their metrics through snapshot files in METRICS_DIR; with
+    # METRICS_TOKEN set, scrapes must send "Authorization: Bearer <token>".
+    METRICS_DIR = os.getenv("METRICS_DIR", os.path.join("cache", "metrics"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+    # Profiles of slow scans (app/services/media/scan_profiler.py): with
+    # PROFILING_ENABLED every scan is sampled and kept if it took at least
+    # THRESHOLD_SECONDS. With PROFILING_ALLOW_HEADER the X-Profile-Scan header
+    # profiles one scan on demand; any client can send it, so it is off unless
+    # turned on while investigating a booth
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_THRESHOLD_SECONDS = float(os.getenv("PROFILING_THRESHOLD_SECONDS", "30"))
+    PROFILING_SAMPLE_INTERVAL_MS = float(
+        os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "10")
+    )
+    PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+    PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join("cache", "profiles"))
+    PROFILING_ALLOW_HEADER = (
+        os.getenv("PROFILING_ALLOW_HEADER", "false").lower() == "true"
+    )
+    # Per-scan memory accounting (app/services/media/scan_memory.py): peak RSS
+    # per scan and stage, optionally tracemalloc's top allocation sites. A
+    # video estimated to need more than SCAN_MEMORY_BUDGET_MB (0 = no budget)
+    # is decoded at a smaller size ("downsample") or refused ("reject")
+    SCAN_MEMORY_TRACKING = os.getenv("SCAN_MEMORY_TRACKING", "true").lower() == "true"
+    SCAN_MEMORY_SAMPLE_INTERVAL_MS = float(
+        os.getenv("SCAN_MEMORY_SAMPLE_INTERVAL_MS", "50")
+    )
+    SCAN_MEMORY_TRACEMALLOC = (
+        os.getenv("SCAN_MEMORY_TRACEMALLOC", "false").lower() == "true"
+    )
+    SCAN_MEMORY_TRACEMALLOC_TOP = int(os.getenv("SCAN_MEMORY_TRACEMALLOC_TOP", "10"))
+    SCAN_MEMORY_BUDGET_MB = float(os.getenv("SCAN_MEMORY_BUDGET_MB", "0"))
+    SCAN_MEMORY_BUDGET_POLICY = os.getenv("SCAN_MEMORY_BUDGET_POLICY", "downsample")
+    # Scan videos are decoded at no more than this frame rate (the HR model's
+    # 30 fps) and longest side in pixels, however the client recorded them
+    VIDEO_TARGET_FPS = float(os.getenv("VIDEO_TARGET_FPS", "30"))
+    VIDEO_MAX_DIMENSION = int(os.getenv("VIDEO_MAX_DIMENSION", "640"))
+    # Decode, crop and resize scan videos in this many processes, one segment of
+    # 160 frames each (0 = in the request's process); see bench_video_decode.py
+    VIDEO_DECODE_WORKERS = int(os.getenv("VIDEO_DECODE_WORKERS", "0"))
+    # Warm models, openSMILE and the DB pool in the background after startup;
+    # /api/ready reports when this has finished. When off, the first /api/ready
+    # check starts the warm-up instead
+    WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+    # Outgoing email: SMTP connections are pooled and reused, and emails are
+    # queued for background workers that batch sends and retry with backoff
+    EMAIL_SMTP_SERVER = os.getenv("EMAIL_SMTP_SERVER", "smtp.office365.com")
+    EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT", "587"))
+    EMAIL_SMTP_POOL_SIZE = int(os.getenv("EMAIL_SMTP_POOL_SIZE", "2"))
+    EMAIL_SMTP_KEEPALIVE_SECONDS = float(
+        os.getenv("EMAIL_SMTP_KEEPALIVE_SECONDS", "30")
+    )
+    EMAIL_SMTP_MAX_IDLE_SECONDS = float(os.getenv("EMAIL_SMTP_MAX_IDLE_SECONDS", "240"))
+    EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true"
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "2"))
+    # Email templates are compiled once; minified to shrink messages, and
+    # recompiled when their file changes if hot reload is on (development)
+    EMAIL_TEMPLATE_MINIFY = os.getenv("EMAIL_TEMPLATE_MINIFY", "true").lower() == "true"
+    EMAIL_TEMPLATE_HOT_RELOAD = (
+        os.getenv("EMAIL_TEMPLATE_HOT_RELOAD", "false").lower() == "true"
+    )
+
+    # Worker threads used to run independent DB queries concurrently
+    DB_IO_MAX_WORKERS = int(os.getenv("DB_IO_MAX_WORKERS", "16"))
+
+    # Write reward ledger entries off the request path
+    REWARDS_DEFERRED_LEDGER = (
+        os.getenv("REWARDS_DEFERRED_LEDGER", "false").lower() == "true"
+    )
 
 
 class DevelopmentConfig(Config):
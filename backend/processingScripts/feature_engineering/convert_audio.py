@@ -1,8 +1,11 @@
+import logging
 import os
 import ntpath
 import subprocess
 from ..utils.ffmpeg_utils import run_ffmpeg_command
 
+logger = logging.getLogger(__name__)
+
 
 def convert_audio(audio_path):
     basepath, filename = ntpath.split(audio_path)
@@ -36,9 +39,9 @@ def convert_audio(audio_path):
             stderr=subprocess.PIPE,
             text=True,
         )
-        print(f"Conversion successful: {new_audio_path}")
+        logger.info("Conversion successful: %s", new_audio_path)
         return new_audio_path
     except subprocess.CalledProcessError as e:
-        print(f"Error during conversion: {e}")
-        print(f"Error output: {e.stderr}")
+        logger.error("Error during conversion: %s", e)
+        logger.error("Error output: %s", e.stderr)
         raise
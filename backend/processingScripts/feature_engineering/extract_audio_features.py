@@ -1,3 +1,4 @@
+import logging
 import os
 import ntpath
 
@@ -7,25 +8,27 @@ import opensmile
 
 from .convert_audio import convert_audio
 
+logger = logging.getLogger(__name__)
+
 
 def extract_audio_features(audio_path, features_dir):
     # configure opensmile extractor
-    print(f"Initializing OpenSMILE feature extractor for {audio_path}")
+    logger.debug("Initializing OpenSMILE feature extractor for %s", audio_path)
     smile = opensmile.Smile(
     feature_set=opensmile.FeatureSet.ComParE_2016,
     feature_level=opensmile.FeatureLevel.Functionals)
     
     # extract features
-    print(f"Extracting features from {audio_path}")
+    logger.debug("Extracting features from %s", audio_path)
     try:
         features = smile.process_file(audio_path)
     except Exception as e:
-        print(f"Error processing {audio_path}, attempting audio conversion: {str(e)}")
+        logger.warning("Error processing %s, attempting audio conversion: %s", audio_path, e)
         new_audio_path = convert_audio(audio_path)
-        print(f"Successfully converted audio, retrying feature extraction")
+        logger.info("Successfully converted audio, retrying feature extraction")
         features = smile.process_file(new_audio_path)
     
-    print("Post-processing extracted features")
+    logger.debug("Post-processing extracted features")
     features.reset_index(inplace=True)
     features.drop(columns=['start', 'end'], inplace=True)
     
@@ -33,8 +36,8 @@ def extract_audio_features(audio_path, features_dir):
     audio_filename = ntpath.basename(audio_path).split('.')[0]
     feature_filename = audio_filename + '.csv'
     output_path = os.path.join(features_dir, feature_filename)
-    print(f"Saving features to {output_path}")
+    logger.debug("Saving features to %s", output_path)
     features.to_csv(output_path, index=False)
     
-    print(f"Successfully extracted and saved features for {audio_path}")
+    logger.info("Successfully extracted and saved features for %s", audio_path)
     return feature_filename
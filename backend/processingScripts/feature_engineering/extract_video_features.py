@@ -1,4 +1,5 @@
 # Imports
+import logging
 import os
 import math
 from multiprocessing import Pool, Process, Value, Array, Manager
@@ -9,6 +10,17 @@ import cv2
 import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+# The HR model was trained on 30 fps video, and every frame ends up a 72x72
+# face crop: decoding more frames or pixels than this only costs time
+TARGET_FPS = 30
+MAX_DIMENSION = 640
+# Frames per feature chunk of the models
+CHUNK_LENGTH = 160
+# The face is detected once per this many frames (a second at TARGET_FPS)
+DETECTION_WINDOW = 30
+
 # Functions
 def face_detection(frame, backend, use_larger_box=False, larger_box_coef=1.0):
     """Face detection on a single frame.
@@ -32,14 +44,14 @@ def face_detection(frame, backend, use_larger_box=False, larger_box_coef=1.0):
         face_zone = detector.detectMultiScale(frame)
 
         if len(face_zone) < 1:
-            print("ERROR: No Face Detected")
+            logger.warning("No Face Detected")
             face_box_coor = [0, 0, frame.shape[0], frame.shape[1]]
         elif len(face_zone) >= 2:
             # Find the index of the largest face zone
             # The face zones are boxes, so the width and height are the same
             max_width_index = np.argmax(face_zone[:, 2])  # Index of maximum width
             face_box_coor = face_zone[max_width_index]
-            print("Warning: More than one faces are detected. Only cropping the biggest one.")
+            logger.debug("More than one faces are detected. Only cropping the biggest one.")
         else:
             face_box_coor = face_zone[0]
     else:
@@ -110,7 +122,7 @@ def diff_normalize_data(data):
     """Calculate discrete difference in video data along the time-axis and nornamize by its standard deviation."""
     N, H, W, C = data.shape
     diffnormalized_len = N - 1
-    print(diffnormalized_len, H, W, C)
+    logger.debug("diff normalize %s %s %s %s", diffnormalized_len, H, W, C)
     diffnormalized_data = np.zeros((diffnormalized_len, H, W, C), dtype=np.float32)
     diffnormalized_data_padding = np.zeros((1, H, W, C), dtype=np.float32)
     for j in range(diffnormalized_len):
@@ -141,56 +153,381 @@ def chunk(frames, chunk_length):
     """
 
     clip_num = frames.shape[0] // chunk_length
-    frames_clips = [frames[i * chunk_length:(i + 1) * chunk_length] for i in range(clip_num)]
+    # A view of the first clip_num * chunk_length frames, not a copy
+    frames_clips = frames[:clip_num * chunk_length].reshape((clip_num, chunk_length) + frames.shape[1:])
     #bvps_clips = [bvps[i * chunk_length:(i + 1) * chunk_length] for i in range(clip_num)]
-    return np.array(frames_clips) #, np.array(bvps_clips)
+    return frames_clips #, np.array(bvps_clips)
+
+def crop_faces(frames, windows=None, lead_frame=None):
+    """Crop the face of every frame and resize it to 72x72.
+
+    The face is detected on the first frame of each detection window and that
+    box is used for the window's other frames.
+
+    Args:
+        frames(np.array): video frames.
+        windows(np.array): detection window of each frame, non-decreasing. None for
+                           windows of DETECTION_WINDOW consecutive frames.
+        lead_frame(np.array): first frame of the window of frames[0], when frames
+                              starts in the middle of it (a segment of the video).
+    Returns:
+        faces(np.array(float)): cropped and resized frames.
+    """
+    if windows is None:
+        windows = np.arange(frames.shape[0]) // DETECTION_WINDOW
+    faces = np.zeros((frames.shape[0], 72, 72, 3))
+    starts = np.flatnonzero(np.diff(windows, prepend=-1))
+    ends = list(starts[1:]) + [frames.shape[0]]
+    for start, end in zip(starts, ends):
+        group = frames[start:end]
+        if start == 0 and lead_frame is not None:
+            group = np.concatenate([lead_frame[np.newaxis], group])
+        cropped = crop_face_resize(group, use_face_detection=True, backend='HC', use_larger_box=True,
+                                   larger_box_coef=1.5, use_dynamic_detection=False, detection_freq=DETECTION_WINDOW,
+                                   use_median_box=False, width=72, height=72)
+        faces[start:end] = cropped[len(group) - (end - start):]
+    return faces
+
+def normalize(faces):
+    """Diff-normalize and standardize cropped faces and split them in chunks.
 
-def preprocess(frames):
-    frames = crop_face_resize(frames, use_face_detection=True, backend='HC', use_larger_box=True, larger_box_coef=1.5,
-                              use_dynamic_detection=True, detection_freq=30, use_median_box=False, width=72, height=72)
+    Both use statistics of the whole video, so this runs on all the faces at once.
+    """
     # diffnormalization and standardization
+    # Neither function modifies its input, so no copies of the frames
     data = list()
-    data.append(diff_normalize_data(frames.copy()))
-    data.append(standardized_data(frames.copy()))
+    data.append(diff_normalize_data(faces))
+    data.append(standardized_data(faces))
     data = np.concatenate(data, axis=-1)  # concatenate all channels
-    frames_clips = chunk(data, chunk_length=160)
+    frames_clips = chunk(data, chunk_length=CHUNK_LENGTH)
     #print(f'data.shape - {data.shape}, frames_clips.shape - {frames_clips.shape}')
     return frames_clips
 
-def extract_video_features(video_path, features_dir, return_filelist=True):
-    print(video_path)
-    cap = cv2.VideoCapture(video_path)
-    #frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+def preprocess(frames, windows=None):
+    return normalize(crop_faces(frames, windows))
+
+def extract_video_features(video_path, features_dir, return_filelist=True, memory_budget=None,
+                           target_fps=TARGET_FPS, max_dimension=MAX_DIMENSION, return_info=False, workers=0):
+    """Decode a video, crop and normalize the face and save it in 160-frame chunks.
+
+    Args:
+        video_path(str): recorded video.
+        features_dir(str): directory of the saved chunks.
+        return_filelist(bool): return the paths of the saved chunks.
+        memory_budget(VideoMemoryBudget): if given, decides the scale frames are
+                                          decoded at and rejects videos too big for it
+                                          (app/services/media/scan_memory.py).
+        target_fps(float): highest frame rate kept, see read_frames.
+        max_dimension(int): longest side frames are downscaled to, see read_frames.
+        return_info(bool): also return the decoding info of read_frames, with the
+                           sampling rate "fs" calculate_hr needs.
+        workers(int): decode, crop and resize in this many processes (read_faces_parallel).
+                      0 or 1, or a video that cannot be split, decodes in this process.
+    Returns:
+        features_paths(list[str]): saved chunks, if return_filelist.
+        info(dict): if return_info.
+    """
+    logger.debug("extracting video features from %s", video_path)
+    faces = None
+    if workers > 1:
+        faces, info = read_faces_parallel(video_path, workers, target_fps, max_dimension, memory_budget)
+    if faces is None:
+        video_array, windows, info = read_frames(video_path, target_fps, max_dimension, memory_budget)
+        faces = crop_faces(video_array, windows)
+        del video_array
+
+    frames_clips = normalize(faces)
+    filename = os.path.basename(video_path).split('.')[0]
+    #np.save(features_dir + os.sep + filename + '_features.npy', frames_clips)
+    features_paths = save(frames_clips, filename, features_dir)
+    logger.info("%s processed. %s chunks.", video_path, len(features_paths))
+    if not return_filelist:
+        features_paths = list()
+    if return_info:
+        return features_paths, info
+    return features_paths
+
+def _slot(timestamp, period):
+    """Index of the target frame rate slot a frame at timestamp (ms) fills; a little early is fine (jitter)."""
+    return math.floor((timestamp + 0.2 * period) / period)
+
+def _grab_slots(cap, period, fallback_period=None, previous_time=-1.0, last_slot=None):
+    """Grab the frames of cap, yielding (timestamp, slot, keep) for each.
+
+    keep is True for the first frame of each slot: a 60 fps recording keeps every
+    other frame, a variable frame rate one keeps evenly spaced frames and one slower
+    than the target keeps every frame. It only depends on the frame's and the
+    previous frame's timestamps, so a segment decoded on its own keeps the same
+    frames as the whole video decoded at once.
+
+    Args:
+        fallback_period(float): spacing (ms) assumed when the backend reports no
+                                usable timestamps. None raises ValueError instead.
+        previous_time, last_slot: timestamp and slot of the frame before the first one grabbed.
+    """
+    while cap.grab():
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC)
+        if timestamp <= previous_time:
+            if fallback_period is None:
+                raise ValueError("Video timestamps are not increasing")
+            timestamp = previous_time + fallback_period
+        previous_time = timestamp
+        slot = _slot(timestamp, period)
+        keep = last_slot is None or slot > last_slot
+        last_slot = slot
+        yield timestamp, slot, keep
+
+def _video_properties(cap):
+    """Frame count (0 if unknown), width, height and fps (None if unknown) of cap."""
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    #print(frame_count, frame_height, frame_width)
-    print(frame_height, frame_width)
-    #video_array = np.empty((frame_count, frame_height, frame_width, 3), np.dtype('uint8'))
-    
-    fc = 0
-    ret = True
-    frame_count = 0
+    source_fps = cap.get(cv2.CAP_PROP_FPS)
+    if not 1 <= source_fps <= 240:
+        # WebM from MediaRecorder often reports its time base instead
+        source_fps = None
+    logger.debug("frame size %sx%s, %s fps, %s frames", frame_width, frame_height, source_fps, frame_count)
+    return max(0, frame_count), frame_width, frame_height, source_fps
+
+def _decode_scale(frame_count, frame_width, frame_height, max_dimension, memory_budget):
+    """Scale frames are decoded at, for max_dimension and the memory budget."""
+    scale = 1.0
+    if max_dimension and max(frame_width, frame_height) > max_dimension:
+        scale = max_dimension / max(frame_width, frame_height)
+    if memory_budget is not None:
+        scale = memory_budget.scale_for(frame_count, frame_width, frame_height, scale, more_frames=False)
+    return scale
+
+def _kept_frame_count(frame_count, source_fps, target_fps):
+    """Frames kept of the container's frame count, when it has one (WebM usually does not)."""
+    if source_fps:
+        return int(frame_count * min(1.0, target_fps / source_fps))
+    return frame_count
+
+def _frame_rate(kept_times, source_fps, target_fps):
+    """Frame rate of the kept frames, measured from their timestamps."""
+    if len(kept_times) > 1 and kept_times[-1] > kept_times[0]:
+        return (len(kept_times) - 1) * 1000.0 / (kept_times[-1] - kept_times[0])
+    return min(target_fps, source_fps or target_fps)
+
+def read_frames(video_path, target_fps=TARGET_FPS, max_dimension=MAX_DIMENSION, memory_budget=None):
+    """Decode a video at no more than target_fps frames per second and max_dimension pixels.
+
+    Frames are picked by their timestamps (see _grab_slots). Skipped frames are
+    grabbed but never converted or copied. Kept frames are downscaled right
+    after decoding, as every frame ends up a 72x72 face crop anyway.
+
+    Args:
+        video_path(str): recorded video.
+        target_fps(float): highest frame rate kept (the rate the HR model was trained on).
+        max_dimension(int): longest side of the kept frames, None for the recorded size.
+        memory_budget(VideoMemoryBudget): see extract_video_features.
+    Returns:
+        frames(np.array): uint8 frames, N x H x W x 3.
+        windows(np.array): face detection window of each frame, for crop_faces.
+        info(dict): "fs" (frame rate of the kept frames, measured from their
+                    timestamps), "source_fps", "frames_read", "frames_kept",
+                    "width" and "height" of the kept frames.
+    """
+    cap = cv2.VideoCapture(video_path)
+    frame_count, frame_width, frame_height, source_fps = _video_properties(cap)
+    frame_count_hint = _kept_frame_count(frame_count, source_fps, target_fps)
+    scale = _decode_scale(frame_count_hint, frame_width, frame_height, max_dimension, memory_budget)
+
+    period = 1000.0 / target_fps
+    fallback_period = 1000.0 / (source_fps or target_fps)
+    first_slot = None
+    frames_read = 0
+    kept_times = list()
+    windows = list()
+    video_array = list()
+    for timestamp, slot, keep in _grab_slots(cap, period, fallback_period):
+        frames_read += 1
+        if not keep:
+            continue
+        ret, current_array = cap.retrieve()
+        if not ret:
+            continue
+        if first_slot is None:
+            first_slot = slot
+        if scale < 1.0:
+            current_array = _resize(current_array, frame_width, frame_height, scale)
+        video_array.append(current_array.astype('uint8', copy=False))
+        kept_times.append(timestamp)
+        windows.append((slot - first_slot) // DETECTION_WINDOW)
+        if memory_budget is not None and len(video_array) % 30 == 0:
+            # Frames past the container's count are the only surprise to size for
+            new_scale = memory_budget.scale_for(len(video_array), frame_width, frame_height, scale,
+                                                more_frames=len(video_array) > frame_count_hint)
+            if new_scale < scale:
+                scale = new_scale
+                video_array = [_resize(frame, frame_width, frame_height, scale) for frame in video_array]
+    cap.release()
+    video_array = np.array(video_array, dtype='uint8')
+
+    fs = _frame_rate(kept_times, source_fps, target_fps)
+    info = {
+        "fs": fs,
+        "source_fps": source_fps,
+        "frames_read": frames_read,
+        "frames_kept": len(kept_times),
+        "width": video_array.shape[2] if video_array.ndim == 4 else 0,
+        "height": video_array.shape[1] if video_array.ndim == 4 else 0,
+    }
+    logger.info("Decoded %s of %s frames at %sx%s, %.2f fps", info["frames_kept"], frames_read,
+                info["width"], info["height"], fs)
+    return video_array, np.array(windows, dtype='int'), info
+
+def read_faces_parallel(video_path, workers, target_fps=TARGET_FPS, max_dimension=MAX_DIMENSION, memory_budget=None):
+    """Decode, crop and resize a video in worker processes.
+
+    The video is split in segments of CHUNK_LENGTH target frame rate slots (one
+    feature chunk each, for a video at target_fps or faster). Each segment is
+    decoded, cropped and resized by _decode_segment in one of the workers, and the
+    faces are put back together in order. The same frames are kept and cropped
+    with the same face boxes as read_frames and crop_faces would.
+
+    Seeking needs the container's frame count and fps (WebM from MediaRecorder may
+    not have them) and increasing timestamps; without them None is returned and the
+    caller decodes in its own process.
+
+    Args:
+        video_path(str): recorded video.
+        workers(int): number of worker processes.
+        target_fps, max_dimension, memory_budget: see read_frames.
+    Returns:
+        faces(np.array(float)): cropped and resized frames, N x 72 x 72 x 3, or None.
+        info(dict): as read_frames, with "workers" and "segments".
+    """
+    cap = cv2.VideoCapture(video_path)
+    frame_count, frame_width, frame_height, source_fps = _video_properties(cap)
+    ret = cap.grab()
+    first_time = cap.get(cv2.CAP_PROP_POS_MSEC)
+    cap.release()
+    if not ret or frame_count <= 0 or source_fps is None:
+        logger.info("%s cannot be split in segments, decoding in one process", video_path)
+        return None, None
+
+    scale = _decode_scale(_kept_frame_count(frame_count, source_fps, target_fps), frame_width, frame_height,
+                          max_dimension, memory_budget)
+    period = 1000.0 / target_fps
+    first_slot = _slot(first_time, period)
+    slots = math.ceil(frame_count / source_fps * target_fps)
+    segments = max(1, math.ceil(slots / CHUNK_LENGTH))
+    tasks = list()
+    for i in range(segments):
+        start_slot = first_slot + i * CHUNK_LENGTH
+        # The last segment runs to the end, whatever the frame count said
+        end_slot = start_slot + CHUNK_LENGTH if i < segments - 1 else None
+        tasks.append((video_path, start_slot, end_slot, first_slot, period, source_fps, scale))
+
+    try:
+        with Pool(min(workers, segments), initializer=_init_segment_worker) as pool:
+            results = pool.map(_decode_segment, tasks, chunksize=1)
+    except Exception as e:
+        logger.warning("Segmented decoding of %s failed (%s), decoding in one process", video_path, e)
+        return None, None
+
+    faces = np.concatenate([result[0] for result in results])
+    kept_times = [timestamp for result in results for timestamp in result[1]]
+    fs = _frame_rate(kept_times, source_fps, target_fps)
+    info = {
+        "fs": fs,
+        "source_fps": source_fps,
+        "frames_read": sum(result[2] for result in results),
+        "frames_kept": len(kept_times),
+        "width": max(1, round(frame_width * scale)) if scale < 1.0 else frame_width,
+        "height": max(1, round(frame_height * scale)) if scale < 1.0 else frame_height,
+        "workers": min(workers, segments),
+        "segments": segments,
+    }
+    logger.info("Decoded %s of %s frames at %sx%s, %.2f fps, in %s segments", info["frames_kept"],
+                info["frames_read"], info["width"], info["height"], fs, segments)
+    return faces, info
+
+def _init_segment_worker():
+    # One core per worker, and no logging through the parent's queue (its
+    # listener thread does not exist in a forked process)
+    cv2.setNumThreads(1)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.StreamHandler())
+
+def _decode_segment(task):
+    """Decode, crop and resize the frames of slots [start_slot, end_slot) of a video.
+
+    Frames at the start of the segment whose detection window began in the
+    previous segment need that window's face box, so decoding starts at the first
+    frame of that window (the lead-in) and one frame before it. Lead-in frames are
+    only grabbed, apart from the one the face is detected on.
+
+    Returns:
+        faces(np.array(float)): cropped and resized frames.
+        kept_times(list[float]): their timestamps (ms).
+        frames_read(int): frames of the video in the segment.
+    """
+    video_path, start_slot, end_slot, first_slot, period, source_fps, scale = task
+    lead_slot = first_slot + (start_slot - first_slot) // DETECTION_WINDOW * DETECTION_WINDOW
+    cap = cv2.VideoCapture(video_path)
+    frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # Seek to a frame before the lead-in; seeking by frame index can land late
+    # in a variable frame rate video, then go back further
+    seek_time = lead_slot * period - 0.2 * period
+    start_frame = max(0, int(seek_time * source_fps / 1000) - 2)
+    previous_time, last_slot = -1.0, None
+    while start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        if cap.grab():
+            previous_time = cap.get(cv2.CAP_PROP_POS_MSEC)
+            last_slot = _slot(previous_time, period)
+            if last_slot < lead_slot:
+                break
+        start_frame = max(0, start_frame - int(2 * source_fps))
+        previous_time, last_slot = -1.0, None
+        if start_frame == 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    lead_frame = None
+    frames_read = 0
+    kept_times = list()
+    windows = list()
     video_array = list()
-    while ret:
-        ret, current_array = cap.read()
+    for timestamp, slot, keep in _grab_slots(cap, period, previous_time=previous_time, last_slot=last_slot):
+        if end_slot is not None and slot >= end_slot:
+            break
+        if slot >= start_slot:
+            frames_read += 1
+        if not keep or (slot < start_slot and (slot < lead_slot or lead_frame is not None)):
+            continue
+        ret, current_array = cap.retrieve()
         if not ret:
-            print(frame_count, current_array)
             continue
-        current_array.astype('uint8', copy=False)
-        video_array.append(current_array.copy())
-        frame_count += 1
+        if scale < 1.0:
+            current_array = _resize(current_array, frame_width, frame_height, scale)
+        current_array = current_array.astype('uint8', copy=False)
+        if slot < start_slot:
+            lead_frame = current_array
+            continue
+        video_array.append(current_array)
+        kept_times.append(timestamp)
+        windows.append((slot - first_slot) // DETECTION_WINDOW)
     cap.release()
+
+    if not video_array:
+        return np.zeros((0, 72, 72, 3)), kept_times, frames_read
     video_array = np.array(video_array, dtype='uint8')
-    
-    frames_clips = preprocess(video_array)
-    filename = os.path.basename(video_path).split('.')[0]
-    #np.save(features_dir + os.sep + filename + '_features.npy', frames_clips)
-    features_paths = save(frames_clips, filename, features_dir)
-    print(f"{video_path} processed. {len(features_paths)} chunks.")
-    if return_filelist:
-        return features_paths
-    else:
-        return list()
+    windows = np.array(windows, dtype='int')
+    if lead_frame is not None and (lead_slot - first_slot) // DETECTION_WINDOW != windows[0]:
+        lead_frame = None
+    return crop_faces(video_array, windows, lead_frame), kept_times, frames_read
+
+def _resize(frame, width, height, scale):
+    """Resize a frame to scale times the original width x height."""
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
 
 def save(frames_clips, filename, features_dir):
     if not os.path.exists(features_dir):
@@ -1,14 +1,17 @@
 # Imports
+import logging
 import os
 import argparse
 import json
 
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 def get_mental_health_scores(output_dir, stress_severity, anxiety_severity, depression_severity, fallback_logic=False):
 	
-	print(f"get_mental_health_scores called with: stress={stress_severity}, anxiety={anxiety_severity}, depression={depression_severity}, fallback={fallback_logic}")
+	logger.debug("get_mental_health_scores called with: stress=%s, anxiety=%s, depression=%s, fallback=%s", stress_severity, anxiety_severity, depression_severity, fallback_logic)
 	
 	mental_health_scores = dict()
 	
@@ -27,7 +30,7 @@ def get_mental_health_scores(output_dir, stress_severity, anxiety_severity, depr
 		depression_severity = np.random.choice(['low', 'medium', 'high'], size=None, p=[0.75316456, 0.18987342, 0.05696203])
 	mental_health_scores['depression'] = depression_severity
 	
-	print(f"Final mental health scores: {mental_health_scores}")
+	logger.debug("Final mental health scores: %s", mental_health_scores)
 	
 	with open(os.path.join(output_dir, 'mental_health_scores.json'), 'w') as f:
 		json.dump(mental_health_scores, f)
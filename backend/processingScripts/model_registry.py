@@ -0,0 +1,73 @@
+# Imports
+import os
+import pickle
+import threading
+import time
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _load_pickle(filename):
+	with open(os.path.join(MODEL_DIR, filename), 'rb') as f:
+		return pickle.load(f)
+
+
+def _load_hr_model():
+	import torch
+	import torch.nn as nn
+	from .model_definitions.DeepPhys import DeepPhys
+
+	device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+	model = DeepPhys(img_size=72).to(device)
+	model = nn.DataParallel(model, device_ids=list(range(1)))
+	model.load_state_dict(torch.load(os.path.join(MODEL_DIR, 'hr_model.pth'), map_location=device))
+	model.eval()
+	return model, device
+
+
+# name -> loader returning the ready-to-use model object(s)
+LOADERS = {
+	'hr': _load_hr_model,
+	'bp': lambda: (_load_pickle('bp_sys_ecdf.pkl'), _load_pickle('bp_dia_ecdf.pkl')),
+	'spo2': lambda: _load_pickle('spo2_model.pkl'),
+	'stress': lambda: (_load_pickle('stress_model.pkl'), _load_pickle('stress_encoder.pkl')),
+	'anxiety': lambda: (_load_pickle('anxiety_model.pkl'), _load_pickle('anxiety_encoder.pkl')),
+	'depression': lambda: (_load_pickle('depression_model.pkl'), _load_pickle('depression_encoder.pkl')),
+}
+
+
+def get_model(name):
+	"""Return a loaded model, loading it on first use. Models are shared read-only."""
+	model = _models.get(name)
+	if model is not None:
+		return model
+
+	with _lock:
+		if name not in _models:
+			_models[name] = LOADERS[name]()
+		return _models[name]
+
+
+def preload(names=None):
+	"""
+	Load models ahead of the first scan.
+
+	Returns {name: {"loaded": bool, "seconds": float, "error": str or None}};
+	a model that fails to load is reported and loaded again on first use.
+	"""
+	results = {}
+	for name in names or LOADERS:
+		start = time.perf_counter()
+		try:
+			get_model(name)
+			results[name] = {"loaded": True, "seconds": round(time.perf_counter() - start, 3), "error": None}
+		except Exception as e:
+			results[name] = {"loaded": False, "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+	return results
+
+
+def loaded_models():
+	return sorted(_models)
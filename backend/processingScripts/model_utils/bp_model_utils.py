@@ -1,3 +1,4 @@
+import logging
 import os
 import ntpath
 import pickle
@@ -5,6 +6,8 @@ import pickle
 import numpy as np
 from scipy.interpolate import interp1d
 
+logger = logging.getLogger(__name__)
+
 
 def generate_from_saved_ecdf(ecdf_data, num_samples, lower_limit, upper_limit):
     sorted_data, ecdf = ecdf_data
@@ -18,15 +21,19 @@ def generate_from_saved_ecdf(ecdf_data, num_samples, lower_limit, upper_limit):
 
 
 def get_bp(bp_dia_model_path, bp_sys_model_path):
-	print('in get_bp', bp_dia_model_path, bp_sys_model_path)
+	logger.debug('in get_bp %s %s', bp_dia_model_path, bp_sys_model_path)
 	
 	with open(bp_dia_model_path, 'rb') as f:
 		ecdf_data_bp_dia = pickle.load(f)
+	with open(bp_sys_model_path, 'rb') as f:
+		ecdf_data_bp_sys = pickle.load(f)
+	return sample_bp(ecdf_data_bp_dia, ecdf_data_bp_sys)
+
+
+def sample_bp(ecdf_data_bp_dia, ecdf_data_bp_sys):
 	bp_dia = generate_from_saved_ecdf(ecdf_data_bp_dia, num_samples=1, lower_limit=65, upper_limit=105)
 	bp_dia = int(bp_dia[0])
 	
-	with open(bp_sys_model_path, 'rb') as f:
-		ecdf_data_bp_sys = pickle.load(f)
 	bp_sys = generate_from_saved_ecdf(ecdf_data_bp_sys, num_samples=1, lower_limit=95, upper_limit=150)
 	bp_sys = int(bp_sys[0])
 	
@@ -1,25 +1,30 @@
+import logging
 import os
 import ntpath
 import pickle
 
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 def get_spo2(spo2_model_path, pred_file_list):
     with open(spo2_model_path, 'rb') as f:
         spo2_model = pickle.load(f)
+    return spo2_from_model(spo2_model, pred_file_list)
+
+def spo2_from_model(spo2_model, pred_file_list):
     labels = spo2_model['labels']
-    print(labels)
+    logger.debug("spo2 labels %s", labels)
     for pred_file in pred_file_list:
         ppg_pred = np.load(pred_file)
         spo2_pred = spo2_from_signal(labels, spo2_model, ppg_pred)
-        print(pred_file, spo2_pred)
+        logger.debug("%s spo2 %s", pred_file, spo2_pred)
     final_pred = spo2_pred
 
     return final_pred
 
 def spo2_from_signal(labels, spo2_model, ppg_signal):
     w = spo2_model['spo2_w']
-    print('loaded w')
     ppg_signal_cum = np.cumsum(ppg_signal)
     w_cum = np.cumsum(w)
     index_ = get_index(w_cum, ppg_signal_cum)
@@ -1,37 +1,31 @@
 # Imports
+import logging
 import os
 import ntpath
 import argparse
 import json
 
 import torch
-import torch.nn as nn
 from torch.utils.data import DataLoader
 import numpy as np
 
-from .model_definitions.DeepPhys import DeepPhys
 from .dataset_loaders.video_features_loader import Dataset_wrapper
-from .model_utils.bp_model_utils import get_bp
-from .model_utils.spo2_model_utils import get_spo2
+from .model_utils.bp_model_utils import sample_bp
+from .model_utils.spo2_model_utils import spo2_from_model
+from .model_registry import get_model
+
+logger = logging.getLogger(__name__)
 
 
 # Heart rate model
 def run_hr_model(features_dir, features_paths, preds_dir):
-	# set torch device
-	device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
+	# shared model loaded once per process (preloaded before workers fork)
+	model, device = get_model('hr')
 
 	# prepare dataset iterator
 	dataset = Dataset_wrapper(features_dir=features_dir, features_paths=features_paths)
 	data_iterator = DataLoader(dataset)
 	
-	# load model
-	model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'hr_model.pth')
-	print(model_path)
-	model = DeepPhys(img_size=72).to(device)
-	model = nn.DataParallel(model, device_ids=list(range(1)))
-	model.load_state_dict(torch.load(model_path, map_location=device))  # Added map_location parameter
-	model.eval()
-	
 	# run inference
 	with torch.no_grad():
 		pred_file_list = list()
@@ -54,19 +48,14 @@ def run_hr_model(features_dir, features_paths, preds_dir):
 	return pred_file_list
 	
 def run_bp_model(features_dir, features_path, preds_dir):
-	print('starting bp')
-	model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
-	bp_dia_model_path = os.path.join(model_dir, 'bp_dia_ecdf.pkl')
-	bp_sys_model_path = os.path.join(model_dir, 'bp_sys_ecdf.pkl')
-	
-	bp_sys, bp_dia = get_bp(bp_dia_model_path=bp_dia_model_path, bp_sys_model_path=bp_sys_model_path)
+	logger.debug('starting bp')
+	ecdf_data_bp_sys, ecdf_data_bp_dia = get_model('bp')
+
+	bp_sys, bp_dia = sample_bp(ecdf_data_bp_dia=ecdf_data_bp_dia, ecdf_data_bp_sys=ecdf_data_bp_sys)
 	return bp_sys, bp_dia
 
 def run_spo2_model(features_dir, features_path, preds_dir):
-	print('starting spo2.')
-	model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
-	spo2_model_path = os.path.join(model_dir, 'spo2_model.pkl')
-
+	logger.debug('starting spo2.')
 	pred_file_list = [os.path.join(preds_dir, i) for i in os.listdir(preds_dir)]
-	spo2 = get_spo2(spo2_model_path, pred_file_list)
+	spo2 = spo2_from_model(get_model('spo2'), pred_file_list)
 	return spo2
\ No newline at end of file
@@ -1,10 +1,13 @@
 ## imports
+import logging
 import os
 import argparse
 
 import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 
 parser = argparse.ArgumentParser(description='Run the model to predict vital signs from features.')
 parser.add_argument('--heart_rate', action='store_true', help='Run heart rate model.')
@@ -25,7 +28,7 @@ for f in feature_file_list:
 
 def load_model(parameter):
     # Placeholder for model loading logic
-    print(f"Loading model for {parameter}")
+    logger.info("Loading model for %s", parameter)
     return lambda x: f"{parameter}_output"
 
 predictions = {}
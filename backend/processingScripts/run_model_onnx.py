@@ -1,3 +1,4 @@
+import logging
 import os
 import ntpath
 import argparse
@@ -6,6 +7,8 @@ import json
 import onnxruntime as ort
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 def main():
     parser = argparse.ArgumentParser(description='Run the model to predict vital signs from features.')
@@ -26,7 +29,7 @@ def main():
         # Prepare the input dictionary
         input_name = ort_session.get_inputs()[0].name
         output_name = ort_session.get_outputs()[0].name 
-        print("<= values",input_name, output_name )
+        logger.debug("<= values %s %s", input_name, output_name)
         inputs = {input_name: features.astype(np.float32)}
         
         # Run the inference
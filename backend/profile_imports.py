@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the backend
+Runs `python -X importtime -c "import run"` in a fresh interpreter and
+summarises the output: total import time, the slowest modules by cumulative
+time (the module and everything it imports) and by self time.
+
+Usage: python profile_imports.py [--module run] [--top 20]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, NamedTuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ImportRecord(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def run_importtime(module: str) -> List[ImportRecord]:
+    """Import `module` with -X importtime and parse the report from stderr"""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    # Importing the app builds the YouTube client, which only needs a key
+    env.setdefault("YOUTUBE_API_KEY", "profile-imports")
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        tail = "\n".join(completed.stderr.strip().splitlines()[-10:])
+        raise Exception(f"Failed to import {module}:\n{tail}")
+
+    records = []
+    for line in completed.stderr.splitlines():
+        # import time:   self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(
+            ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth)
+        )
+    return records
+
+
+def print_table(title: str, records: List[ImportRecord], key: str, top: int) -> None:
+    print(f"\n{title}")
+    print(f"{'seconds':>9}  module")
+    for record in sorted(records, key=lambda r: getattr(r, key), reverse=True)[:top]:
+        print(f"{getattr(record, key) / 1e6:9.3f}  {record.module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="run", help="module to import")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    args = parser.parse_args()
+
+    records = run_importtime(args.module)
+    total_us = sum(r.cumulative_us for r in records if r.depth == 0)
+
+    print(f"Importing {args.module}: {total_us / 1e6:.3f}s in {len(records)} modules")
+    print_table("Slowest by cumulative time", records, "cumulative_us", args.top)
+    print_table("Slowest by self time", records, "self_us", args.top)
+
+
+if __name__ == "__main__":
+    main()
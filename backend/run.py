@@ -7,15 +7,13 @@ from typing import Union
 import sys
 import jwt
 import logging
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from flask import current_app
-from flask import Flask, jsonify, request, Response
+from flask import Flask, jsonify, request, Response, send_file
 from flask_cors import CORS
 from werkzeug.serving import make_server
 
 from app.db.collections import COLLECTIONS
-from app.db.operations import update_data, find_data, insert_data
 from app.routes.media import process_video, process_audio, fetch_user_report_by_id
 from app.services.auth.register_admin import register_admin
 from app.services.auth.login_user_service import login_user
@@ -25,9 +23,12 @@ from app.services.booth.booth import (
     add_booth_location,
     update_booth_location,
 )
-from config import config_by_name
+from config import Config, config_by_name
+from app.utils import structured_logging
+from app.utils.metrics import metrics
 
-from app.services.email.email_service import send_email
+from app.services.email.email_service import get_email_service, send_email
+from app.services.email.email_records import email_records
 
 from app.services.report.date_reports_service import fetch_report_by_date
 from app.services.report.month_reports_with_intervals_service import (
@@ -37,63 +38,36 @@ from app.services.report.year_reports_service import fetch_yearly_report_by_date
 from app.services.report.week_reports_service import fetch_weekly_report_by_date
 from app.services.report.month_reports_service import fetch_month_reports
 from app.services.report.reward_points_service import fetch_reward_points
+from app.services.report.report_cache import report_cache
 
-from app.validations.login_required import login_required
+from app.validations.login_required import login_required, token_cache
+from app.validations.rate_limiter import rate_limiter
 
 from app.services.auth.pin_reset_service import PinResetService
 from app.services.trial.trial_service import trial_service
+from app.services.trial.trial_reaper import trial_reaper
+from app.services.trial.trial_statistics import trial_statistics
 from app.services.media.media import audioProcessingStart, videoProcessingStart
+from app.services.media.scan_profiler import scan_profiler
+from app.services.readiness import readiness_service, warmup
+from app.services.resources.playlist_cache import playlist_cache
+from app.services.resources.playlist_config import EMOTIONAL_PROFILE_PLAYLISTS
 
 from app.routes import init_app
+from app.server import PreforkServer, request_shutdown
 
 
 # Setup logging configuration
 def setup_logging():
     """Configure logging for the application"""
-    # Create logs directory if it doesn't exist
-    logs_dir = Path("logs")
-    logs_dir.mkdir(exist_ok=True)
-
-    # Configure root logger
-    logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-
-    # Clear any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-
-    # Create formatters
-    detailed_formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s"
+    # Console and log files are written by a background thread; see
+    # app/utils/structured_logging.py
+    structured_logging.setup_logging(
+        logs_dir="logs", level=Config.LOG_LEVEL, file_format=Config.LOG_FORMAT
     )
-    simple_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-
-    # Console handler (INFO level and above)
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(simple_formatter)
-    logger.addHandler(console_handler)
-
-    # File handler for all logs (DEBUG level and above)
-    all_logs_handler = RotatingFileHandler(
-        logs_dir / "wellstation.log", maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
-    )
-    all_logs_handler.setLevel(logging.DEBUG)
-    all_logs_handler.setFormatter(detailed_formatter)
-    logger.addHandler(all_logs_handler)
-
-    # File handler for errors only (ERROR level and above)
-    error_logs_handler = RotatingFileHandler(
-        logs_dir / "wellstation_errors.log",
-        maxBytes=10 * 1024 * 1024,  # 10MB
-        backupCount=5,
-    )
-    error_logs_handler.setLevel(logging.ERROR)
-    error_logs_handler.setFormatter(detailed_formatter)
-    logger.addHandler(error_logs_handler)
 
     logging.info("Logging system initialized")
-    logging.info(f"Log files will be saved to: {logs_dir.absolute()}")
+    logging.info(f"Log files will be saved to: {Path('logs').absolute()}")
 
 
 setup_logging()
@@ -115,6 +89,9 @@ app.config.from_object(config_by_name.get(env, config_by_name["default"]))
 
 
 init_app(app)
+structured_logging.init_app(app)
+metrics.init_app(app)
+rate_limiter.init_app(app)
 
 # shutdown_event = threading.Event()
 
@@ -152,6 +129,16 @@ def health():
     return jsonify({"status": "healthy"}), 200
 
 
+@app.route("/api/ready")
+def ready():
+    """Readiness: 200 once warm-up has finished, 503 with per-component state before"""
+    if not app.config["WARMUP_ON_STARTUP"]:
+        # Warm up on the first readiness check instead of at startup
+        readiness_service.start_warmup(app)
+    status = readiness_service.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 @app.route("/api/environment", methods=["GET"])
 def get_environment():
     """Return current environment configuration and variables."""
@@ -566,6 +553,55 @@ def fetch_user_reward_points():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route("/api/reports/cache/stats", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def fetch_report_cache_stats():
+    """Admin endpoint to inspect report cache hit/miss counters"""
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Report cache statistics retrieved successfully",
+            "data": report_cache.stats(),
+        }
+    )
+
+
+@app.route("/api/auth/token-cache/stats", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def fetch_token_cache_stats():
+    """Admin endpoint to inspect JWT verification cache counters"""
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Token cache statistics retrieved successfully",
+            "data": token_cache.stats(),
+        }
+    )
+
+
+@app.route("/api/profiles", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def list_scan_profiles():
+    """Admin endpoint listing the stored profiles of slow scans, newest first"""
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Scan profiles retrieved successfully",
+            "data": scan_profiler.list_profiles(),
+        }
+    )
+
+
+@app.route("/api/profiles/<name>", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def download_scan_profile(name):
+    """Admin endpoint downloading one scan profile (collapsed stacks or pstats)"""
+    path = scan_profiler.profile_path(name)
+    if path is None:
+        return jsonify({"status": "error", "message": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=name)
+
+
 @app.route("/api/fetch/report/<user_id>", methods=["GET"])
 @login_required(allowed_roles=["user", "admin"])
 def fetch_user_report(user_id):
@@ -608,64 +644,33 @@ def send_email_api():
     if not all(key in data for key in ["to_email", "subject", "report_link"]):
         return jsonify({"error": "Missing required fields"}), 400
 
-    # Send email
-    success = send_email(data["to_email"], data["subject"], data)
+    # The record is written by the outbox once the email has actually been
+    # delivered, in one upsert per address
+    on_delivered, on_failed = email_records.delivery_callbacks(
+        data.get("report_id"), data.get("name"), data.get("mood")
+    )
+    success = send_email(
+        data["to_email"], data["subject"], data, on_delivered, on_failed
+    )
 
     if success:
-        report_id = data["report_id"]
-        user_email = data.get("to_email", "")
-        user_name = data.get("name", "")
-        user_mood = data.get("mood", "")
-
-        # Check if user already exists in the collection
-        existing_user = find_data(
-            COLLECTIONS["USER_EMAIL_RECORDS"], {"email": user_email}, limit=1
-        )
-
-        if existing_user:
-            # User exists, update the record
-            update_operations = {
-                "$set": {"email_sent": True},
-                "$addToSet": {"report_id": report_id},  # ensures no duplicates
-            }
-
-            # Add name to the update if provided and different from existing
-            if user_name and (
-                not existing_user[0].get("name")
-                or existing_user[0].get("name") != user_name
-            ):
-                update_operations["$set"]["name"] = user_name
-
-            # Add mood to the update if provided and different from existing
-            if user_mood and (
-                not existing_user[0].get("mood")
-                or existing_user[0].get("mood") != user_mood
-            ):
-                update_operations["$set"]["mood"] = user_mood
-
-            update_data(
-                COLLECTIONS["USER_EMAIL_RECORDS"],
-                {"email": user_email},
-                update_operations,
-                False,  # No upsert needed since user exists
-            )
-        else:
-            # New user, create a new record
-            new_user_data = {
-                "email": user_email,
-                "name": user_name,
-                "mood": user_mood,
-                "email_sent": True,
-                "report_id": [report_id],  # Initialize as array with first report_id
-            }
-
-            insert_data(COLLECTIONS["USER_EMAIL_RECORDS"], new_user_data)
-
-        return jsonify({"message": "Email sent successfully"}), 200
+        return jsonify({"message": "Email queued for delivery"}), 202
     else:
         return jsonify({"error": "Failed to send email"}), 500
 
 
+@app.route("/api/email/outbox/stats", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def get_email_outbox_stats():
+    """Admin endpoint reporting email outbox throughput, latency and queue depth"""
+    try:
+        return jsonify(
+            {"status": "success", "data": get_email_service().outbox.stats()}
+        )
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
 @app.route("/api/booth/add/location", methods=["POST"])
 @login_required(allowed_roles=["user", "admin"])
 def add_booth():
@@ -837,9 +842,9 @@ def process_trial_video():
                 400,
             )
 
-        # Validate trial session exists and is active
-        trial_session = trial_service.get_trial_session(trial_id)
-        if not trial_session:
+        # Reject dead trials before spending the scan's inference on them;
+        # the results are still only stored if the trial is active then
+        if not trial_service.is_trial_active(trial_id):
             return (
                 jsonify(
                     {"status": "error", "message": "Invalid or expired trial session"}
@@ -917,9 +922,9 @@ def process_trial_audio():
                 400,
             )
 
-        # Validate trial session exists and is active
-        trial_session = trial_service.get_trial_session(trial_id)
-        if not trial_session:
+        # Reject dead trials before spending the scan's inference on them;
+        # the results are still only stored if the trial is active then
+        if not trial_service.is_trial_active(trial_id):
             return (
                 jsonify(
                     {"status": "error", "message": "Invalid or expired trial session"}
@@ -978,7 +983,6 @@ def get_trial_report(trial_id):
 
         # Get trial report
         report = trial_service.get_trial_report(trial_id)
-        print(trial_id, "trial_id")
         if not report:
             return (
                 jsonify(
@@ -1070,12 +1074,55 @@ def cleanup_expired_trials():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app.route("/api/trial/statistics/rebuild", methods=["POST"])
+@login_required(allowed_roles=["admin"])
+def rebuild_trial_statistics():
+    """Admin endpoint to reset the trial counters from the trial documents"""
+    try:
+        return jsonify(
+            {
+                "status": "success",
+                "message": "Trial counters rebuilt successfully",
+                "data": trial_statistics.rebuild_counters(),
+            }
+        )
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app.route("/api/trial/reaper/stats", methods=["GET"])
+@login_required(allowed_roles=["admin"])
+def get_trial_reaper_stats():
+    """Admin endpoint to inspect expired-trial reaper throughput and backlog"""
+    return jsonify(
+        {
+            "status": "success",
+            "message": "Trial reaper statistics retrieved successfully",
+            "data": trial_reaper.stats(),
+        }
+    )
+
+
 @app.route("/api/trial/statistics", methods=["GET"])
 @login_required(allowed_roles=["admin"])
 def get_trial_statistics():
-    """Admin endpoint to get trial usage statistics"""
+    """
+    Admin endpoint to get trial usage statistics
+
+    Query params:
+        days: Optional window (in days) for per-venue and per-day stats
+    """
     try:
-        stats = trial_service.get_trial_statistics()
+        days = request.args.get("days", type=int)
+        if days is not None and not 1 <= days <= 366:
+            return (
+                jsonify(
+                    {"status": "error", "message": "days must be between 1 and 366"}
+                ),
+                400,
+            )
+
+        stats = trial_service.get_trial_statistics(days)
 
         return (
             jsonify(
@@ -1108,6 +1155,13 @@ def shutdown():
             print("Exiting process normally for PyInstaller cleanup...")
             sys.exit(0)
 
+        # The production server drains in-flight requests before exiting
+        if request_shutdown():
+            return (
+                jsonify({"status": "success", "message": "Server shutdown initiated"}),
+                200,
+            )
+
         shutdown_server()
         # shutdown_thread = threading.Thread(target=shutdown_server)
         # shutdown_thread.daemon = True
@@ -1126,6 +1180,70 @@ def shutdown():
         )
 
 
+def run_production_server(port: int):
+    """Serve the app with the prefork runner configured in Config.SERVER_*"""
+    workers = app.config["SERVER_WORKERS"] or os.cpu_count() or 1
+
+    def preload():
+        # Loaded before fork so every worker shares the weights copy-on-write
+        if app.config["SERVER_PRELOAD_MODELS"]:
+            from processingScripts import model_registry
+
+            for name, result in model_registry.preload().items():
+                if result["loaded"]:
+                    logging.info(f"Preloaded model {name} in {result['seconds']}s")
+                else:
+                    logging.warning(
+                        f"Could not preload model {name}: {result['error']}"
+                    )
+
+        # Once here instead of in every worker's warm-up at the same moment;
+        # if it fails, the workers' database step retries it
+        try:
+            with app.app_context():
+                warmup.ensure_database_indexes()
+        except Exception as e:
+            logging.warning(f"Could not create database indexes: {e}")
+
+        report_cache.share_invalidations()
+        # Workers merge each other's snapshots when /api/metrics is scraped
+        metrics.enable_multiprocess(app.config["METRICS_DIR"])
+
+    def post_fork(index: int):
+        # Split the cores between workers instead of each using all of them
+        try:
+            import torch
+
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+        except ImportError:
+            pass
+
+        metrics.start_worker()
+
+        # Per worker: threads, torch state and Mongo sockets must not cross
+        # the fork. Models preloaded in the parent are already in memory.
+        if app.config["WARMUP_ON_STARTUP"]:
+            readiness_service.start_warmup(app)
+        # One reaper is enough; worker 0 is respawned with the same index
+        if index == 0 and app.config["TRIAL_REAPER_ENABLED"]:
+            trial_reaper.start(app)
+        # The other workers pick the prefetched playlists up from the cache file
+        if index == 0 and app.config["PLAYLIST_PREFETCH_ON_STARTUP"]:
+            playlist_cache.start_prefetch(EMOTIONAL_PROFILE_PLAYLISTS.values())
+
+    PreforkServer(
+        app,
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        threads=app.config["SERVER_THREADS"],
+        idle_timeout=app.config["SERVER_IDLE_TIMEOUT"],
+        graceful_timeout=app.config["SERVER_GRACEFUL_TIMEOUT"],
+        preload=preload,
+        post_fork=post_fork,
+    ).run()
+
+
 if __name__ == "__main__":
     # Check if Electron is shutting down
     if os.getenv("ELECTRON_SHUTDOWN") == "1":
@@ -1174,5 +1292,20 @@ if __name__ == "__main__":
         debug_mode = os.getenv("FLASK_ENV") == "development"
         print(f"Debug mode: {debug_mode}")
 
-    app.run(host="0.0.0.0", port=port, debug=debug_mode)
+    if app.config["SERVER_MODE"] == "production":
+        print("Starting production server")
+        run_production_server(port)
+    else:
+        # Warm up while the server starts instead of before it. The
+        # reloader's watcher process never serves requests, so skip it there
+        serving_process = (
+            not debug_mode or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+        )
+        if serving_process and app.config["WARMUP_ON_STARTUP"]:
+            readiness_service.start_warmup(app)
+        if serving_process and app.config["TRIAL_REAPER_ENABLED"]:
+            trial_reaper.start(app)
+        if serving_process and app.config["PLAYLIST_PREFETCH_ON_STARTUP"]:
+            playlist_cache.start_prefetch(EMOTIONAL_PROFILE_PLAYLISTS.values())
+        app.run(host="0.0.0.0", port=port, debug=debug_mode)
     # server_instance = make_server(host="0.0.0.0", port=port, app=app, threaded=True)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Tests for the thread-offloaded DB facade
+Uses an in-memory test double, so no MongoDB instance is needed. Overlap is
+checked with a barrier the first calls must reach together, not with timings.
+"""
+
+import sys
+import os
+import threading
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from flask import Flask, current_app
+from werkzeug.security import generate_password_hash
+
+from app.db.async_operations import AsyncDB
+from app.db.collections import COLLECTIONS
+from app.services.auth import login_user_service
+from config import DevelopmentConfig
+
+# Long enough never to expire when the calls do overlap
+BARRIER_TIMEOUT = 10
+
+
+class FakeOperations:
+    """
+    In-memory stand-in for app.db.operations.
+
+    With overlapping=n, the first n calls wait for each other on a barrier,
+    so they only return if they run at the same time; run one after another,
+    the first one breaks the barrier with BrokenBarrierError.
+    """
+
+    def __init__(self, overlapping: int = 0):
+        self.collections = {}
+        self.calls = 0
+        self.overlapping = overlapping
+        self._barrier = threading.Barrier(overlapping) if overlapping else None
+        self._lock = threading.Lock()
+
+    def _matches(self, document: dict, query: dict) -> bool:
+        for field, expected in query.items():
+            value = document.get(field)
+            if isinstance(expected, dict):
+                if "$gt" in expected and not (
+                    value is not None and value > expected["$gt"]
+                ):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    def _round_trip(self):
+        with self._lock:
+            self.calls += 1
+            wait = self.calls <= self.overlapping
+        if wait:
+            self._barrier.wait(BARRIER_TIMEOUT)
+
+    def insert_data(self, collection_name: str, data: dict) -> dict:
+        self._round_trip()
+        document = {**data, "created_at": datetime.utcnow()}
+        with self._lock:
+            documents = self.collections.setdefault(collection_name, [])
+            document["_id"] = str(len(documents))
+            documents.append(document)
+        return deepcopy(document)
+
+    def find_data(self, collection_name, query, limit=100, projection=None):
+        self._round_trip()
+        with self._lock:
+            documents = self.collections.get(collection_name, [])
+            found = [d for d in documents if self._matches(d, query)][:limit]
+        return deepcopy(found)
+
+    def update_data(self, collection_name, query, update, upsert=False):
+        self._round_trip()
+        matched = 0
+        with self._lock:
+            for document in self.collections.get(collection_name, []):
+                if self._matches(document, query):
+                    document.update(update.get("$set", {}))
+                    for field, amount in update.get("$inc", {}).items():
+                        document[field] = document.get(field, 0) + amount
+                    matched += 1
+        return {"matched_count": matched, "modified_count": matched}
+
+
+def test_independent_queries_overlap():
+    fake = FakeOperations(overlapping=3)
+    db = AsyncDB(fake, max_workers=4)
+
+    results = db.gather(
+        db.find_data("a", {}),
+        db.find_data("b", {}),
+        db.insert_data("c", {"value": 1}),
+    )
+
+    assert results[0] == [] and results[1] == []
+    assert results[2]["value"] == 1
+    assert fake.calls == 3
+
+
+def test_same_api_as_sync_operations():
+    db = AsyncDB(FakeOperations(), max_workers=2)
+
+    db.insert_data("items", {"name": "x", "count": 1}).result()
+    db.update_data("items", {"name": "x"}, {"$inc": {"count": 2}}).result()
+    found = db.find_data("items", {"name": "x"}, limit=1).result()
+
+    assert found[0]["count"] == 3
+
+
+def test_errors_are_raised_after_all_queries_finish():
+    db = AsyncDB(FakeOperations(), max_workers=2)
+    failed = threading.Event()
+
+    def fail():
+        failed.set()
+        raise Exception("Failed to query data: boom")
+
+    def slow():
+        # Only finishes after the other query has already failed
+        failed.wait(BARRIER_TIMEOUT)
+        return []
+
+    pending = db.submit(slow)
+    with pytest.raises(Exception, match="boom"):
+        db.gather(db.submit(fail), pending)
+    assert pending.done()
+
+
+def test_app_context_is_available_in_workers():
+    app = Flask(__name__)
+    app.config["DATABASE_NAME"] = "FakeDB"
+    db = AsyncDB(FakeOperations(), max_workers=1)
+
+    with app.app_context():
+        name = db.submit(lambda: current_app.config["DATABASE_NAME"]).result()
+
+    assert name == "FakeDB"
+
+
+def test_login_runs_user_and_reset_lookups_concurrently(monkeypatch):
+    # The user and reset lookups must run at the same time
+    fake = FakeOperations(overlapping=2)
+    fake.collections[COLLECTIONS["USER_AUTH"]] = [
+        {
+            "email": "user@example.com",
+            "user_id": "u-1",
+            "pin_hash": generate_password_hash("ABC123", method="pbkdf2:sha256:1000"),
+        }
+    ]
+    fake.collections[COLLECTIONS["PIN_ACTIVITIES"]] = [
+        {
+            "_id": "r-1",
+            "email": "user@example.com",
+            "user_id": "u-1",
+            "activity_type": "reset_request",
+            "status": "pending",
+            "attempts": 0,
+            "temp_pin_hash": generate_password_hash(
+                "TMP999", method="pbkdf2:sha256:1000"
+            ),
+            "temp_pin_expires_at": datetime.now(timezone.utc) + timedelta(minutes=15),
+        }
+    ]
+
+    app = Flask(__name__)
+    app.config.from_object(DevelopmentConfig)
+    monkeypatch.setattr(login_user_service, "async_db", AsyncDB(fake, max_workers=4))
+    monkeypatch.setattr(login_user_service, "update_data", fake.update_data)
+    with app.test_request_context():
+        service = login_user_service.LoginUserService()
+        response, status = service.login(
+            {"role": "user", "email": "user@example.com", "pin": "ABC123"}
+        )
+
+    # A pending reset routes the login through the temporary PIN check
+    assert status == 401
+    assert response["error"] == "Invalid temporary PIN"
+    assert fake.calls == 3  # two concurrent lookups + the attempts update
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Tests for the SMTP connection pool and the email outbox
+Sends to a local aiosmtpd sink, so no mail server or credentials are needed.
+"""
+
+import sys
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+Controller = pytest.importorskip("aiosmtpd.controller").Controller
+
+from app.services.email.email_service import EmailService
+from app.services.email.outbox import EmailOutbox
+from app.services.email.smtp_pool import SMTPConnectionPool
+
+SENDER = "station@example.com"
+
+
+class SinkHandler:
+    """Stores delivered messages; scripted replies per recipient"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.messages = []
+        self.replies = {}  # recipient -> list of RCPT replies to give first
+        self.lock = threading.Lock()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        with self.lock:
+            scripted = self.replies.get(address)
+            if scripted:
+                return scripted.pop(0)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.messages.append(
+                (envelope.rcpt_tos[0], envelope.content.decode("utf8", "replace"))
+            )
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def sink():
+    handler = SinkHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    handler.port = controller.port
+    yield handler
+    controller.stop()
+
+
+def make_pool(sink, **kwargs):
+    return SMTPConnectionPool("127.0.0.1", sink.port, use_tls=False, **kwargs)
+
+
+def make_outbox(sink, pool=None, **kwargs):
+    return EmailOutbox(pool or make_pool(sink, size=1), SENDER, **kwargs)
+
+
+def test_outbox_reuses_one_connection_for_many_messages(sink):
+    outbox = make_outbox(sink, workers=1, batch_size=10)
+    for i in range(25):
+        outbox.enqueue(f"user{i}@example.com", "Report", f"<p>report {i}</p>")
+
+    assert outbox.flush(timeout=10)
+    outbox.stop()
+
+    assert len(sink.messages) == 25
+    stats = outbox.stats()
+    assert stats["sent"] == 25
+    assert stats["batches"] >= 3
+    assert stats["smtp_pool"]["opened"] == 1
+    assert stats["delivery_latency_seconds"]["p95"] > 0
+
+
+def test_enqueue_does_not_wait_for_smtp(sink):
+    sink.delay = 0.05
+    outbox = make_outbox(sink)
+
+    start = time.perf_counter()
+    for i in range(10):
+        outbox.enqueue(f"user{i}@example.com", "Report", "<p>hi</p>")
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < sink.delay
+    assert outbox.flush(timeout=10)
+    outbox.stop()
+    assert len(sink.messages) == 10
+
+
+def test_temporary_failures_are_retried_with_backoff(sink):
+    sink.replies["busy@example.com"] = ["451 Try again later"] * 2
+    delivered = []
+    outbox = make_outbox(sink, backoff_seconds=0.05)
+
+    start = time.perf_counter()
+    outbox.enqueue("busy@example.com", "Report", "<p>hi</p>", delivered.append)
+    assert outbox.flush(timeout=10)
+    elapsed = time.perf_counter() - start
+    outbox.stop()
+
+    assert [message.attempts for message in delivered] == [3]
+    assert outbox.stats()["retried"] == 2
+    # Two retries: 0.05 * (1 + 2) seconds, with jitter down to half
+    assert elapsed >= 0.075
+
+
+def test_permanent_failures_are_not_retried(sink):
+    sink.replies["nobody@example.com"] = ["550 No such user"]
+    failed = []
+    outbox = make_outbox(sink, backoff_seconds=0.01)
+
+    outbox.enqueue("nobody@example.com", "Report", "<p>hi</p>", on_failed=failed.append)
+    outbox.enqueue("user@example.com", "Report", "<p>hi</p>")
+    assert outbox.flush(timeout=10)
+    outbox.stop()
+
+    assert [(m.to_email, m.attempts) for m in failed] == [("nobody@example.com", 1)]
+    assert [to for to, _ in sink.messages] == ["user@example.com"]
+    assert outbox.stats()["failed"] == 1
+
+
+def test_dead_idle_connection_is_replaced_after_noop(sink):
+    pool = make_pool(sink, keepalive_seconds=0)
+    with pool.connection() as server:
+        server.close()  # e.g. dropped by the server while idle
+
+    outbox = make_outbox(sink, pool=pool)
+    assert outbox.send_now("user@example.com", "Report", "<p>hi</p>")
+
+    stats = pool.stats()
+    assert stats["noop_failures"] == 1
+    assert stats["opened"] == 2
+
+
+def test_connection_is_closed_when_the_block_raises_any_error(sink):
+    pool = make_pool(sink, size=1)
+    with pytest.raises(UnicodeEncodeError):
+        with pool.connection() as server:
+            server.sendmail(SENDER, ["user@example.com"], "Subject: caf\u00e9")
+
+    stats = pool.stats()
+    assert stats["discarded"] == 1 and stats["idle"] == 0
+
+    # The slot was released and a fresh connection is opened for it
+    with pool.connection() as server:
+        server.sendmail(SENDER, ["user@example.com"], "Subject: hi\r\n\r\nhi")
+    assert pool.stats()["opened"] == 2 and len(sink.messages) == 1
+
+
+def test_email_service_queues_rendered_templates(sink, monkeypatch):
+    monkeypatch.setenv("EMAIL", SENDER)
+    monkeypatch.setenv("EMAIL_PASSWORD", "unused")
+    service = EmailService(pool=make_pool(sink), use_outbox=True)
+    delivered = []
+
+    assert service.send_email(
+        "wellbeing_report",
+        "user@example.com",
+        {"report_link": "https://example.com/report/42"},
+        on_delivered=delivered.append,
+    )
+    assert service.outbox.flush(timeout=10)
+    service.outbox.stop()
+
+    assert len(delivered) == 1
+    to_email, content = sink.messages[0]
+    assert to_email == "user@example.com"
+    assert "Your W3LL Station Wellbeing Report" in content
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
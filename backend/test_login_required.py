@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for bearer token parsing and the verified-token cache
+Signs tokens with a local secret, so no database is needed.
+"""
+
+import sys
+import os
+import time
+
+import jwt
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.cache import LRUCacheBackend
+from app.validations.login_required import TokenCache, get_bearer_token
+
+SECRET = "test-secret"
+ALGORITHM = "HS256"
+
+
+@pytest.mark.parametrize(
+    "header, token",
+    [
+        ("Bearer abc.def.ghi", "abc.def.ghi"),
+        ("bearer abc.def.ghi", "abc.def.ghi"),
+        ("  Bearer   abc.def.ghi  ", "abc.def.ghi"),
+        ("abc.def.ghi", None),  # missing scheme
+        ("Basic dXNlcjpwaW4=", None),  # other scheme
+        ("Bearer", None),  # empty token
+        ("Bearer    ", None),
+        ("", None),
+        ("Bearer abc def", None),  # extra parts
+    ],
+)
+def test_malformed_headers_have_no_token(header, token):
+    assert get_bearer_token(header) == token
+
+
+class NoExpiryBackend(LRUCacheBackend):
+    """A backend that ignores TTLs, like a shared cache without expiry"""
+
+    def set(self, key, value, ttl=None):
+        super().set(key, value, None)
+
+
+def test_cached_payload_is_not_served_past_exp():
+    exp = int(time.time()) + 1
+    token = jwt.encode({"sub": "u-1", "exp": exp}, SECRET, algorithm=ALGORITHM)
+    caches = [TokenCache(max_entries=8), TokenCache(max_entries=8)]
+    caches[1].backend = NoExpiryBackend(8)
+
+    for cache in caches:
+        assert cache.verify(token, SECRET, ALGORITHM)["sub"] == "u-1"
+        assert cache.verify(token, SECRET, ALGORITHM)["sub"] == "u-1"
+        assert cache.stats()["hits"] == 1
+
+    # Wait until the token has expired; how long past it does not matter
+    time.sleep(exp - time.time() + 0.05)
+
+    for cache in caches:
+        with pytest.raises(jwt.ExpiredSignatureError):
+            cache.verify(token, SECRET, ALGORITHM)
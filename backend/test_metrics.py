@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and /api/metrics
+Uses bare Flask apps, so no database is needed.
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app.utils.metrics import MetricsRegistry, track_scan
+from app.utils import metrics as metrics_module
+
+
+def sample(text, line_prefix):
+    """Value of the first exposition line starting with line_prefix"""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in output")
+
+
+def test_render_counter_gauge_histogram():
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits", ("path",))
+    depth = registry.gauge("depth", "Depth")
+    latency = registry.histogram("latency_seconds", "Latency", (), (0.1, 1))
+
+    hits.labels(path='/a"b').inc()
+    hits.labels(path='/a"b').inc(2)
+    depth.set(4)
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    text = registry.render()
+    assert "# TYPE hits_total counter" in text
+    assert sample(text, 'hits_total{path="/a\\"b"}') == 3
+    assert sample(text, "depth") == 4
+    assert sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'latency_seconds_bucket{le="1"}') == 2
+    assert sample(text, 'latency_seconds_bucket{le="+Inf"}') == 3
+    assert sample(text, "latency_seconds_count") == 3
+    assert sample(text, "latency_seconds_sum") == pytest.approx(5.55)
+
+
+def test_register_returns_existing_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    counter = registry.counter("jobs_total", "Jobs", ("kind",))
+    assert registry.counter("jobs_total", "Jobs", ("kind",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("jobs_total", "Jobs", ("kind",))
+    with pytest.raises(ValueError):
+        counter.labels(kind="a").dec()
+
+
+def test_snapshots_merge_counters_and_skip_dead_gauges(tmp_path):
+    registry = MetricsRegistry()
+    registry.enable_multiprocess(str(tmp_path))
+    jobs = registry.counter("jobs_total", "Jobs")
+    busy = registry.gauge("busy", "Busy")
+    jobs.inc(2)
+    busy.set(1)
+
+    # A worker that has exited: its counts stay, its gauges do not
+    dead_pid = 2**22 + 12345
+    (tmp_path / f"{dead_pid}.json").write_text(
+        '{"pid": %d, "metrics": {"jobs_total": [[[], 5]], "busy": [[[], 3]]}}'
+        % dead_pid
+    )
+
+    text = registry.render()
+    assert sample(text, "jobs_total") == 7
+    assert sample(text, "busy") == 1
+
+
+def test_http_metrics_use_route_template():
+    app = Flask(__name__)
+    metrics_module.metrics.init_app(app)
+
+    @app.route("/api/report/<report_id>")
+    def report(report_id):
+        return "ok"
+
+    client = app.test_client()
+    before = metrics_module.http_requests.snapshot()
+    client.get("/api/report/1")
+    client.get("/api/report/2")
+    client.get("/missing")
+    after = metrics_module.http_requests.snapshot()
+
+    key = ("GET", "/api/report/<report_id>", "200")
+    assert after[key] - before.get(key, 0) == 2
+    assert ("GET", "unmatched", "404") in after
+
+    app.config["METRICS_TOKEN"] = "secret"
+    assert client.get("/api/metrics").status_code == 401
+    response = client.get("/api/metrics", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+
+
+def test_track_scan_records_stages_and_outcome():
+    stages = metrics_module.scan_stage_duration
+    scans = metrics_module.scan_duration
+    before = scans.snapshot().get(("test", "error"), [[0], 0])
+
+    with pytest.raises(RuntimeError):
+        with track_scan("test") as scan:
+            scan.stage("save")
+            assert metrics_module.scans_in_progress.snapshot()[("test",)] == 1
+            scan.stage("hr")
+            raise RuntimeError("model failed")
+
+    assert metrics_module.scans_in_progress.snapshot()[("test",)] == 0
+    assert ("test", "save") in stages.snapshot()
+    assert ("test", "hr") in stages.snapshot()
+    assert sum(scans.snapshot()[("test", "error")][0]) == sum(before[0]) + 1
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Tests for the YouTube playlist cache
+Uses a local fake of the Data API client (playlistItems/videos with page
+tokens), so no API key or network access is needed.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.resources.playlist_cache import PlaylistCache
+from app.services.resources.playlist_config import EMOTIONAL_PROFILE_PLAYLISTS
+from app.services.resources import youtube_service
+from app.services.resources.youtube_service import YouTubeService
+
+
+class FakeRequest:
+    def __init__(self, api, handler, kwargs):
+        self.api, self.handler, self.kwargs = api, handler, kwargs
+
+    def execute(self):
+        with self.api.lock:
+            self.api.calls.append(self.handler.__name__)
+            if self.api.fail:
+                raise RuntimeError("quota exceeded")
+        time.sleep(self.api.latency)
+        return self.handler(**self.kwargs)
+
+
+class FakeResource:
+    def __init__(self, api, handler):
+        self.api, self.handler = api, handler
+
+    def list(self, **kwargs):
+        return FakeRequest(self.api, self.handler, kwargs)
+
+
+class FakeYouTubeAPI:
+    """Serves playlists like the Data API: at most 50 items per response"""
+
+    def __init__(self, playlists, latency: float = 0.0):
+        self.playlists = playlists
+        self.latency = latency
+        self.version = 1
+        self.fail = False
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def playlistItems(self):
+        return FakeResource(self, self.playlist_items)
+
+    def videos(self):
+        return FakeResource(self, self.video_details)
+
+    def playlist_items(self, part, playlistId, maxResults, pageToken=None):
+        assert maxResults <= 50
+        ids = self.playlists[playlistId]
+        start = int(pageToken or 0)
+        page = ids[start : start + maxResults]
+        response = {
+            "items": [
+                {
+                    "snippet": {"channelTitle": "WellStation"},
+                    "contentDetails": {"videoId": video_id},
+                }
+                for video_id in page
+            ]
+        }
+        if start + maxResults < len(ids):
+            response["nextPageToken"] = str(start + maxResults)
+        return response
+
+    def video_details(self, part, id):
+        ids = id.split(",")
+        assert len(ids) <= 50
+        return {
+            "items": [
+                {
+                    "id": video_id,
+                    "snippet": {
+                        "title": f"{video_id} v{self.version}",
+                        "description": "",
+                        "thumbnails": {"high": {"url": f"https://img/{video_id}"}},
+                        "channelTitle": "Creator",
+                        "publishedAt": "2024-01-01T00:00:00Z",
+                    },
+                    "contentDetails": {"duration": "PT3M45S"},
+                    "statistics": {"viewCount": "10"},
+                }
+                for video_id in ids
+            ]
+        }
+
+
+def make_cache(api, **kwargs):
+    return PlaylistCache(
+        fetch=YouTubeService(youtube=api).fetch_playlist_videos, **kwargs
+    )
+
+
+def playlist(prefix: str, size: int):
+    return [f"{prefix}-{i}" for i in range(size)]
+
+
+def test_fetches_past_the_50_item_page_limit():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 120)})
+    videos = make_cache(api, max_videos=200).get("PL1")
+
+    assert [video["id"] for video in videos] == playlist("a", 120)
+    assert videos[0]["duration"] == "3:45"
+    assert videos[0]["playlist_channel_title"] == "WellStation"
+    assert api.calls.count("playlist_items") == 3
+    assert api.calls.count("video_details") == 3
+
+
+def test_max_videos_caps_the_fetch():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 120)})
+    videos = make_cache(api, max_videos=60).get("PL1")
+
+    assert len(videos) == 60
+    assert api.calls.count("playlist_items") == 2
+
+
+def test_fresh_playlists_are_served_from_memory():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 10)})
+    cache = make_cache(api)
+
+    cache.get("PL1")
+    calls = len(api.calls)
+    assert len(cache.get("PL1", limit=3)) == 3
+    assert len(api.calls) == calls
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_playlist_is_served_while_refreshing():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 5)}, latency=0.05)
+    cache = make_cache(api, ttl_seconds=0.1, stale_seconds=60)
+    cache.get("PL1")
+    time.sleep(0.15)
+    api.version = 2
+
+    start = time.perf_counter()
+    videos = cache.get("PL1")
+    elapsed = time.perf_counter() - start
+
+    assert videos[0]["title"] == "a-0 v1"  # old videos, immediately
+    assert elapsed < api.latency
+    for _ in range(50):
+        if not cache.stats()["refreshing"]:
+            break
+        time.sleep(0.02)
+    assert cache.get("PL1")[0]["title"] == "a-0 v2"
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_failed_refresh_keeps_serving_cached_videos():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 5)})
+    cache = make_cache(api, ttl_seconds=0, stale_seconds=0)
+    cache.get("PL1")
+
+    api.fail = True
+    assert len(cache.get("PL1")) == 5
+    assert cache.stats()["errors"] == 1
+
+    try:
+        make_cache(api).get("PL1")
+        assert False, "expected the fetch error"
+    except Exception as e:
+        assert "quota exceeded" in str(e)
+
+
+def test_concurrent_misses_fetch_once():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 5)}, latency=0.05)
+    cache = make_cache(api)
+
+    threads = [threading.Thread(target=cache.get, args=("PL1",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert api.calls == ["playlist_items", "video_details"]
+
+
+def test_cache_survives_restarts():
+    api = FakeYouTubeAPI({"PL1": playlist("a", 5)})
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache", "playlists.json")
+        make_cache(api, path=path).get("PL1")
+        calls = len(api.calls)
+
+        restarted = make_cache(api, path=path)
+        assert [video["id"] for video in restarted.get("PL1")] == playlist("a", 5)
+        assert len(api.calls) == calls
+
+
+def test_prefetch_fetches_every_profile_playlist_once():
+    playlist_ids = list(EMOTIONAL_PROFILE_PLAYLISTS.values())
+    api = FakeYouTubeAPI({pid: playlist(pid, 3) for pid in playlist_ids})
+    cache = make_cache(api)
+
+    results = cache.prefetch(playlist_ids)
+    assert set(results.values()) == {"fetched"}
+    assert set(cache.prefetch(playlist_ids).values()) == {"cached"}
+    assert api.calls.count("playlist_items") == len(set(playlist_ids))
+
+    calls = len(api.calls)
+    for pid in playlist_ids:
+        cache.get(pid)
+    assert len(api.calls) == calls
+
+
+def test_each_thread_gets_its_own_client(monkeypatch):
+    monkeypatch.setattr(youtube_service.Config, "YOUTUBE_API_KEY", "key")
+    service = YouTubeService()
+    clients = []
+
+    def use_client():
+        clients.append(service.youtube)
+
+    threads = [threading.Thread(target=use_client) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert service.youtube is service.youtube
+    assert len({id(client) for client in clients + [service.youtube]}) == 3
+    # The discovery document is only parsed once
+    assert youtube_service.get_discovery_document() is (
+        youtube_service.get_discovery_document()
+    )
+
+
+if __name__ == "__main__":
+    test_fetches_past_the_50_item_page_limit()
+    test_max_videos_caps_the_fetch()
+    test_fresh_playlists_are_served_from_memory()
+    test_stale_playlist_is_served_while_refreshing()
+    test_failed_refresh_keeps_serving_cached_videos()
+    test_concurrent_misses_fetch_once()
+    test_cache_survives_restarts()
+    test_prefetch_fetches_every_profile_playlist_once()
+    print("✅ Playlist cache tests passed")
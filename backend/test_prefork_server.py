@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Tests for the production server's request handling
+Serves a bare Flask app on a free local port; no database is needed.
+"""
+
+import sys
+import os
+import socket
+import threading
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app.server.prefork import PooledWSGIServer, request_handler
+
+
+def test_worker_answers_http_1_0_and_closes_the_connection():
+    app = Flask(__name__)
+    app.add_url_rule("/ping", "ping", lambda: "pong")
+    server = PooledWSGIServer(
+        "127.0.0.1", 0, app, handler=request_handler(5), threads=1
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.create_connection(server.server_address, timeout=5) as client:
+            # A keep-alive HTTP/1.1 client must not hold the only thread
+            client.sendall(
+                b"GET /ping HTTP/1.1\r\nHost: localhost\r\n"
+                b"Connection: keep-alive\r\n\r\n"
+            )
+            response = b""
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    break
+                response += data
+    finally:
+        server.shutdown()
+        thread.join(5)
+
+    assert response.startswith(b"HTTP/1.0 200")
+    assert response.endswith(b"pong")
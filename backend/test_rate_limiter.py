@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-bucket rate limiter behind a reverse proxy
+Uses bare Flask apps, so no database is needed.
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app.validations.rate_limiter import RateLimiter
+
+
+def make_app(trusted_proxies):
+    app = Flask(__name__)
+    app.config.update(
+        RATE_LIMIT_ENABLED=True,
+        TRUSTED_PROXIES=trusted_proxies,
+        RATE_LIMIT_IP_CAPACITY=20,
+        RATE_LIMIT_IP_REFILL_PER_SECOND=0,
+        RATE_LIMIT_USER_CAPACITY=20,
+        RATE_LIMIT_USER_REFILL_PER_SECOND=0,
+    )
+    RateLimiter(route_costs={"/api/video": 20}).init_app(app)
+    app.add_url_rule("/api/video", "video", lambda: "ok", methods=["POST"])
+    app.add_url_rule("/api/metrics", "metrics", lambda: "ok")
+    return app
+
+
+def scan(client, forwarded_for):
+    return client.post(
+        "/api/video",
+        headers={"X-Forwarded-For": forwarded_for},
+        environ_base={"REMOTE_ADDR": "127.0.0.1"},
+    ).status_code
+
+
+def test_clients_behind_proxy_get_their_own_bucket():
+    client = make_app(trusted_proxies=1).test_client()
+    assert scan(client, "10.0.0.1") == 200
+    assert scan(client, "10.0.0.1") == 429
+    # Another kiosk behind the same nginx is not affected
+    assert scan(client, "10.0.0.2") == 200
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    client = make_app(trusted_proxies=0).test_client()
+    assert scan(client, "10.0.0.1") == 200
+    # Both requests come from 127.0.0.1, spoofed headers do not help
+    assert scan(client, "10.0.0.2") == 429
+
+
+def test_metrics_scrapes_are_not_limited():
+    client = make_app(trusted_proxies=0).test_client()
+    assert scan(client, "10.0.0.1") == 200
+    for _ in range(50):
+        assert client.get("/api/metrics").status_code == 200
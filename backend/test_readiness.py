@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the startup warm-up's database step
+Uses fake MongoDB clients, so no database is needed.
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app.db import db as db_module
+from app.db import indexes, operations
+from app.services.readiness import warmup
+
+
+class FakeClient:
+    def __init__(self, calls):
+        self.calls = calls
+        self.client = self
+        self.admin = self
+
+    def __getitem__(self, name):
+        return self
+
+    def command(self, name):
+        self.calls.append(name)
+
+    def close(self):
+        self.calls.append("close")
+
+
+def test_workers_only_ping_once_the_parent_built_the_indexes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "_indexes_ensured", False)
+    monkeypatch.setattr(db_module, "create_client", lambda: FakeClient(calls))
+    monkeypatch.setattr(operations, "get_db_connection", lambda: FakeClient(calls))
+    monkeypatch.setattr(indexes, "ensure_indexes", lambda db: calls.append("indexes"))
+    app = Flask(__name__)
+    app.config["DATABASE_NAME"] = "test"
+
+    # The prefork parent, before forking
+    with app.app_context():
+        warmup.ensure_database_indexes()
+    assert calls == ["indexes", "close"]
+
+    # A worker's warm-up step
+    calls.clear()
+    warmup.open_database()
+    assert calls == ["ping"]
+
+
+def test_database_step_builds_the_indexes_without_a_parent(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, "_indexes_ensured", False)
+    monkeypatch.setattr(operations, "get_db_connection", lambda: FakeClient(calls))
+    monkeypatch.setattr(indexes, "ensure_indexes", lambda db: calls.append("indexes"))
+
+    warmup.open_database()
+    assert calls == ["ping", "indexes"]
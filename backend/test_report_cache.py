@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the report response cache
+Uses the in-process LRU backend, so no database is needed.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.report.report_cache import ReportCache, is_closed_period
+
+
+def test_report_updated_in_place_refreshes_a_closed_day():
+    cache = ReportCache(ttl_seconds=300)
+    yesterday = datetime.utcnow().replace(hour=0, minute=0) - timedelta(days=1)
+    day = (yesterday, yesterday + timedelta(days=1))
+    assert is_closed_period(day[1])
+    stored = {"mental_health_scores": None}
+
+    def read(closed=True):
+        return cache.get_or_compute(
+            "a@b.c", "date", day, lambda: dict(stored), closed=closed
+        )
+
+    assert read() == {"mental_health_scores": None}
+    # The audio results of the video report saved before midnight arrive
+    stored["mental_health_scores"] = {"stress": 2}
+    assert read()["mental_health_scores"] is None
+
+    cache.invalidate_email("a@b.c")
+    assert read() == {"mental_health_scores": {"stress": 2}}
+    assert cache.stats()["hits"] == 1
+
+
+def test_invalidation_only_drops_that_email():
+    cache = ReportCache(ttl_seconds=300)
+    calls = []
+
+    def read(email):
+        return cache.get_or_compute(
+            email, "year", "2024", lambda: calls.append(email) or email, closed=True
+        )
+
+    read("a@b.c")
+    read("d@e.f")
+    cache.invalidate_email("a@b.c")
+    read("a@b.c")
+    read("d@e.f")
+    assert calls == ["a@b.c", "d@e.f", "a@b.c"]
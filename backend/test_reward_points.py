@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily reward: the streak update pipeline applied to sample
+user documents, and the order of saving a report and granting its reward
+The database operations are replaced with in-memory fakes, so no database is
+needed.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.report import reward_points_service
+from app.services.trial.trial_service import TrialService
+
+trial_service_module = sys.modules[TrialService.__module__]
+
+TRIAL = {
+    "trial_id": "trial-1",
+    "venue": "Gym",
+    "language": "English",
+    "ageRange": "25-35",
+    "gender": "female",
+    "vital_signs": {"heart_rate": 72},
+    "mental_health_scores": {"stress": 2},
+    "processing_stage": "audio_processed",
+}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Record the reward grants and report writes, in order"""
+    calls = []
+
+    def calculate_rewards(email, report_date):
+        calls.append(("reward", email))
+        return 1
+
+    def update_data(collection, query, update, upsert=False):
+        calls.append(("update", collection, query, update["$set"]))
+
+    monkeypatch.setattr(reward_points_service, "calculate_rewards", calculate_rewards)
+    monkeypatch.setattr(reward_points_service, "update_data", update_data)
+    monkeypatch.setattr(trial_service_module, "update_data", update_data)
+    monkeypatch.setattr(
+        trial_service_module,
+        "find_one_and_update_data",
+        lambda *args, **kwargs: dict(TRIAL),
+    )
+    return calls
+
+
+def test_reward_is_granted_after_the_report_is_saved(monkeypatch, store):
+    def insert_data(collection, data):
+        store.append(("insert", collection))
+        return {**data, "_id": "report"}
+
+    monkeypatch.setattr(trial_service_module, "insert_data", insert_data)
+
+    result = TrialService().link_trial_to_user("trial-1", "user-1", "a@b.c")
+
+    assert result["success"]
+    assert [call[0] for call in store] == ["insert", "reward", "update"]
+    _, _, query, fields = store[2]
+    assert query == {"report_id": "trial-1", "user_id": "user-1"}
+    assert fields == {"reward_points_earned": 1, "first_scan_of_day": True}
+
+
+def test_failed_insert_grants_no_reward(monkeypatch, store):
+    def insert_data(collection, data):
+        raise Exception("Failed to insert data: connection reset")
+
+    monkeypatch.setattr(trial_service_module, "insert_data", insert_data)
+
+    with pytest.raises(Exception, match="connection reset"):
+        TrialService().link_trial_to_user("trial-1", "user-1", "a@b.c")
+
+    # Only the trial claim is released; the retry can still earn the reward
+    assert [call[0] for call in store] == ["update"]
+    assert store[0][3]["status"] == "active"
+
+
+def test_failed_reward_keeps_the_saved_report(monkeypatch):
+    def calculate_rewards(email, report_date):
+        raise Exception("user_auth unavailable")
+
+    monkeypatch.setattr(reward_points_service, "calculate_rewards", calculate_rewards)
+
+    points = reward_points_service.reward_saved_report(
+        "a@b.c", {"user_Id": "report"}, None
+    )
+    assert points == 0
+
+
+def evaluate(expression, document):
+    """The aggregation operators _reward_update_pipeline uses"""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return document.get(expression[1:])
+    if not isinstance(expression, dict):
+        return expression
+    ((operator, arguments),) = expression.items()
+    values = [evaluate(argument, document) for argument in arguments]
+    if operator == "$cond":
+        return values[1] if values[0] else values[2]
+    if operator == "$gte":
+        return values[0] is not None and values[0] >= values[1]
+    if operator == "$eq":
+        return values[0] == values[1]
+    if operator == "$add":
+        return sum(values)
+    if operator == "$ifNull":
+        return values[0] if values[0] is not None else values[1]
+    raise NotImplementedError(operator)
+
+
+class UserAuth:
+    """One user_auth document updated by calculate_rewards' pipeline"""
+
+    def __init__(self, **fields):
+        self.document = {"email": "a@b.c", **fields}
+        self.ledger = []
+
+    def find_one_and_update_data(self, collection, query, pipeline, projection):
+        last_report = self.document.get("last_report_date")
+        day_start = query["$or"][0]["last_report_date"]["$lt"]
+        if query["email"] != self.document["email"] or not (
+            last_report is None or last_report < day_start
+        ):
+            return None
+        for stage in pipeline:
+            before = dict(self.document)
+            for field, expression in stage["$set"].items():
+                self.document[field] = evaluate(expression, before)
+        return {
+            field: self.document.get(field) for field in projection if field != "_id"
+        }
+
+    def insert_data(self, collection, data):
+        self.ledger.append(data)
+        return data
+
+
+def reward(monkeypatch, user, report_date):
+    monkeypatch.setattr(
+        reward_points_service, "find_one_and_update_data", user.find_one_and_update_data
+    )
+    monkeypatch.setattr(reward_points_service, "insert_data", user.insert_data)
+    return reward_points_service.calculate_rewards("a@b.c", report_date, deferred=False)
+
+
+NOW = datetime(2026, 3, 10, 15, 30, tzinfo=timezone.utc)
+
+
+def test_first_report_of_the_day_extends_the_streak(monkeypatch):
+    user = UserAuth(
+        current_streak=2,
+        total_reward_points=5,
+        streak_start_date=NOW - timedelta(days=2),
+        last_report_date=NOW - timedelta(days=1, hours=8),
+    )
+
+    assert reward(monkeypatch, user, NOW) == 1
+    assert user.document["current_streak"] == 3
+    assert user.document["total_reward_points"] == 6
+    assert user.document["streak_start_date"] == NOW - timedelta(days=2)
+    assert user.document["last_report_date"] == NOW
+    assert [entry["reason"] for entry in user.ledger] == ["daily_checkin"]
+
+    # A second report the same day earns nothing and changes nothing
+    before = dict(user.document)
+    assert reward(monkeypatch, user, NOW + timedelta(hours=3)) == 0
+    assert user.document == before
+    assert len(user.ledger) == 1
+
+
+def test_fifth_day_in_a_row_earns_the_streak_bonus(monkeypatch):
+    user = UserAuth(
+        current_streak=4,
+        total_reward_points=4,
+        last_report_date=NOW - timedelta(days=1),
+    )
+
+    assert reward(monkeypatch, user, NOW) == 3
+    assert user.document["current_streak"] == 5
+    assert user.document["total_reward_points"] == 7
+    assert user.ledger[0]["reason"] == "5_day_streak"
+
+
+def test_missed_day_resets_the_streak(monkeypatch):
+    user = UserAuth(
+        current_streak=4,
+        total_reward_points=9,
+        streak_start_date=NOW - timedelta(days=6),
+        last_report_date=NOW - timedelta(days=2),
+    )
+
+    assert reward(monkeypatch, user, NOW) == 1
+    assert user.document["current_streak"] == 1
+    assert user.document["total_reward_points"] == 10
+    assert user.document["streak_start_date"] == NOW
+
+
+def test_first_report_ever_starts_a_streak(monkeypatch):
+    user = UserAuth()
+
+    assert reward(monkeypatch, user, NOW) == 1
+    assert user.document["current_streak"] == 1
+    assert user.document["total_reward_points"] == 1
+    assert user.document["streak_start_date"] == NOW
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for per-scan memory accounting and the video memory budget
+The budget tests only do arithmetic; no video is decoded.
+"""
+
+import sys
+import os
+
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.media.scan_memory import (
+    MB,
+    MemoryBudgetExceeded,
+    ScanMemoryTracker,
+    VideoMemoryBudget,
+    current_rss,
+)
+from app.utils.metrics import scan_stage_peak_rss, track_scan
+
+
+def test_small_video_keeps_full_size():
+    budget = VideoMemoryBudget(1024 * MB)
+    assert budget.scale_for(300, 640, 480) == 1.0
+    assert not budget.downsampled
+
+
+def test_known_frame_count_is_downsampled_to_fit():
+    budget = VideoMemoryBudget(1024 * MB)
+    scale = budget.scale_for(900, 640, 480, more_frames=False)
+    assert 0 < scale < 1
+    assert budget.downsampled
+    assert budget.estimate(900, round(640 * scale), round(480 * scale)) <= 1024 * MB
+
+
+def test_running_count_leaves_room_for_more_frames():
+    budget = VideoMemoryBudget(1024 * MB)
+    scale = budget.scale_for(450, 640, 480)
+    # Sized for twice the frames seen so far, so the next checks pass
+    assert budget.scale_for(900, 640, 480, scale) == scale
+
+
+def test_reject_policy_and_minimum_width():
+    with pytest.raises(MemoryBudgetExceeded, match="over the scan memory budget"):
+        VideoMemoryBudget(100 * MB, downsample=False).scale_for(900, 640, 480)
+    # Even 240px wide frames need more than 50MB for 900 frames
+    with pytest.raises(MemoryBudgetExceeded):
+        VideoMemoryBudget(50 * MB).scale_for(900, 640, 480)
+
+
+def test_budget_is_off_by_default():
+    assert ScanMemoryTracker(budget_mb=0).video_budget() is None
+    budget = ScanMemoryTracker(budget_mb=512, budget_policy="reject").video_budget()
+    assert budget.max_bytes == 512 * MB and not budget.downsample
+
+
+@pytest.mark.skipif(current_rss() is None, reason="RSS not readable here")
+def test_stage_peaks_and_tracemalloc_sites():
+    tracker = ScanMemoryTracker(
+        enabled=True, sample_interval=0.01, use_tracemalloc=True, tracemalloc_top=3
+    )
+    with track_scan("memtest") as timer:
+        with tracker.track("memtest", "scan-1", timer) as session:
+            timer.stage("allocate")
+            block = bytearray(64 * MB)
+            timer.stage("release")
+            del block
+
+    assert set(session.stages) == {"allocate", "release"}
+    allocate = session.stages["allocate"]
+    assert allocate["traced_peak_mb"] >= 64
+    assert allocate["top_allocations"][0]["site"].startswith("test_scan_memory.py:")
+    assert session.peak_rss >= session.start_rss
+    assert ("memtest", "allocate") in scan_stage_peak_rss.snapshot()
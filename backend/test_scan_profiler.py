@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the slow-scan profiler
+Profiles a busy loop standing in for a scan; no models are needed.
+"""
+
+import sys
+import os
+import pstats
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from app.services.media.scan_profiler import PROFILE_HEADER, ScanProfiler
+from app.utils.metrics import track_scan
+
+app = Flask(__name__)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def run_scan(profiler, scan_id, seconds):
+    with track_scan("test") as timer:
+        with profiler.profile("test", scan_id, timer):
+            timer.stage("hr")
+            busy(seconds)
+
+
+def make_profiler(tmp_path, **overrides):
+    options = dict(
+        directory=str(tmp_path),
+        enabled=True,
+        threshold_seconds=0.2,
+        sample_interval=0.005,
+        max_profiles=3,
+        allow_header=True,
+    )
+    options.update(overrides)
+    return ScanProfiler(**options)
+
+
+def test_only_slow_scans_are_kept(tmp_path):
+    profiler = make_profiler(tmp_path)
+    run_scan(profiler, "fast", 0.02)
+    assert profiler.list_profiles() == []
+
+    run_scan(profiler, "user/../slow", 0.3)
+    (profile,) = profiler.list_profiles()
+    assert profile["scan_id"] == "user/../slow"
+    assert profile["format"] == "collapsed"
+    assert profile["seconds"] >= 0.3
+
+    path = profiler.profile_path(profile["name"])
+    assert os.path.dirname(path) == str(tmp_path)
+    with open(path) as f:
+        stacks = f.read()
+    assert "stage:hr;test_scan_profiler.run_scan;test_scan_profiler.busy" in stacks
+
+
+def test_header_forces_profile_even_when_disabled(tmp_path):
+    profiler = make_profiler(tmp_path, enabled=False)
+    run_scan(profiler, "not-requested", 0.01)
+    assert profiler.list_profiles() == []
+
+    with app.test_request_context(headers={PROFILE_HEADER: "cprofile"}):
+        run_scan(profiler, "requested", 0.01)
+    (profile,) = profiler.list_profiles()
+    assert profile["requested"] and profile["format"] == "pstats"
+    stats = pstats.Stats(profiler.profile_path(profile["name"]))
+    assert any(func[2] == "busy" for func in stats.stats)
+
+
+def test_header_is_ignored_by_default(tmp_path):
+    profiler = ScanProfiler(directory=str(tmp_path), enabled=False)
+    assert not profiler.allow_header
+
+    with app.test_request_context(headers={PROFILE_HEADER: "cprofile"}):
+        run_scan(profiler, "unauthenticated", 0.01)
+    assert profiler.list_profiles() == []
+
+
+def test_ring_keeps_newest_profiles(tmp_path):
+    profiler = make_profiler(tmp_path)
+    for i in range(5):
+        with app.test_request_context(headers={PROFILE_HEADER: "1"}):
+            run_scan(profiler, f"scan-{i}", 0.01)
+
+    profiles = profiler.list_profiles()
+    assert [p["scan_id"] for p in profiles] == ["scan-4", "scan-3", "scan-2"]
+    assert len(os.listdir(tmp_path)) == 6
+
+
+def test_profile_path_rejects_other_files(tmp_path):
+    profiler = make_profiler(tmp_path)
+    assert profiler.profile_path("../config.py") is None
+    assert profiler.profile_path("missing.collapsed") is None
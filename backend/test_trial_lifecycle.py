@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Tests for the lifecycle of expired trials: the reaper purges their media and
+marks them expired, then the TTL index deletes them after the grace period
+The trial collection is an in-memory list and the TTL index is applied with
+its partial filter from app/db/indexes.py, so no database is needed.
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from app.db.collections import COLLECTIONS
+from app.db.indexes import index_specs
+from app.services.trial.trial_reaper import TrialReaper
+from app.services.trial.trial_service import TrialService
+from app.services.trial.trial_statistics import TrialStatistics
+
+# The package exports the instances under the module names
+reaper_module = sys.modules[TrialReaper.__module__]
+statistics_module = sys.modules[TrialStatistics.__module__]
+service_module = sys.modules[TrialService.__module__]
+
+
+def matches(document, query):
+    """The subset of the query language the reaper and the index use"""
+    for field, condition in query.items():
+        value = document.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for operator, operand in condition.items():
+            if operator == "$lt" and not (value is not None and value < operand):
+                return False
+            if operator == "$gt" and not (value is not None and value > operand):
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+    return True
+
+
+class TrialCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def stream_batches(self, collection, query, batch_size, projection):
+        found = [
+            {field: document.get(field) for field in ("trial_id", "status")}
+            for document in self.documents
+            if matches(document, query)
+        ]
+        for start in range(0, len(found), batch_size):
+            yield found[start : start + batch_size]
+
+    def bulk_update(self, collection, updates, ordered=True):
+        modified = 0
+        for query, update in updates:
+            for document in self.documents:
+                if matches(document, query):
+                    document.update(update["$set"])
+                    modified += 1
+        return {"modified_count": modified}
+
+    def count_data(self, collection, query):
+        return sum(1 for document in self.documents if matches(document, query))
+
+    def run_ttl_monitor(self, now):
+        """Delete what the trial TTL index would"""
+        (spec,) = [
+            spec
+            for spec in index_specs()[COLLECTIONS["TRIAL_REPORTS"]]
+            if "expireAfterSeconds" in spec
+        ]
+        deadline = now - timedelta(seconds=spec["expireAfterSeconds"])
+        self.documents[:] = [
+            document
+            for document in self.documents
+            if not (
+                matches(document, spec["partialFilterExpression"])
+                and document["expires_at"] < deadline
+            )
+        ]
+
+    def find_data(self, collection, query, limit=100, projection=None):
+        found = [document for document in self.documents if matches(document, query)]
+        return [{field: document[field] for field in projection} for document in found][
+            :limit
+        ]
+
+
+class Transitions:
+    def __init__(self):
+        self.recorded = {}
+
+    def record(self, transition, count=1):
+        self.recorded[transition] = self.recorded.get(transition, 0) + count
+
+
+def trial(trial_id, status, expired_ago):
+    return {
+        "trial_id": trial_id,
+        "status": status,
+        "expires_at": datetime.now(timezone.utc) - expired_ago,
+    }
+
+
+def test_reaped_trials_are_deleted_after_the_grace_period(monkeypatch):
+    grace = timedelta(seconds=Config.TRIAL_TTL_GRACE_SECONDS)
+    trials = TrialCollection(
+        [
+            trial("abandoned", "active", grace + timedelta(days=1)),
+            trial("stuck", "active", grace + timedelta(days=1)),
+            trial("recent", "active", timedelta(hours=1)),
+            trial("linked", "completed", grace + timedelta(days=1)),
+            trial("running", "active", -timedelta(days=1)),
+        ]
+    )
+    transitions = Transitions()
+
+    def delete_trial_media(trial_id):
+        if trial_id == "stuck":
+            raise PermissionError("media directory is read-only")
+
+    monkeypatch.setattr(reaper_module, "stream_batches", trials.stream_batches)
+    monkeypatch.setattr(reaper_module, "bulk_update", trials.bulk_update)
+    monkeypatch.setattr(reaper_module, "count_data", trials.count_data)
+    monkeypatch.setattr(reaper_module, "delete_trial_media", delete_trial_media)
+    monkeypatch.setattr(reaper_module, "trial_statistics", transitions)
+
+    # Without a reaper run, nothing is deleted: the media is still there
+    trials.run_ttl_monitor(datetime.now(timezone.utc))
+    assert len(trials.documents) == 5
+
+    result = TrialReaper(batch_size=2).run_once()
+
+    assert result["reaped"] == 3 and result["failed"] == 1
+    assert result["backlog"] == 1
+    assert transitions.recorded == {"expired": 2}
+    status = {t["trial_id"]: t["status"] for t in trials.documents}
+    assert status == {
+        "abandoned": "expired",
+        "stuck": "active",
+        "recent": "expired",
+        "linked": "completed",
+        "running": "active",
+    }
+
+    trials.run_ttl_monitor(datetime.now(timezone.utc))
+
+    # The purged trial past the grace period is gone; the one whose media
+    # could not be deleted waits for the next run, linked trials stay
+    remaining = {t["trial_id"] for t in trials.documents}
+    assert remaining == {"stuck", "recent", "linked", "running"}
+
+
+def test_statistics_count_deleted_trials(monkeypatch):
+    counters = {
+        "_id": "totals",
+        "seeded": True,
+        "total_trials": 10,
+        "active_trials": 2,
+        "completed_trials": 3,
+        "expired_trials": 5,
+    }
+    saved = {}
+    monkeypatch.setattr(
+        statistics_module, "find_data", lambda *args, **kwargs: [dict(counters)]
+    )
+    monkeypatch.setattr(statistics_module, "estimated_count_data", lambda *args: 7)
+    monkeypatch.setattr(
+        statistics_module,
+        "aggregate_data",
+        lambda *args: [
+            {"_id": "active", "count": 2},
+            {"_id": "completed", "count": 3},
+            {"_id": "expired", "count": 2},
+        ],
+    )
+    monkeypatch.setattr(
+        statistics_module,
+        "update_data",
+        lambda collection, query, update, upsert=False: saved.update(update["$set"]),
+    )
+    statistics = TrialStatistics(counters_enabled=True)
+
+    totals = statistics.totals()
+    assert totals["total_trials"] == 10 and totals["deleted_trials"] == 3
+
+    # A rebuild from the 7 stored trials keeps the 3 deleted ones as expired
+    rebuilt = statistics.rebuild_counters()
+    assert rebuilt["total_trials"] == 10 and rebuilt["expired_trials"] == 5
+    assert saved["seeded"]
+
+
+def test_scans_are_only_accepted_for_active_unexpired_trials(monkeypatch):
+    trials = TrialCollection(
+        [
+            {**trial("running", "active", -timedelta(days=1)), "_id": 1},
+            {**trial("lapsed", "active", timedelta(hours=1)), "_id": 2},
+            {**trial("reaped", "expired", timedelta(days=1)), "_id": 3},
+            {**trial("linked", "completed", -timedelta(days=1)), "_id": 4},
+        ]
+    )
+    monkeypatch.setattr(service_module, "find_data", trials.find_data)
+    service = TrialService()
+
+    active = {
+        t["trial_id"]: service.is_trial_active(t["trial_id"]) for t in trials.documents
+    }
+    assert active == {
+        "running": True,
+        "lapsed": False,
+        "reaped": False,
+        "linked": False,
+    }
+    assert not service.is_trial_active("missing")
+    # A lapsed trial is only marked expired by the reaper, not by the check
+    assert [t["status"] for t in trials.documents] == [
+        "active",
+        "active",
+        "expired",
+        "completed",
+    ]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for decoding scan videos at a bounded frame rate and size, in one
+process or in segments
+Writes small synthetic MJPG videos; face detection is replaced by a box
+derived from the frame, so no faces or models are needed.
+"""
+
+import sys
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from processingScripts.feature_engineering import extract_video_features
+from processingScripts.feature_engineering.extract_video_features import (
+    crop_faces,
+    read_faces_parallel,
+    read_frames,
+)
+
+
+def write_video(path, fps, seconds, width, height):
+    writer = cv2.VideoWriter(
+        str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height)
+    )
+    if not writer.isOpened():
+        pytest.skip("no MJPG encoder in this OpenCV build")
+    frame = np.zeros((height, width, 3), dtype="uint8")
+    for i in range(int(round(fps * seconds))):
+        frame[:] = i * 7 % 256
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_fast_large_video_is_resampled_and_downscaled(tmp_path):
+    video = write_video(tmp_path / "fast.avi", 60, 2, 1280, 720)
+    frames, _, info = read_frames(video, target_fps=30, max_dimension=640)
+
+    assert info["frames_read"] == 120
+    assert info["frames_kept"] == len(frames) == 60
+    assert info["fs"] == pytest.approx(30, abs=0.5)
+    assert frames.shape[1:] == (360, 640, 3)
+    # Every other frame is kept
+    assert [int(frame[0, 0, 0]) for frame in frames[:3]] == [0, 14, 28]
+
+
+def test_slow_video_keeps_every_frame_and_its_rate(tmp_path):
+    video = write_video(tmp_path / "slow.avi", 15, 2, 320, 240)
+    frames, _, info = read_frames(video, target_fps=30, max_dimension=640)
+
+    assert info["frames_kept"] == info["frames_read"] == 30
+    assert info["fs"] == pytest.approx(15, abs=0.5)
+    assert frames.shape[1:] == (240, 320, 3)
+
+
+def test_rate_not_a_multiple_of_target_is_resampled(tmp_path):
+    video = write_video(tmp_path / "odd.avi", 50, 2, 320, 240)
+    _, _, info = read_frames(video, target_fps=30, max_dimension=None)
+
+    # 3 of every 5 frames, the nearest to a 30 fps grid
+    assert info["frames_kept"] == 60
+    assert info["fs"] == pytest.approx(30, abs=0.5)
+
+
+def frame_box(frame, backend, use_larger_box=False, larger_box_coef=1.0):
+    # A different box for every frame, so a window cropped with another
+    # window's box shows up
+    value = int(frame[0, 0, 0])
+    return [value % 60, value % 50, 200 + value % 30, 180]
+
+
+@pytest.mark.parametrize("fps", [30, 60, 25])
+def test_segments_match_decoding_in_one_process(tmp_path, monkeypatch, fps):
+    monkeypatch.setattr(extract_video_features, "face_detection", frame_box)
+    # Segments of 160 frames start in the middle of a detection window
+    video = write_video(tmp_path / "long.avi", fps, 17, 320, 240)
+
+    frames, windows, info = read_frames(video)
+    faces, parallel_info = read_faces_parallel(video, workers=2)
+
+    assert parallel_info["segments"] > 1
+    assert parallel_info["frames_read"] == info["frames_read"]
+    assert parallel_info["fs"] == pytest.approx(info["fs"])
+    np.testing.assert_array_equal(faces, crop_faces(frames, windows))
+
+
+def test_unknown_frame_count_decodes_in_one_process(tmp_path):
+    assert read_faces_parallel(str(tmp_path / "missing.webm"), workers=2) == (
+        None,
+        None,
+    )
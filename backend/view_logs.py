@@ -2,76 +2,468 @@
 """
 Log Viewer Script for WellStation Backend
 This script helps you view and filter log files easily.
+
+Logs are streamed, never loaded whole: tail queries read the files
+backwards in blocks and stop once enough records match, --since seeks to
+its start with a binary search over the (time-ordered) file, and rotated
+backups (wellstation.log.1 ... .5) are read as one continuous log.
+
+A record is a timestamped line plus any lines after it without a
+timestamp (tracebacks, multi-line messages). Timestamps are compared as
+text: "YYYY-MM-DD HH:MM:SS,mmm" sorts the same way as the time it names.
+Both log formats are read: text lines and the JSON lines written with
+LOG_FORMAT=json (shown as text unless --raw is given).
 """
 
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+import time
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime
-import argparse
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+BLOCK_SIZE = 64 * 1024
+MAX_BACKUPS = 5  # backupCount of the RotatingFileHandlers in run.py
+INDEX_DIR = ".index"
+FOLLOW_INTERVAL_SECONDS = 0.5
+
+# "time - ..." text lines and {"time": "...", "level": "...", ...} JSON lines
+TIMESTAMP = re.compile(
+    rb'^(?:\{"time": ")?(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3})(?: - |")'
+)
+LEVEL = re.compile(rb'(?: - |"level": ")(DEBUG|INFO|WARNING|ERROR|CRITICAL)(?: - |")')
+JSON_CONTEXT_FIELDS = ("request_id", "scan_id", "stage")
+
+COLORS = {
+    b"CRITICAL": "\033[91m",  # Red for errors
+    b"ERROR": "\033[91m",
+    b"WARNING": "\033[93m",  # Yellow for warnings
+    b"INFO": "\033[94m",  # Blue for info
+}
+
+
+class LogRecord(NamedTuple):
+    timestamp: Optional[bytes]  # None for lines before the first timestamp
+    level: Optional[bytes]
+    text: bytes
+
+
+def _record(lines: List[bytes]) -> LogRecord:
+    header = lines[0]
+    match = TIMESTAMP.match(header)
+    level = LEVEL.search(header)
+    return LogRecord(
+        match.group(1) if match else None,
+        level.group(1) if level else None,
+        b"".join(lines),
+    )
+
+
+def timestamp_key(moment: datetime) -> bytes:
+    """A datetime in the log's timestamp format, for comparisons"""
+    return moment.strftime("%Y-%m-%d %H:%M:%S,").encode() + (
+        b"%03d" % (moment.microsecond // 1000)
+    )
+
+
+def log_files(log_file: str) -> List[str]:
+    """The log file and its rotated backups, oldest first"""
+    backups = [f"{log_file}.{n}" for n in range(MAX_BACKUPS, 0, -1)]
+    return [path for path in backups + [log_file] if os.path.exists(path)]
+
+
+class LogFilter:
+    """Level, text and time filters, compiled once per query"""
+
+    def __init__(
+        self,
+        level: Optional[str] = None,
+        search: Optional[str] = None,
+        regex: bool = False,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        self.level = level.upper().encode() if level else None
+        pattern = search.encode() if search else None
+        if pattern is not None and not regex:
+            pattern = re.escape(pattern)
+        self.search = re.compile(pattern, re.IGNORECASE) if pattern else None
+        self.since = timestamp_key(since) if since else None
+        self.until = timestamp_key(until) if until else None
+
+    def matches(self, record: LogRecord) -> bool:
+        if self.level and record.level != self.level:
+            return False
+        if self.since or self.until:
+            # Lines without a timestamp cannot be placed in time; keep them
+            if record.timestamp is not None:
+                if self.since and record.timestamp < self.since:
+                    return False
+                if self.until and record.timestamp >= self.until:
+                    return False
+        if self.search and not self.search.search(record.text):
+            return False
+        return True
+
+
+def _reverse_lines(f: BinaryIO, end: int) -> Iterator[bytes]:
+    """Lines of f before byte end, last first, read in BLOCK_SIZE blocks"""
+    position = end
+    partial = b""
+    while position > 0:
+        size = min(BLOCK_SIZE, position)
+        position -= size
+        f.seek(position)
+        block = f.read(size) + partial
+        lines = block.splitlines(keepends=True)
+        # The first line may continue in the previous block
+        partial = lines.pop(0) if lines else b""
+        for line in reversed(lines):
+            yield line
+    if partial:
+        yield partial
+
+
+def iter_reverse(path: str) -> Iterator[LogRecord]:
+    """Records of one file, newest first"""
+    with open(path, "rb") as f:
+        continuation = []
+        for line in _reverse_lines(f, os.fstat(f.fileno()).st_size):
+            continuation.append(line)
+            if TIMESTAMP.match(line):
+                yield _record(continuation[::-1])
+                continuation = []
+        if continuation:
+            yield _record(continuation[::-1])
+
+
+def iter_forward(path: str, start: int = 0) -> Iterator[Tuple[int, LogRecord]]:
+    """(offset, record) pairs of one file from byte start, oldest first"""
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset, lines = start, []
+        position = start
+        for line in f:
+            if TIMESTAMP.match(line) and lines:
+                yield offset, _record(lines)
+                offset, lines = position, []
+            lines.append(line)
+            position += len(line)
+        if lines:
+            yield offset, _record(lines)
+
+
+def _first_record_from(f: BinaryIO, position: int) -> Tuple[int, Optional[bytes]]:
+    """Offset and timestamp of the first record starting at or after position"""
+    if position > 0:
+        f.seek(position - 1)
+        f.readline()  # skip to the next line start
+    else:
+        f.seek(0)
+    offset = f.tell()
+    for line in iter(f.readline, b""):
+        match = TIMESTAMP.match(line)
+        if match:
+            return offset, match.group(1)
+        offset += len(line)
+    return offset, None
+
+
+def find_offset(
+    path: str, since: bytes, bounds: Optional[Tuple[int, int]] = None
+) -> int:
+    """
+    Byte offset of the first record at or after since, by binary search
+
+    Args:
+        path: Log file, in time order
+        since: Timestamp key (see timestamp_key)
+        bounds: (low, high) byte range known to contain the answer, e.g.
+            from a LogIndex
+
+    Returns:
+        Offset to stream from (the file size if every record is older)
+    """
+    with open(path, "rb") as f:
+        low, high = bounds or (0, os.fstat(f.fileno()).st_size)
+        while low < high:
+            middle = (low + high) // 2
+            _, timestamp = _first_record_from(f, middle)
+            if timestamp is None or timestamp >= since:
+                high = middle
+            else:
+                low = middle + 1
+        return _first_record_from(f, low)[0]
+
+
+class LogIndex:
+    """
+    Sidecar index of the byte offset where each minute starts in a log file.
+
+    Stored in logs/.index/ under a hash of the file's first line, so it still
+    matches after rotation renames wellstation.log to wellstation.log.1. The
+    index is extended from where it stopped as the file grows.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.minutes: List[bytes] = []
+        self.offsets: List[int] = []
+        self.indexed_size = 0
+        with open(path, "rb") as f:
+            first_line = f.readline()
+        digest = hashlib.sha1(first_line).hexdigest()[:16]
+        directory = os.path.join(os.path.dirname(path) or ".", INDEX_DIR)
+        self.index_path = os.path.join(directory, f"{digest}.json")
+
+    def update(self) -> "LogIndex":
+        """Load the sidecar, index anything appended since, and save it"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self.minutes = [minute.encode() for minute in stored["minutes"]]
+            self.offsets = stored["offsets"]
+            self.indexed_size = stored["indexed_size"]
+        except (OSError, ValueError, KeyError):
+            self.minutes, self.offsets, self.indexed_size = [], [], 0
+
+        size = os.path.getsize(self.path)
+        if size < self.indexed_size:  # truncated and rewritten
+            self.minutes, self.offsets, self.indexed_size = [], [], 0
+        if size == self.indexed_size:
+            return self
+
+        for offset, record in iter_forward(self.path, self.indexed_size):
+            if record.timestamp is None or not record.text.endswith(b"\n"):
+                continue
+            minute = record.timestamp[:16]
+            if not self.minutes or minute > self.minutes[-1]:
+                self.minutes.append(minute)
+                self.offsets.append(offset)
+            self.indexed_size = offset + len(record.text)
+
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        temporary = f"{self.index_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "minutes": [minute.decode() for minute in self.minutes],
+                    "offsets": self.offsets,
+                    "indexed_size": self.indexed_size,
+                },
+                f,
+            )
+        os.replace(temporary, self.index_path)
+        return self
+
+    def bounds(self, since: bytes) -> Tuple[int, int]:
+        """Byte range holding the first record at or after since"""
+        # Last minute starting at or before since, and the one after it
+        start = bisect_right(self.minutes, since[:16]) - 1
+        low = self.offsets[start] if start >= 0 else 0
+        if start + 1 < len(self.offsets):
+            return low, self.offsets[start + 1]
+        return low, os.path.getsize(self.path)
+
+
+def _start_offset(path: str, since: Optional[bytes], use_index: bool) -> int:
+    if not since:
+        return 0
+    bounds = LogIndex(path).update().bounds(since) if use_index else None
+    return find_offset(path, since, bounds)
+
+
+def tail(
+    log_file: str, lines: int, log_filter: LogFilter, rotated: bool = True
+) -> List[LogRecord]:
+    """
+    The last matching records, oldest first, reading backwards from the end
+    of the newest file until enough records match or since is passed
+    """
+    files = log_files(log_file) if rotated else [log_file]
+    matched = []
+    for path in reversed(files):
+        for record in iter_reverse(path):
+            if (
+                log_filter.since
+                and record.timestamp is not None
+                and record.timestamp < log_filter.since
+            ):
+                return matched[::-1]
+            if log_filter.matches(record):
+                matched.append(record)
+                if len(matched) >= lines:
+                    return matched[::-1]
+    return matched[::-1]
 
 
-def view_logs(log_file, lines=50, filter_level=None, search_term=None, since=None):
+def query(
+    log_file: str,
+    log_filter: LogFilter,
+    rotated: bool = True,
+    use_index: bool = False,
+) -> Iterator[LogRecord]:
+    """Every matching record, oldest first, starting at since"""
+    for path in log_files(log_file) if rotated else [log_file]:
+        start = _start_offset(path, log_filter.since, use_index)
+        for _, record in iter_forward(path, start):
+            if (
+                log_filter.until
+                and record.timestamp is not None
+                and record.timestamp >= log_filter.until
+            ):
+                return
+            if log_filter.matches(record):
+                yield record
+
+
+def follow(log_file: str, log_filter: LogFilter, raw: bool = False) -> None:
+    """Print matching records as they are written, across rotations"""
+    f = open(log_file, "rb")
+    f.seek(0, os.SEEK_END)
+    inode = os.fstat(f.fileno()).st_ino
+    lines, pending = [], b""
+    try:
+        while True:
+            chunk = f.read(BLOCK_SIZE)
+            if chunk:
+                pending += chunk
+                *complete, pending = pending.split(b"\n")
+                for line in complete:
+                    line += b"\n"
+                    if TIMESTAMP.match(line) and lines:
+                        _print_matching(_record(lines), log_filter, raw)
+                        lines = []
+                    lines.append(line)
+                continue
+
+            # Idle: the last record is complete
+            if lines:
+                _print_matching(_record(lines), log_filter, raw)
+                lines = []
+            try:
+                current = os.stat(log_file)
+            except FileNotFoundError:
+                current = None
+            if current and (current.st_ino != inode or current.st_size < f.tell()):
+                # Rotated: the old file is fully read, start the new one
+                f.close()
+                f = open(log_file, "rb")
+                inode = os.fstat(f.fileno()).st_ino
+                continue
+            time.sleep(FOLLOW_INTERVAL_SECONDS)
+    finally:
+        f.close()
+
+
+def _print_matching(record: LogRecord, log_filter: LogFilter, raw: bool) -> None:
+    if log_filter.matches(record):
+        print_record(record, raw)
+
+
+def _render_json(text: str) -> str:
+    try:
+        entry = json.loads(text)
+    except ValueError:
+        return text
+    context = " ".join(
+        f"{field}={entry[field]}" for field in JSON_CONTEXT_FIELDS if entry.get(field)
+    )
+    line = (
+        f"{entry.get('time')} - {entry.get('logger')} - {entry.get('level')} - "
+        f"{entry.get('location')} - {entry.get('message')}"
+    )
+    if context:
+        line += f" [{context}]"
+    if entry.get("exception"):
+        line += "\n" + entry["exception"]
+    return line
+
+
+def print_record(record: LogRecord, raw: bool = False) -> None:
+    text = record.text.decode("utf-8", "replace").rstrip()
+    if not raw and text.startswith("{"):
+        text = _render_json(text)
+    color = COLORS.get(record.level)
+    # Color code different log levels
+    print(f"{color}{text}\033[0m" if color else text, flush=True)
+
+
+def view_logs(
+    log_file,
+    lines=50,
+    filter_level=None,
+    search_term=None,
+    since=None,
+    until=None,
+    regex=False,
+    rotated=True,
+    use_index=False,
+    follow_mode=False,
+    raw=False,
+):
     """View logs with various filtering options"""
 
     if not os.path.exists(log_file):
         print(f"❌ Log file not found: {log_file}")
         return
 
-    print(f"📋 Viewing logs from: {log_file}")
-    print(f"🔍 Filter: Level={filter_level}, Search='{search_term}', Since={since}")
+    files = log_files(log_file) if rotated else [log_file]
+    print(f"📋 Viewing logs from: {', '.join(files)}")
+    print(
+        f"🔍 Filter: Level={filter_level}, Search='{search_term}', "
+        f"Since={since}, Until={until}"
+    )
     print("=" * 80)
 
     try:
-        with open(log_file, "r", encoding="utf-8") as f:
-            all_lines = f.readlines()
-
-        # Apply filters
-        filtered_lines = []
-        for line in all_lines:
-            # Filter by log level
-            if filter_level and filter_level.upper() not in line.upper():
-                continue
+        log_filter = LogFilter(filter_level, search_term, regex, since, until)
+    except re.error as e:
+        print(f"❌ Invalid search pattern: {e}")
+        return
 
-            # Filter by search term
-            if search_term and search_term.lower() not in line.lower():
-                continue
+    try:
+        if lines > 0 and not until:
+            records = tail(log_file, lines, log_filter, rotated)
+        else:
+            records = query(log_file, log_filter, rotated, use_index)
+            if lines > 0:
+                records = _last(records, lines)
 
-            # Filter by time (if since is specified)
-            if since:
-                try:
-                    # Extract timestamp from log line (assuming format: YYYY-MM-DD HH:MM:SS)
-                    timestamp_str = line.split(" - ")[0]
-                    log_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S,%f")
-                    if log_time < since:
-                        continue
-                except (ValueError, IndexError):
-                    # If we can't parse the timestamp, include the line
-                    pass
-
-            filtered_lines.append(line)
-
-        # Show last N lines
-        if lines > 0:
-            filtered_lines = filtered_lines[-lines:]
-
-        if not filtered_lines:
+        shown = 0
+        for record in records:
+            print_record(record, raw)
+            shown += 1
+        if not shown:
             print("No logs found matching the specified criteria.")
-            return
-
-        for line in filtered_lines:
-            # Color code different log levels
-            if "ERROR" in line:
-                print(f"\033[91m{line.rstrip()}\033[0m")  # Red for errors
-            elif "WARNING" in line:
-                print(f"\033[93m{line.rstrip()}\033[0m")  # Yellow for warnings
-            elif "INFO" in line:
-                print(f"\033[94m{line.rstrip()}\033[0m")  # Blue for info
-            else:
-                print(line.rstrip())
 
+        if follow_mode:
+            follow(log_file, log_filter, raw)
+
+    except KeyboardInterrupt:
+        pass
     except Exception as e:
         print(f"❌ Error reading log file: {e}")
 
 
+def _last(records: Iterator[LogRecord], count: int) -> List[LogRecord]:
+    return list(deque(records, maxlen=count))
+
+
+def _parse_time(value: str) -> datetime:
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
 def main():
     parser = argparse.ArgumentParser(description="View WellStation backend logs")
     parser.add_argument(
@@ -85,17 +477,46 @@ def main():
         "-n",
         type=int,
         default=50,
-        help="Number of lines to show (default: 50, use 0 for all)",
+        help="Number of log records to show (default: 50, use 0 for all)",
     )
     parser.add_argument(
         "--level",
         "-l",
-        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
         help="Filter by log level",
     )
     parser.add_argument("--search", "-s", help="Search for specific text in logs")
     parser.add_argument(
-        "--since", help="Show logs since (format: YYYY-MM-DD or YYYY-MM-DD HH:MM)"
+        "--regex",
+        "-r",
+        action="store_true",
+        help="Treat --search as a regular expression (case-insensitive)",
+    )
+    parser.add_argument(
+        "--since",
+        help="Show logs since (format: YYYY-MM-DD, YYYY-MM-DD HH:MM or YYYY-MM-DD HH:MM:SS)",
+    )
+    parser.add_argument("--until", help="Show logs before (same formats as --since)")
+    parser.add_argument(
+        "--follow",
+        "-F",
+        action="store_true",
+        help="Keep printing new matching logs as they are written",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="Use (and update) the per-minute offset index in logs/.index for --since",
+    )
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="Print JSON log lines as stored instead of as text",
+    )
+    parser.add_argument(
+        "--no-rotated",
+        action="store_true",
+        help="Only read the current file, not its rotated backups",
     )
     parser.add_argument(
         "--errors-only",
@@ -109,28 +530,39 @@ def main():
     if args.errors_only:
         args.file = "logs/wellstation_errors.log"
 
-    # Parse since parameter
-    since_time = None
-    if args.since:
-        try:
-            if len(args.since) == 10:  # YYYY-MM-DD
-                since_time = datetime.strptime(args.since, "%Y-%m-%d")
-            else:  # YYYY-MM-DD HH:MM
-                since_time = datetime.strptime(args.since, "%Y-%m-%d %H:%M")
-        except ValueError:
-            print(f"❌ Invalid date format: {args.since}")
-            print("Use format: YYYY-MM-DD or YYYY-MM-DD HH:MM")
-            return
+    # Parse since / until parameters
+    times = {}
+    for name in ("since", "until"):
+        value = getattr(args, name)
+        if value:
+            try:
+                times[name] = _parse_time(value)
+            except ValueError:
+                print(f"❌ Invalid date format: {value}")
+                print("Use format: YYYY-MM-DD, YYYY-MM-DD HH:MM or YYYY-MM-DD HH:MM:SS")
+                return
 
     # Check if logs directory exists
-    if not os.path.exists("logs"):
+    if not os.path.exists(os.path.dirname(args.file) or "."):
         print(
             "❌ Logs directory not found. Make sure the backend has been run at least once."
         )
         return
 
-    view_logs(args.file, args.lines, args.level, args.search, since_time)
+    view_logs(
+        args.file,
+        args.lines,
+        args.level,
+        args.search,
+        times.get("since"),
+        times.get("until"),
+        regex=args.regex,
+        rotated=not args.no_rotated,
+        use_index=args.index,
+        follow_mode=args.follow,
+        raw=args.raw,
+    )
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())